@@ -0,0 +1,93 @@
+# Mede a latência ponta a ponta de agendar_consulta contra um serviço em execução.
+#
+# Cada chamada usa um horário distinto (dias a partir de --inicio, 11 horários por dia),
+# então nenhuma cai em uk_horario_medico/uk_horario_paciente. Use um --inicio longe o
+# bastante no futuro para não colidir com agendamentos reais. O validador confirma
+# cartões terminados em dígito par: o --dados-pagamento padrão mede o caminho
+# REJEITADO; use, por exemplo, 4111111111111112 para o CONFIRMADO.
+#
+# Uso:
+#   RPC_ADDRESS=http://localhost:8000 python scripts/bench_agendar.py \
+#       --token 2 --paciente-id 3 --medico-id 4 --chamadas 500 --concorrencia 8
+import argparse
+import os
+import threading
+import time
+import xmlrpc.client
+from datetime import date, timedelta
+
+def percentil(valores, p):
+    if not valores:
+        return 0.0
+    indice = min(len(valores) - 1, int(round(p / 100 * (len(valores) - 1))))
+    return valores[indice]
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de latência de agendar_consulta")
+    parser.add_argument("--rpc", default=os.getenv("RPC_ADDRESS"))
+    parser.add_argument("--token", required=True, help="ID do paciente ou recepcionista que agenda")
+    parser.add_argument("--paciente-id", type=int, required=True)
+    parser.add_argument("--medico-id", type=int, required=True)
+    parser.add_argument("--chamadas", type=int, default=500)
+    parser.add_argument("--concorrencia", type=int, default=1)
+    parser.add_argument("--inicio", default=(date.today() + timedelta(days=3650)).isoformat(), help="YYYY-MM-DD")
+    parser.add_argument("--pagamento", default="PARTICULAR", choices=["CONVENIO", "PARTICULAR"])
+    parser.add_argument("--dados-pagamento", default="4111111111111111")
+    args = parser.parse_args()
+
+    if not args.rpc:
+        parser.error("Informe --rpc ou defina RPC_ADDRESS.")
+
+    inicio = date.fromisoformat(args.inicio)
+    proxima = iter(range(args.chamadas))
+    proxima_lock = threading.Lock()
+
+    latencias = []
+    erros = []
+    lock = threading.Lock()
+
+    def worker():
+        # ServerProxy não é thread-safe: um por thread.
+        server = xmlrpc.client.ServerProxy(args.rpc, allow_none=True)
+
+        while True:
+            with proxima_lock:
+                i = next(proxima, None)
+            if i is None:
+                return
+
+            dia = (inicio + timedelta(days=i // 11)).isoformat()
+            horario = 6 + i % 11
+
+            t0 = time.perf_counter()
+            try:
+                server.agendar_consulta(
+                    str(args.token), str(args.paciente_id), str(args.medico_id),
+                    dia, horario, "CARDIOLOGIA", args.pagamento, args.dados_pagamento
+                )
+                with lock:
+                    latencias.append(time.perf_counter() - t0)
+            except Exception as e:
+                with lock:
+                    erros.append(str(e))
+
+    t0 = time.perf_counter()
+    threads = [threading.Thread(target=worker) for _ in range(args.concorrencia)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    total = time.perf_counter() - t0
+
+    latencias.sort()
+    print(f"Chamadas: {len(latencias)} ok, {len(erros)} com erro, em {total:.2f}s ({len(latencias) / total:.1f}/s)")
+    for p in (50, 95, 99):
+        print(f"p{p}: {percentil(latencias, p) * 1000:.2f} ms")
+    if latencias:
+        print(f"máx: {latencias[-1] * 1000:.2f} ms")
+
+    for erro in sorted(set(erros))[:5]:
+        print(f"Erro: {erro}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+# Compara XML-RPC e JSON-RPC na resposta de consultar_agendamentos: tamanho do
+# payload (cru e com gzip) e tempo de serialização/desserialização.
+#
+# Sem --rpc, gera linhas sintéticas no formato de AgendamentoRepository._row_to_dict.
+# Com --rpc e --token, chama o serviço em execução pelos dois endpoints e mede também
+# o tempo ponta a ponta.
+#
+# Uso (a partir de agendamento_service/):
+#   python scripts/bench_serializacao.py --linhas 10000
+#   python scripts/bench_serializacao.py --rpc http://localhost:8000 --token 1
+import argparse
+import gzip
+import json
+import os
+import sys
+import time
+import urllib.request
+import xmlrpc.client
+from pathlib import Path
+
+# Config exige estas variáveis, mas elas não importam para o benchmark.
+for nome in ("RPC_PORT", "VALIDATION_PORT", "RABBITMQ_PORT"):
+    os.environ.setdefault(nome, "0")
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from src.server import jsonrpc
+
+ESPECIALIDADES = ["CARDIOLOGIA", "PEDIATRIA", "ORTOPEDIA", "DERMATOLOGIA"]
+PAGAMENTOS = ["CONVENIO", "PARTICULAR"]
+STATUS = ["PENDENTE", "CONFIRMADO", "REJEITADO", "CONCLUIDO", "CANCELADO"]
+
+def linhas_sinteticas(quantidade):
+    return [
+        {
+            "id": i + 1,
+            "paciente_id": 1000 + i % 2000,
+            "medico_id": 10 + i % 100,
+            "data": f"2025-{1 + i // 30000 % 12:02d}-{1 + i // 1100 % 28:02d}",
+            "horario": 6 + i // 100 % 11,
+            "especialidade": ESPECIALIDADES[i % 4],
+            "tipo_pagamento": PAGAMENTOS[i % 2],
+            "status": STATUS[i // 7 % 5]
+        }
+        for i in range(quantidade)
+    ]
+
+def cronometrar(funcao, repeticoes):
+    melhor = float("inf")
+    for _ in range(repeticoes):
+        t0 = time.perf_counter()
+        resultado = funcao()
+        melhor = min(melhor, time.perf_counter() - t0)
+    return melhor, resultado
+
+def comparar_offline(linhas, repeticoes):
+    formatos = {
+        "XML-RPC": (
+            lambda: xmlrpc.client.dumps((linhas,), methodresponse=True, allow_none=True).encode(),
+            lambda body: xmlrpc.client.loads(body)[0][0]
+        ),
+        "JSON-RPC": (
+            lambda: jsonrpc.dumps({"jsonrpc": "2.0", "result": linhas, "id": 1}),
+            lambda body: json.loads(body)["result"]
+        )
+    }
+
+    print(f"{'formato':<10} {'bytes':>12} {'gzip':>12} {'serializar':>12} {'desserializar':>14}")
+    for nome, (serializar, desserializar) in formatos.items():
+        t_ser, body = cronometrar(serializar, repeticoes)
+        t_des, _ = cronometrar(lambda: desserializar(body), repeticoes)
+        compactado = len(gzip.compress(body))
+        print(f"{nome:<10} {len(body):>12,} {compactado:>12,} {t_ser * 1000:>10.1f}ms {t_des * 1000:>12.1f}ms")
+
+def comparar_online(endereco, token, repeticoes):
+    def via_xmlrpc():
+        proxy = xmlrpc.client.ServerProxy(endereco, allow_none=True)
+        return proxy.consultar_agendamentos(str(token))
+
+    def via_jsonrpc():
+        body = json.dumps({"jsonrpc": "2.0", "method": "consultar_agendamentos", "params": [str(token)], "id": 1}).encode()
+        request = urllib.request.Request(
+            f"{endereco.rstrip('/')}/jsonrpc",
+            data=body,
+            headers={"Content-Type": "application/json", "Accept-Encoding": "gzip"}
+        )
+        with urllib.request.urlopen(request) as resposta:
+            data = resposta.read()
+            if resposta.headers.get("Content-Encoding") == "gzip":
+                data = gzip.decompress(data)
+        return json.loads(data)["result"]
+
+    for nome, chamada in (("XML-RPC", via_xmlrpc), ("JSON-RPC", via_jsonrpc)):
+        tempo, linhas = cronometrar(chamada, repeticoes)
+        print(f"{nome:<10} {len(linhas):>8} linhas em {tempo * 1000:.1f}ms (melhor de {repeticoes})")
+
+    return linhas
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de serialização XML-RPC x JSON-RPC")
+    parser.add_argument("--linhas", type=int, default=10000)
+    parser.add_argument("--repeticoes", type=int, default=5)
+    parser.add_argument("--rpc", default=None, help="Endereço do serviço para a medição ponta a ponta")
+    parser.add_argument("--token", default=None, help="ID de quem consulta (com --rpc)")
+    args = parser.parse_args()
+
+    if args.rpc:
+        if not args.token:
+            parser.error("--rpc exige --token.")
+        linhas = comparar_online(args.rpc, args.token, args.repeticoes)
+        print()
+    else:
+        linhas = linhas_sinteticas(args.linhas)
+
+    print(f"Payload de {len(linhas)} linhas:")
+    comparar_offline(linhas, args.repeticoes)
+
+if __name__ == "__main__":
+    main()
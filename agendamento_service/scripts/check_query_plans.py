@@ -0,0 +1,246 @@
+# Verifica os planos de execução das consultas do AgendamentoRepository.
+#
+# Cria um schema descartável no Postgres configurado (DB_HOST, DB_PORT, ...), aplica
+# database/init.sql e as migrations, popula uma tabela sintética grande e roda
+# EXPLAIN nas consultas reais do repositório. Sai com código 1 se algum plano cair
+# em Seq Scan na tabela agendamento, usar Incremental Sort ou, em consulta paginada,
+# ordenar mais de --max-sort linhas, para poder ser usado como etapa do build.
+#
+# Uso (a partir de agendamento_service/):
+#   python scripts/check_query_plans.py [--linhas 200000] [--manter]
+import argparse
+import json
+import os
+import re
+import sys
+from pathlib import Path
+
+# Config exige estas variáveis, mas elas não importam para a verificação.
+for nome in ("RPC_PORT", "VALIDATION_PORT", "RABBITMQ_PORT"):
+    os.environ.setdefault(nome, "0")
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from src.database.connection import get_connection
+from src.repository.agendamento_repository import AgendamentoRepository
+
+DATABASE_DIR = Path(__file__).resolve().parents[2] / "database"
+SCHEMA = "plan_check"
+
+class _ExplainCursor:
+    # Troca cada consulta pelo seu EXPLAIN e guarda o plano; o repositório recebe
+    # um resultado vazio.
+    def __init__(self, cursor, planos):
+        self.cursor = cursor
+        self.planos = planos
+        self.rowcount = 0
+        self.itersize = None
+
+    def execute(self, query, params=None):
+        self.cursor.execute("EXPLAIN (FORMAT JSON) " + query, params)
+        plano = self.cursor.fetchone()[0]
+        if isinstance(plano, str):
+            plano = json.loads(plano)
+        self.planos.append(plano[0]["Plan"])
+
+    def fetchall(self):
+        return []
+
+    def fetchone(self):
+        return None
+
+    def __iter__(self):
+        return iter(())
+
+    def close(self):
+        self.cursor.close()
+
+class _ExplainConnection:
+    def __init__(self, conn, planos):
+        self.conn = conn
+        self.planos = planos
+
+    def cursor(self, name=None):
+        return _ExplainCursor(self.conn.cursor(), self.planos)
+
+    def commit(self):
+        self.conn.rollback()
+
+    def rollback(self):
+        self.conn.rollback()
+
+class _ExplainPool:
+    def __init__(self, conn):
+        self.conn = conn
+        self.planos = []
+
+    def acquire(self):
+        return _ExplainConnection(self.conn, self.planos)
+
+    def release(self, conn):
+        pass
+
+def statements(path):
+    # CREATE INDEX CONCURRENTLY não roda em bloco de transação: executa um comando por vez.
+    sql = path.read_text()
+    return [stmt.strip() for stmt in re.split(r";\s*$", sql, flags=re.MULTILINE) if stmt.strip()]
+
+def preparar_schema(conn, linhas, medicos, pacientes):
+    conn.autocommit = True
+    cursor = conn.cursor()
+
+    cursor.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+    cursor.execute(f"CREATE SCHEMA {SCHEMA}")
+    cursor.execute(f"SET search_path TO {SCHEMA}")
+
+    arquivos = [DATABASE_DIR / "init.sql"] + sorted((DATABASE_DIR / "migrations").glob("*.sql"))
+    for arquivo in arquivos:
+        for stmt in statements(arquivo):
+            cursor.execute(stmt)
+
+    for tipo, quantidade in (("MEDICO", medicos), ("PACIENTE", pacientes)):
+        cursor.execute(
+            """
+                INSERT INTO usuario (nome, email, senha, tipo)
+                SELECT %s || i, lower(%s) || i || '@plan.check', 'x', %s
+                FROM generate_series(1, %s) i
+            """,
+            (tipo, tipo, tipo, quantidade)
+        )
+
+    cursor.execute("SELECT min(id) FROM usuario WHERE tipo = 'MEDICO'")
+    primeiro_medico = cursor.fetchone()[0]
+    cursor.execute("SELECT min(id) FROM usuario WHERE tipo = 'PACIENTE'")
+    primeiro_paciente = cursor.fetchone()[0]
+
+    # Cada bloco de `medicos` linhas ocupa um horário: médicos distintos e, como
+    # medicos <= pacientes, pacientes distintos, respeitando as duas UNIQUE.
+    cursor.execute(
+        """
+            INSERT INTO agendamento (paciente_id, medico_id, data, horario, especialidade, tipo_pagamento, status)
+            SELECT
+                %(p0)s + (i %% %(pacientes)s),
+                %(m0)s + (i %% %(medicos)s),
+                DATE '2025-01-01' + (i / (%(medicos)s * 11)),
+                6 + (i / %(medicos)s) %% 11,
+                (ARRAY['CARDIOLOGIA', 'PEDIATRIA', 'ORTOPEDIA', 'DERMATOLOGIA'])[1 + i %% 4]::especialidade_tipo,
+                (ARRAY['CONVENIO', 'PARTICULAR'])[1 + i %% 2]::pagamento_tipo,
+                (ARRAY['PENDENTE', 'CONFIRMADO', 'REJEITADO', 'CONCLUIDO', 'CANCELADO'])[1 + (i / 7) %% 5]::status_agendamento
+            FROM generate_series(0, %(linhas)s - 1) i
+        """,
+        {"p0": primeiro_paciente, "m0": primeiro_medico, "pacientes": pacientes, "medicos": medicos, "linhas": linhas}
+    )
+
+    # VACUUM preenche o visibility map, como o autovacuum faz em produção; sem ele o
+    # planner conta heap fetch em toda linha de um Index Only Scan.
+    cursor.execute("VACUUM ANALYZE")
+    cursor.close()
+    conn.autocommit = False
+
+    return primeiro_paciente, primeiro_medico
+
+def problemas(plano, max_sort, sob_limit=False):
+    encontrados = []
+    tipo = plano["Node Type"]
+
+    if tipo == "Seq Scan" and plano.get("Relation Name") == "agendamento":
+        encontrados.append("Seq Scan em agendamento")
+
+    # Incremental Sort: o índice só entrega um prefixo da ordem (faltou o id do desempate).
+    if tipo == "Incremental Sort":
+        encontrados.append(f"Incremental Sort por {', '.join(plano.get('Sort Key', []))}")
+
+    # Sem LIMIT a consulta devolve todas as linhas filtradas, então ordenar o que veio do
+    # índice custa o mesmo que devolver. Paginada, a página tem de sair na ordem do índice;
+    # só um top-N pequeno em memória é aceito.
+    if tipo == "Sort" and sob_limit and plano["Plans"][0]["Plan Rows"] > max_sort:
+        encontrados.append(f"Sort por {', '.join(plano.get('Sort Key', []))} ({plano['Plans'][0]['Plan Rows']} linhas)")
+
+    for filho in plano.get("Plans", []):
+        encontrados.extend(problemas(filho, max_sort, sob_limit or tipo == "Limit"))
+
+    return encontrados
+
+def resumo(plano):
+    nome = plano["Node Type"]
+    if "Index Name" in plano:
+        nome += f" ({plano['Index Name']})"
+    filhos = [resumo(filho) for filho in plano.get("Plans", [])]
+    return nome + (f" -> {', '.join(filhos)}" if filhos else "")
+
+def main():
+    parser = argparse.ArgumentParser(description="Regressão de planos das consultas de agendamento")
+    parser.add_argument("--linhas", type=int, default=200000)
+    parser.add_argument("--medicos", type=int, default=100)
+    parser.add_argument("--pacientes", type=int, default=2000)
+    parser.add_argument("--max-sort", type=int, default=100, help="Linhas que uma consulta paginada pode ordenar em memória")
+    parser.add_argument("--manter", action="store_true", help="Não apaga o schema ao final")
+    args = parser.parse_args()
+
+    if args.medicos > args.pacientes:
+        parser.error("--medicos não pode ser maior que --pacientes.")
+
+    conn = get_connection()
+
+    try:
+        paciente, medico = preparar_schema(conn, args.linhas, args.medicos, args.pacientes)
+
+        cursor = conn.cursor()
+        cursor.execute(f"SET search_path TO {SCHEMA}")
+        cursor.close()
+
+        pool = _ExplainPool(conn)
+        repository = AgendamentoRepository(pool)
+
+        # Consultas de tabela inteira (list_all sem filtro, stream) ficam de fora: para
+        # elas Seq Scan + Sort é o plano certo.
+        casos = [
+            ("get_by_id", lambda: repository.get_by_id(12345)),
+            ("list_all + status", lambda: repository.list_all(status="CONFIRMADO")),
+            ("list_by_paciente", lambda: repository.list_by_paciente(paciente)),
+            ("list_by_paciente + status", lambda: repository.list_by_paciente(paciente, status="CONFIRMADO")),
+            ("list_by_medico", lambda: repository.list_by_medico(medico)),
+            ("list_by_medico + status", lambda: repository.list_by_medico(medico, status="CONFIRMADO")),
+            ("list_page", lambda: repository.list_page(limit=50)),
+            ("list_page + cursor", lambda: repository.list_page(after=("2025-03-01", 10, 0), limit=50)),
+            ("list_page + status", lambda: repository.list_page(status="CONFIRMADO", limit=50)),
+            ("list_page + status + cursor", lambda: repository.list_page(status="CANCELADO", after=("2025-03-01", 10, 0), limit=50)),
+            ("list_page + datas", lambda: repository.list_page(data_inicio="2025-02-01", data_fim="2025-02-28", limit=50)),
+            ("list_page paciente", lambda: repository.list_page(paciente_id=paciente, limit=50)),
+            ("list_page paciente + cursor", lambda: repository.list_page(paciente_id=paciente, after=("2025-03-01", 10, 0), limit=50)),
+            ("list_page medico", lambda: repository.list_page(medico_id=medico, limit=50)),
+            ("list_page medico + cursor", lambda: repository.list_page(medico_id=medico, after=("2025-03-01", 10, 0), limit=50)),
+            ("list_page paciente + status", lambda: repository.list_page(paciente_id=paciente, status="CONFIRMADO", limit=50)),
+            ("list_page medico + status", lambda: repository.list_page(medico_id=medico, status="CONFIRMADO", limit=50)),
+        ]
+
+        falhas = 0
+        for nome, executar in casos:
+            pool.planos.clear()
+            executar()
+
+            encontrados = [p for plano in pool.planos for p in problemas(plano, args.max_sort)]
+            estado = "FALHOU" if encontrados else "OK"
+            print(f"[{estado}] {nome}: {' | '.join(resumo(plano) for plano in pool.planos)}")
+            for problema in encontrados:
+                print(f"         {problema}")
+
+            falhas += bool(encontrados)
+
+    finally:
+        conn.rollback()
+        if not args.manter:
+            conn.autocommit = True
+            cursor = conn.cursor()
+            cursor.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+            cursor.close()
+        conn.close()
+
+    if falhas:
+        print(f"\n{falhas} consulta(s) com plano regredido.")
+        sys.exit(1)
+
+    print("\nTodos os planos usam índice.")
+
+if __name__ == "__main__":
+    main()
@@ -7,15 +7,82 @@ class Config:
     DB_PASSWORD = os.getenv("DB_PASSWORD")
     DB_NAME = os.getenv("DB_NAME")
 
+    DB_POOL_MIN_SIZE = int(os.getenv("DB_POOL_MIN_SIZE", "1"))
+    DB_POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", "10"))
+    DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "5"))  # Segundos aguardando uma conexão livre.
+    DB_POOL_MAX_AGE = float(os.getenv("DB_POOL_MAX_AGE", "1800"))  # Segundos até reciclar a conexão.
+    DB_POOL_HEALTH_CHECK = os.getenv("DB_POOL_HEALTH_CHECK", "true").lower() == "true"
+
     RPC_PORT = int(os.getenv("RPC_PORT"))
+    RPC_SERVER_MODE = os.getenv("RPC_SERVER_MODE", "pool")  # "pool", "threaded" (uma thread por requisição) ou "asyncio" (só agendar_consulta com I/O assíncrono).
+    RPC_WORKERS = int(os.getenv("RPC_WORKERS", "16"))
+    RPC_QUEUE_SIZE = int(os.getenv("RPC_QUEUE_SIZE", "64"))
+    RPC_REQUEST_TIMEOUT = float(os.getenv("RPC_REQUEST_TIMEOUT", "10"))  # Segundos.
+    RPC_REJECT_READ_TIMEOUT = float(os.getenv("RPC_REJECT_READ_TIMEOUT", "0.2"))  # Espera pela linha da requisição ao recusar.
+    RPC_PROCESSES = int(os.getenv("RPC_PROCESSES", "1"))  # > 1: pre-fork com SO_REUSEPORT; cada worker tem seus próprios pools.
+    RPC_SHUTDOWN_TIMEOUT = float(os.getenv("RPC_SHUTDOWN_TIMEOUT", "15"))  # Segundos para um worker drenar antes do kill.
+    RPC_WORKER_START_TIMEOUT = float(os.getenv("RPC_WORKER_START_TIMEOUT", "30"))  # Prazo da nova geração no reload.
+    RPC_WORKER_MIN_UPTIME = float(os.getenv("RPC_WORKER_MIN_UPTIME", "1"))  # Worker que cai antes disso espera para reiniciar.
+    RPC_METRICS_DIR = os.getenv("RPC_METRICS_DIR", "/tmp/agendamento_service")  # Snapshots de métricas por worker.
+    RPC_METRICS_INTERVAL = float(os.getenv("RPC_METRICS_INTERVAL", "5"))  # Segundos entre snapshots.
+    RPC_KEEPALIVE = os.getenv("RPC_KEEPALIVE", "true").lower() == "true"  # HTTP/1.1 com conexões persistentes.
+    RPC_KEEPALIVE_TIMEOUT = float(os.getenv("RPC_KEEPALIVE_TIMEOUT", "5"))  # Segundos ociosos até fechar; no modo pool a conexão ociosa não ocupa worker.
+    ASYNC_MAX_IN_FLIGHT = int(os.getenv("ASYNC_MAX_IN_FLIGHT", "5000"))  # Chamadas simultâneas no modo asyncio antes de recusar.
+    ASYNC_BLOCKING_WORKERS = int(os.getenv("ASYNC_BLOCKING_WORKERS", "32"))  # Threads para os métodos ainda síncronos.
+    ASYNC_BACKLOG = int(os.getenv("ASYNC_BACKLOG", "1024"))
+    ASYNC_DB_POOL_MAX_SIZE = int(os.getenv("ASYNC_DB_POOL_MAX_SIZE", "20"))  # Conexões do asyncpg.
+    RPC_GZIP_MIN_SIZE = int(os.getenv("RPC_GZIP_MIN_SIZE", "1400"))  # Bytes a partir dos quais a resposta vai com gzip, se o cliente aceitar.
+
+    PAGE_SIZE_DEFAULT = int(os.getenv("PAGE_SIZE_DEFAULT", "50"))
+    PAGE_SIZE_MAX = int(os.getenv("PAGE_SIZE_MAX", "500"))
+
+    EXPORT_ITERSIZE = int(os.getenv("EXPORT_ITERSIZE", "2000"))  # Linhas por ida ao banco no cursor nomeado.
+    EXPORT_CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", "65536"))  # Bytes por chunk HTTP.
+
+    AVAILABILITY_MAX_DAYS = int(os.getenv("AVAILABILITY_MAX_DAYS", "62"))  # Maior intervalo aceito em horarios_disponiveis.
+    BOOKING_BATCH_MAX = int(os.getenv("BOOKING_BATCH_MAX", "500"))  # Itens por chamada de agendar_consultas_lote.
 
     VALIDATION_HOST = os.getenv("VALIDATION_HOST")
     VALIDATION_PORT = int(os.getenv("VALIDATION_PORT"))
     BUFFER_SIZE = 4096
+    VALIDATION_MODE = os.getenv("VALIDATION_MODE", "framed")  # "framed" (conexões persistentes) ou "legacy".
+    VALIDATION_POOL_SIZE = int(os.getenv("VALIDATION_POOL_SIZE", "2"))
+    VALIDATION_TIMEOUT = float(os.getenv("VALIDATION_TIMEOUT", "5"))  # Segundos.
+    VALIDATION_BATCH_SIZE = int(os.getenv("VALIDATION_BATCH_SIZE", "500"))  # Itens por lote enviado.
+    VALIDATION_ASYNC_WORKERS = int(os.getenv("VALIDATION_ASYNC_WORKERS", "16"))  # Validações em andamento durante as consultas de role.
+
+    USERS_GRPC_TIMEOUT = float(os.getenv("USERS_GRPC_TIMEOUT", "5"))  # Prazo em segundos das consultas de usuários de uma chamada, fila do executor incluída.
+    USERS_LOOKUP_WORKERS = int(os.getenv("USERS_LOOKUP_WORKERS", str(3 * RPC_WORKERS)))  # Três consultas por chamada em cada worker do pool.
+
+    ROLE_CACHE_SIZE = int(os.getenv("ROLE_CACHE_SIZE", "10000"))
+    ROLE_CACHE_TTL = float(os.getenv("ROLE_CACHE_TTL", "60"))  # Segundos; 0 desativa o cache.
+    ROLE_CACHE_NEGATIVE_TTL = float(os.getenv("ROLE_CACHE_NEGATIVE_TTL", "10"))  # Usuário não encontrado.
 
     RABBITMQ_HOST = os.getenv("RABBITMQ_HOST")
     RABBITMQ_PORT = int(os.getenv("RABBITMQ_PORT"))
     RABBITMQ_USER = os.getenv("RABBITMQ_USER")
     RABBITMQ_PASSWORD = os.getenv("RABBITMQ_PASSWORD")
 
-    NOTIFICATION_EXCHANGE = "notifications"
\ No newline at end of file
+    NOTIFICATION_EXCHANGE = "notifications"
+    NOTIFICATION_TOPOLOGY = os.getenv("NOTIFICATION_TOPOLOGY", "per_user")  # "per_user" (uma fila por usuário) ou "sharded".
+    NOTIFICATION_SHARDS = int(os.getenv("NOTIFICATION_SHARDS", "16"))  # Precisa ser igual nos clientes.
+    NOTIFICATION_STREAM_MAX_AGE = os.getenv("NOTIFICATION_STREAM_MAX_AGE", "7D")  # Retenção das filas stream.
+    NOTIFICATION_ENCODING = os.getenv("NOTIFICATION_ENCODING", "json")  # "json" ou "compact" (binário; exige clientes atualizados).
+
+    PUBLISHER_POOL_SIZE = int(os.getenv("PUBLISHER_POOL_SIZE", "8"))  # Conexões AMQP mantidas abertas.
+    PUBLISHER_POOL_TIMEOUT = float(os.getenv("PUBLISHER_POOL_TIMEOUT", "5"))  # Segundos aguardando um publicador livre.
+    DECLARED_QUEUES_CACHE_SIZE = int(os.getenv("DECLARED_QUEUES_CACHE_SIZE", "100000"))
+
+    PUBLISH_MODE = os.getenv("PUBLISH_MODE", "fire_and_forget")  # "fire_and_forget", "sync" ou "async".
+    PUBLISH_BATCH_SIZE = int(os.getenv("PUBLISH_BATCH_SIZE", "100"))
+    PUBLISH_LINGER = float(os.getenv("PUBLISH_LINGER", "0.005"))  # Segundos aguardando o lote encher.
+    PUBLISH_CONFIRM_TIMEOUT = float(os.getenv("PUBLISH_CONFIRM_TIMEOUT", "5"))
+    PUBLISH_MAX_RETRIES = int(os.getenv("PUBLISH_MAX_RETRIES", "5"))
+    PUBLISH_RETRY_BACKOFF = float(os.getenv("PUBLISH_RETRY_BACKOFF", "0.2"))  # Dobra a cada tentativa.
+
+    NOTIFICATION_DELIVERY = os.getenv("NOTIFICATION_DELIVERY", "outbox")  # "outbox" ou "direct" (publica durante a RPC).
+    NOTIFICATION_INBOX = os.getenv("NOTIFICATION_INBOX", "true").lower() == "true"  # Grava o histórico em notificacao.
+    OUTBOX_RELAY_WORKERS = int(os.getenv("OUTBOX_RELAY_WORKERS", "1"))
+    OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "100"))
+    OUTBOX_POLL_INTERVAL = float(os.getenv("OUTBOX_POLL_INTERVAL", "0.5"))  # Segundos entre varreduras sem aviso.
+    OUTBOX_CLAIM_LEASE = float(os.getenv("OUTBOX_CLAIM_LEASE", "30"))  # Segundos de reserva de um lote; vencida, outro relay o retoma.
\ No newline at end of file
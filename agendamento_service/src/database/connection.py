@@ -1,6 +1,16 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
 import psycopg2
+from psycopg2 import extensions
+
 from src.config import Config
 
+class PoolTimeoutError(Exception):
+    pass
+
 def get_connection():
     return psycopg2.connect(
         host=Config.DB_HOST,
@@ -8,4 +18,199 @@ def get_connection():
         user=Config.DB_USER,
         password=Config.DB_PASSWORD,
         dbname=Config.DB_NAME
-    )
\ No newline at end of file
+    )
+
+class ConnectionPool:
+    def __init__(self, min_size, max_size, timeout, max_age, health_check=True, factory=get_connection):
+        if max_size < 1 or min_size > max_size:
+            raise ValueError("Tamanho do pool inválido.")
+
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_age = max_age
+        self.health_check = health_check
+        self.factory = factory
+
+        self._cond = threading.Condition()
+        self._idle = deque()  # (conexão, criada_em)
+        self._created_at = {}
+        self._size = 0
+        self._in_use = 0
+        self._closed = False
+
+        self._checkouts = 0
+        self._waits = 0
+        self._wait_time_total = 0.0
+        self._wait_time_max = 0.0
+        self._checkout_failures = 0
+        self._discarded = 0
+
+        for _ in range(min_size):
+            conn = self._open()
+            self._idle.append((conn, self._created_at[id(conn)]))
+
+    def _open(self):
+        conn = self.factory()
+        self._created_at[id(conn)] = time.monotonic()
+        self._size += 1
+        return conn
+
+    def _close_quietly(self, conn):
+        self._created_at.pop(id(conn), None)
+        self._discarded += 1
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _discard(self, conn):
+        self._close_quietly(conn)
+        self._size -= 1
+
+    def _expired(self, created_at):
+        return self.max_age and (time.monotonic() - created_at) > self.max_age
+
+    def _healthy(self, conn):
+        if conn.closed:
+            return False
+
+        if not self.health_check:
+            return True
+
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def acquire(self):
+        inicio = time.monotonic()
+        deadline = inicio + self.timeout
+        esperou = False
+
+        with self._cond:
+            while True:
+                if self._closed:
+                    self._checkout_failures += 1
+                    raise PoolTimeoutError("Erro interno no servidor: pool de conexões encerrado.")
+
+                if self._idle:
+                    conn, created_at = self._idle.popleft()
+                    self._in_use += 1
+                    break
+
+                if self._size < self.max_size:
+                    # Reserva a vaga; a conexão é aberta fora do lock.
+                    self._size += 1
+                    self._in_use += 1
+                    conn, created_at = None, None
+                    break
+
+                restante = deadline - time.monotonic()
+                if restante <= 0:
+                    self._checkout_failures += 1
+                    raise PoolTimeoutError("Erro interno no servidor: pool de conexões esgotado.")
+
+                esperou = True
+                self._cond.wait(restante)
+
+        try:
+            if conn is not None and (self._expired(created_at) or not self._healthy(conn)):
+                # A vaga continua reservada para a conexão substituta.
+                with self._cond:
+                    self._close_quietly(conn)
+                conn = None
+
+            if conn is None:
+                conn = self.factory()
+                with self._cond:
+                    self._created_at[id(conn)] = time.monotonic()
+
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._in_use -= 1
+                self._checkout_failures += 1
+                self._cond.notify()
+            raise
+
+        espera = time.monotonic() - inicio
+        with self._cond:
+            self._checkouts += 1
+            if esperou:
+                self._waits += 1
+            self._wait_time_total += espera
+            self._wait_time_max = max(self._wait_time_max, espera)
+
+        return conn
+
+    def release(self, conn, discard=False):
+        if not discard and not conn.closed:
+            try:
+                if conn.get_transaction_status() != extensions.TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+            except psycopg2.Error:
+                discard = True
+
+        with self._cond:
+            self._in_use -= 1
+            created_at = self._created_at.get(id(conn))
+
+            if discard or conn.closed or self._closed or created_at is None or self._expired(created_at):
+                self._discard(conn)
+            else:
+                self._idle.append((conn, created_at))
+
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self):
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def metrics(self):
+        with self._cond:
+            return {
+                "size": self._size,
+                "in_use": self._in_use,
+                "idle": len(self._idle),
+                "max_size": self.max_size,
+                "checkouts": self._checkouts,
+                "waits": self._waits,
+                "wait_time_total": self._wait_time_total,
+                "wait_time_max": self._wait_time_max,
+                "checkout_failures": self._checkout_failures,
+                "discarded": self._discarded
+            }
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            while self._idle:
+                conn, _ = self._idle.popleft()
+                self._discard(conn)
+            self._cond.notify_all()
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_pool():
+    global _pool
+
+    # Criado sob demanda para que cada processo tenha o próprio pool.
+    with _pool_lock:
+        if _pool is None:
+            _pool = ConnectionPool(
+                min_size=Config.DB_POOL_MIN_SIZE,
+                max_size=Config.DB_POOL_MAX_SIZE,
+                timeout=Config.DB_POOL_TIMEOUT,
+                max_age=Config.DB_POOL_MAX_AGE,
+                health_check=Config.DB_POOL_HEALTH_CHECK
+            )
+        return _pool
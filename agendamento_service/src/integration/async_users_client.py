@@ -0,0 +1,97 @@
+import asyncio
+import os
+
+import grpc
+
+from src.config import Config
+from src.integration.users_client import TEMPO_LIMITE, UserNotFoundError
+from src.pb import users_pb2, users_pb2_grpc
+
+class AsyncUsersClient:
+    # Versão grpc.aio do UsersClient para o engine assíncrono. Usa o mesmo RoleCache
+    # do cliente síncrono, então invalidações feitas por um valem para o outro.
+    def __init__(self, role_cache):
+        self.address = os.getenv("GRPC_ADDRESS")
+        self.channel = None
+        self.stub = None
+        self.role_cache = role_cache
+
+        self._pending = {}
+
+    async def start(self):
+        self.channel = grpc.aio.insecure_channel(self.address)
+        self.stub = users_pb2_grpc.UserServiceStub(self.channel)
+
+    async def close(self):
+        if self.channel is not None:
+            await self.channel.close()
+
+    async def get_user_role(self, requester_id, target_id):
+        try:
+            key = (int(requester_id), int(target_id))
+        except Exception:
+            raise Exception(f"Erro interno no servidor")
+
+        if not self.role_cache.enabled():
+            return await self._fetch_user_role(*key)
+
+        encontrado, role = self.role_cache.lookup(key)
+        if encontrado:
+            return role
+
+        # Chamadas simultâneas para a mesma chave esperam a mesma busca.
+        task = self._pending.get(key)
+        if task is None:
+            task = self._pending[key] = asyncio.ensure_future(self._load(key))
+            task.add_done_callback(lambda _: self._pending.pop(key, None))
+        else:
+            self.role_cache.coalesced += 1
+
+        return await asyncio.shield(task)
+
+    async def get_user_roles(self, pairs):
+        # Mesmo contrato do UsersClient.get_user_roles: um future concluído por par,
+        # na mesma ordem, com o erro guardado no lugar do valor.
+        tasks = [
+            asyncio.ensure_future(self.get_user_role(requester_id, target_id))
+            for requester_id, target_id in pairs
+        ]
+
+        await asyncio.wait(tasks)
+
+        for task in tasks:
+            # Marca o erro como observado: o chamador pode parar no primeiro que falhar.
+            task.exception()
+
+        return tasks
+
+    async def _load(self, key):
+        try:
+            role = await self._fetch_user_role(*key)
+        except UserNotFoundError as e:
+            self.role_cache.store_not_found(key, str(e))
+            raise
+
+        self.role_cache.store(key, role)
+        return role
+
+    async def _fetch_user_role(self, requester_id, target_id):
+        try:
+            response = await self.stub.GetUser(
+                users_pb2.GetUserRequest(
+                    token=requester_id,
+                    user_id=target_id
+                ),
+                timeout=Config.USERS_GRPC_TIMEOUT
+            )
+            return users_pb2.UserType.Name(response.user_type)
+
+        except grpc.RpcError as e:
+            if e.code() == grpc.StatusCode.NOT_FOUND:
+                raise UserNotFoundError(e.details())
+            if e.code() == grpc.StatusCode.DEADLINE_EXCEEDED:
+                raise Exception(TEMPO_LIMITE)
+            raise Exception(e.details())
+
+        except Exception as e:
+            raise Exception(f"Erro interno no servidor")
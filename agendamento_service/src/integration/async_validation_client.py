@@ -0,0 +1,175 @@
+import asyncio
+import itertools
+import json
+
+from src.config import Config
+from src.integration.validation_protocol import HEADER, ProtocolError, encode_frame, parse_header
+
+class _AsyncFramedConnection:
+    # Equivalente assíncrono de _FramedConnection: várias requisições em andamento
+    # na mesma conexão, casadas pelo id do quadro.
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+
+        self.alive = True
+        self._ids = itertools.count(1)
+        self._pending = {}
+
+        self._reader_task = asyncio.ensure_future(self._read_loop())
+
+    @classmethod
+    async def open(cls, host, port, timeout):
+        reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+        return cls(reader, writer)
+
+    def request(self, payload):
+        if not self.alive:
+            raise ConnectionError("Conexão com o serviço de validação encerrada.")
+
+        request_id = next(self._ids) & 0xFFFFFFFF
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+
+        self.writer.write(encode_frame(request_id, payload))
+        return request_id, future
+
+    def forget(self, request_id):
+        self._pending.pop(request_id, None)
+
+    async def _read_loop(self):
+        try:
+            while True:
+                try:
+                    header = await self.reader.readexactly(HEADER.size)
+                except asyncio.IncompleteReadError as e:
+                    if e.partial:
+                        raise ProtocolError("Conexão encerrada no meio de um quadro.")
+                    raise ConnectionError("Conexão com o serviço de validação encerrada.")
+
+                request_id, size = parse_header(header)
+
+                try:
+                    body = await self.reader.readexactly(size) if size else b""
+                except asyncio.IncompleteReadError:
+                    raise ProtocolError("Conexão encerrada no meio de um quadro.")
+
+                future = self._pending.pop(request_id, None)
+                if future is not None and not future.done():
+                    future.set_result(json.loads(body.decode()))
+
+        except asyncio.CancelledError:
+            self._fail(ConnectionError("Conexão com o serviço de validação encerrada."))
+            raise
+
+        except Exception as e:
+            self._fail(e)
+
+    def _fail(self, error):
+        self.alive = False
+        pending, self._pending = self._pending, {}
+
+        for future in pending.values():
+            if not future.done():
+                future.set_exception(error)
+
+        self.writer.close()
+
+    def close(self):
+        self._reader_task.cancel()
+
+class AsyncValidationClient:
+    def __init__(self, pool_size=None):
+        self.pool_size = pool_size or Config.VALIDATION_POOL_SIZE
+        self._connections = [None] * self.pool_size
+        self._next = itertools.count()
+        self._opening = [None] * self.pool_size
+
+    async def validate_payment(self, tipo_pagamento, dados_pagamento):
+        payload = {
+            "tipo_pagamento": tipo_pagamento,
+            "dados_pagamento": dados_pagamento
+        }
+
+        if Config.VALIDATION_MODE == "legacy":
+            data = await self._request_legacy(payload)
+        else:
+            data = await self._request(payload)
+
+        if "erro" in data:
+            raise Exception(data["erro"])
+
+        return data["status"]
+
+    async def _connection(self):
+        index = next(self._next) % self.pool_size
+
+        conn = self._connections[index]
+        if conn is not None and conn.alive:
+            return conn
+
+        # Uma única abertura por posição do pool, mesmo com várias corrotinas chegando juntas.
+        opening = self._opening[index]
+        if opening is None:
+            opening = self._opening[index] = asyncio.ensure_future(
+                _AsyncFramedConnection.open(Config.VALIDATION_HOST, Config.VALIDATION_PORT, Config.VALIDATION_TIMEOUT)
+            )
+
+        try:
+            conn = await asyncio.shield(opening)
+        finally:
+            if self._opening[index] is opening and opening.done():
+                self._opening[index] = None
+
+        self._connections[index] = conn
+        return conn
+
+    async def _send(self, payload):
+        # Uma conexão do pool pode ter caído desde o último uso: tenta de novo uma vez.
+        for tentativa in range(2):
+            conn = await self._connection()
+
+            try:
+                request_id, future = conn.request(payload)
+                return conn, request_id, future
+
+            except (ConnectionError, OSError):
+                if tentativa:
+                    raise
+
+    async def _wait(self, conn, request_id, future):
+        try:
+            return await asyncio.wait_for(future, Config.VALIDATION_TIMEOUT)
+
+        except asyncio.TimeoutError:
+            conn.forget(request_id)
+            raise Exception("Erro interno no servidor: tempo limite na validação do pagamento.")
+
+    async def _request(self, payload):
+        for tentativa in range(2):
+            conn, request_id, future = await self._send(payload)
+
+            try:
+                return await self._wait(conn, request_id, future)
+
+            except (ConnectionError, OSError):
+                if tentativa:
+                    raise
+
+    async def _request_legacy(self, payload):
+        reader, writer = await asyncio.open_connection(Config.VALIDATION_HOST, Config.VALIDATION_PORT)
+
+        try:
+            writer.write(json.dumps(payload).encode())
+            await writer.drain()
+            response = await reader.read(Config.BUFFER_SIZE)
+        finally:
+            writer.close()
+
+        return json.loads(response.decode())
+
+    async def close(self):
+        for conn in self._connections:
+            if conn is not None:
+                conn.close()
+        self._connections = [None] * self.pool_size
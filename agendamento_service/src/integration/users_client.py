@@ -1,25 +1,230 @@
 import grpc
 import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+
+from src.config import Config
 from src.pb import users_pb2, users_pb2_grpc
 
+TEMPO_LIMITE = "Erro interno no servidor: tempo limite ao consultar usuários."
+
+class UserNotFoundError(Exception):
+    pass
+
+class _Pending:
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.error = None
+
+class RoleCache:
+    def __init__(self, max_size, ttl, negative_ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+
+        self._entries = OrderedDict()  # chave -> (expira_em, role, erro)
+        self._pending = {}
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.coalesced = 0
+
+    def get_or_load(self, key, loader):
+        if self.max_size <= 0 or self.ttl <= 0:
+            return loader()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expira_em, value, error = entry
+                if expira_em > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    if error is not None:
+                        raise UserNotFoundError(error)
+                    return value
+
+                del self._entries[key]
+
+            pending = self._pending.get(key)
+            if pending is not None:
+                # Outra thread já está buscando esta chave: aguarda o mesmo resultado.
+                self.coalesced += 1
+                leader = False
+            else:
+                pending = self._pending[key] = _Pending()
+                self.misses += 1
+                leader = True
+
+        if not leader:
+            pending.event.wait()
+            if pending.error is not None:
+                raise pending.error
+            return pending.value
+
+        try:
+            pending.value = loader()
+            self._store(key, self.ttl, pending.value, None)
+            return pending.value
+
+        except UserNotFoundError as e:
+            pending.error = e
+            if self.negative_ttl > 0:
+                self._store(key, self.negative_ttl, None, str(e))
+            raise
+
+        except Exception as e:
+            pending.error = e
+            raise
+
+        finally:
+            with self._lock:
+                self._pending.pop(key, None)
+            pending.event.set()
+
+    def enabled(self):
+        return self.max_size > 0 and self.ttl > 0
+
+    def lookup(self, key):
+        # Consulta sem carregar nem esperar (para o cliente assíncrono): devolve
+        # (True, role) no acerto, lança UserNotFoundError no acerto negativo e
+        # devolve (False, None) quando é preciso buscar.
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expira_em, value, error = entry
+                if expira_em > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    if error is not None:
+                        raise UserNotFoundError(error)
+                    return True, value
+
+                del self._entries[key]
+
+            self.misses += 1
+            return False, None
+
+    def store(self, key, value):
+        self._store(key, self.ttl, value, None)
+
+    def store_not_found(self, key, error):
+        if self.negative_ttl > 0:
+            self._store(key, self.negative_ttl, None, error)
+
+    def _store(self, key, ttl, value, error):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value, error)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, requester_id=None, target_id=None):
+        with self._lock:
+            if requester_id is None and target_id is None:
+                self._entries.clear()
+                return
+
+            for key in list(self._entries):
+                if requester_id is not None and key[0] != requester_id:
+                    continue
+                if target_id is not None and key[1] != target_id:
+                    continue
+                del self._entries[key]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "coalesced": self.coalesced
+            }
+
 class UsersClient:
     def __init__(self):
         self.address = os.getenv("GRPC_ADDRESS")
         self.channel = grpc.insecure_channel(self.address)
         self.stub = users_pb2_grpc.UserServiceStub(self.channel)
 
-    def get_user_role(self, requester_id, target_id):
+        self.role_cache = RoleCache(
+            max_size=Config.ROLE_CACHE_SIZE,
+            ttl=Config.ROLE_CACHE_TTL,
+            negative_ttl=Config.ROLE_CACHE_NEGATIVE_TTL
+        )
+
+        self.executor = ThreadPoolExecutor(
+            max_workers=Config.USERS_LOOKUP_WORKERS,
+            thread_name_prefix="users-lookup"
+        )
+
+    def get_user_role(self, requester_id, target_id, deadline=None):
+        try:
+            key = (int(requester_id), int(target_id))
+        except Exception:
+            raise Exception(f"Erro interno no servidor")
+
+        return self.role_cache.get_or_load(key, lambda: self._fetch_user_role(*key, deadline=deadline))
+
+    def get_user_roles(self, pairs):
+        # Resolve vários (requester_id, target_id) em paralelo e devolve os futures,
+        # já concluídos e na mesma ordem, para o chamador tratar os erros na ordem
+        # que preferir via .result(). Um prazo só para o conjunto, contado desde já:
+        # o tempo na fila do executor sai do timeout de cada chamada gRPC, e o que
+        # nem saiu da fila até o fim do prazo falha por tempo limite.
+        deadline = time.monotonic() + Config.USERS_GRPC_TIMEOUT
+
+        futures = [
+            self.executor.submit(self.get_user_role, requester_id, target_id, deadline)
+            for requester_id, target_id in pairs
+        ]
+
+        _, pendentes = wait(futures, timeout=Config.USERS_GRPC_TIMEOUT)
+
+        for indice, future in enumerate(futures):
+            if future in pendentes:
+                future.cancel()
+                futures[indice] = Future()
+                futures[indice].set_exception(Exception(TEMPO_LIMITE))
+
+        return futures
+
+    def invalidate_user_role(self, requester_id=None, target_id=None):
+        self.role_cache.invalidate(
+            requester_id=int(requester_id) if requester_id is not None else None,
+            target_id=int(target_id) if target_id is not None else None
+        )
+
+    def _fetch_user_role(self, requester_id, target_id, deadline=None):
+        timeout = Config.USERS_GRPC_TIMEOUT if deadline is None else deadline - time.monotonic()
+        if timeout <= 0:
+            raise Exception(TEMPO_LIMITE)
+
         try:
             response = self.stub.GetUser(
                 users_pb2.GetUserRequest(
-                    token=int(requester_id),
-                    user_id=int(target_id)
-                )
+                    token=requester_id,
+                    user_id=target_id
+                ),
+                timeout=timeout
             )
             return users_pb2.UserType.Name(response.user_type)
 
         except grpc.RpcError as e:
+            if e.code() == grpc.StatusCode.NOT_FOUND:
+                raise UserNotFoundError(e.details())
+            if e.code() == grpc.StatusCode.DEADLINE_EXCEEDED:
+                raise Exception(TEMPO_LIMITE)
             raise Exception(e.details())
 
         except Exception as e:
-            raise Exception(f"Erro interno no servidor")
\ No newline at end of file
+            raise Exception(f"Erro interno no servidor")
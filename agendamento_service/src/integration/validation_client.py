@@ -1,27 +1,198 @@
 import socket
 import json
+import itertools
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
 from src.config import Config
+from src.integration.validation_protocol import encode_frame, read_frame
+
+class _FramedConnection:
+    # Conexão persistente que aceita várias requisições em andamento ao mesmo
+    # tempo; as respostas são casadas pelo id do quadro.
+    def __init__(self, host, port, timeout):
+        self.sock = socket.create_connection((host, port), timeout=timeout)
+        self.sock.settimeout(None)
+
+        self.alive = True
+        self._ids = itertools.count(1)
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._send_lock = threading.Lock()
+
+        threading.Thread(target=self._read_loop, daemon=True).start()
+
+    def request(self, payload):
+        future = Future()
+
+        with self._lock:
+            if not self.alive:
+                raise ConnectionError("Conexão com o serviço de validação encerrada.")
+            request_id = next(self._ids) & 0xFFFFFFFF
+            self._pending[request_id] = future
+
+        try:
+            with self._send_lock:
+                self.sock.sendall(encode_frame(request_id, payload))
+        except OSError as e:
+            self._fail(e)
+            raise
+
+        return request_id, future
+
+    def forget(self, request_id):
+        with self._lock:
+            self._pending.pop(request_id, None)
+
+    def _read_loop(self):
+        try:
+            while True:
+                frame = read_frame(self.sock)
+                if frame is None:
+                    raise ConnectionError("Conexão com o serviço de validação encerrada.")
+
+                request_id, body = frame
+                with self._lock:
+                    future = self._pending.pop(request_id, None)
+
+                if future is not None:
+                    future.set_result(json.loads(body.decode()))
+
+        except Exception as e:
+            self._fail(e)
+
+    def _fail(self, error):
+        with self._lock:
+            self.alive = False
+            pending, self._pending = self._pending, {}
+
+        for future in pending.values():
+            if not future.done():
+                future.set_exception(error)
+
+        self.close()
+
+    def close(self):
+        try:
+            self.sock.close()
+        except OSError:
+            pass
 
 class ValidationClient:
 
+    def __init__(self, pool_size=None):
+        self.pool_size = pool_size or Config.VALIDATION_POOL_SIZE
+        self._connections = [None] * self.pool_size
+        self._next = itertools.count()
+        self._lock = threading.Lock()
+
+        self.executor = ThreadPoolExecutor(
+            max_workers=Config.VALIDATION_ASYNC_WORKERS,
+            thread_name_prefix="validation"
+        )
+
+    def validate_payment_async(self, tipo_pagamento, dados_pagamento):
+        # Dispara a validação sem bloquear; o status (ou o erro) sai em .result().
+        return self.executor.submit(self.validate_payment, tipo_pagamento, dados_pagamento)
+
     def validate_payment(self, tipo_pagamento, dados_pagamento):
         payload = {
             "tipo_pagamento": tipo_pagamento,
             "dados_pagamento": dados_pagamento
         }
 
-        try:
-            with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as client:
-                client.connect((Config.VALIDATION_HOST, Config.VALIDATION_PORT))
+        if Config.VALIDATION_MODE == "legacy":
+            data = self._request_legacy(payload)
+        else:
+            data = self._request(payload)
+
+        if "erro" in data:
+            raise Exception(data["erro"])
+
+        return data["status"]
+
+    def _connection(self):
+        index = next(self._next) % self.pool_size
+
+        with self._lock:
+            conn = self._connections[index]
+            if conn is None or not conn.alive:
+                conn = _FramedConnection(Config.VALIDATION_HOST, Config.VALIDATION_PORT, Config.VALIDATION_TIMEOUT)
+                self._connections[index] = conn
 
-                client.sendall(json.dumps(payload).encode())
-                response = client.recv(Config.BUFFER_SIZE)
+            return conn
 
-            data = json.loads(response.decode())
+    def validate_many(self, itens, chunk_size=None):
+        # itens: lista de (tipo_pagamento, dados_pagamento). Devolve, na mesma ordem,
+        # um dict por item com "status" ou "erro".
+        chunk_size = chunk_size or Config.VALIDATION_BATCH_SIZE
+        itens = [
+            {"tipo_pagamento": tipo_pagamento, "dados_pagamento": dados_pagamento}
+            for tipo_pagamento, dados_pagamento in itens
+        ]
+
+        if Config.VALIDATION_MODE == "legacy":
+            return [self._request_legacy(item) for item in itens]
+
+        # Envia todos os blocos antes de esperar: eles seguem em paralelo pelas conexões do pool.
+        pendentes = [
+            self._send({"itens": itens[i:i + chunk_size]})
+            for i in range(0, len(itens), chunk_size)
+        ]
+
+        resultados = []
+        for conn, request_id, future in pendentes:
+            data = self._wait(conn, request_id, future)
             if "erro" in data:
                 raise Exception(data["erro"])
+            resultados.extend(data["resultados"])
 
-            return data["status"]
+        return resultados
 
-        except Exception as e:
-            raise
+    def _send(self, payload):
+        # Uma conexão do pool pode ter caído desde o último uso: tenta de novo uma vez.
+        for tentativa in range(2):
+            conn = self._connection()
+
+            try:
+                request_id, future = conn.request(payload)
+                return conn, request_id, future
+
+            except (ConnectionError, OSError):
+                if tentativa:
+                    raise
+
+    def _wait(self, conn, request_id, future):
+        try:
+            return future.result(timeout=Config.VALIDATION_TIMEOUT)
+
+        except FutureTimeoutError:
+            conn.forget(request_id)
+            raise Exception("Erro interno no servidor: tempo limite na validação do pagamento.")
+
+    def _request(self, payload):
+        for tentativa in range(2):
+            conn, request_id, future = self._send(payload)
+
+            try:
+                return self._wait(conn, request_id, future)
+
+            except (ConnectionError, OSError):
+                if tentativa:
+                    raise
+
+    def _request_legacy(self, payload):
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as client:
+            client.connect((Config.VALIDATION_HOST, Config.VALIDATION_PORT))
+
+            client.sendall(json.dumps(payload).encode())
+            response = client.recv(Config.BUFFER_SIZE)
+
+        return json.loads(response.decode())
+
+    def close(self):
+        with self._lock:
+            for conn in self._connections:
+                if conn is not None:
+                    conn.close()
+            self._connections = [None] * self.pool_size
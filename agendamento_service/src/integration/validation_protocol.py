@@ -0,0 +1,54 @@
+import json
+import struct
+
+# Quadro: MAGIC (4 bytes) + id da requisição (uint32) + tamanho do corpo (uint32) + corpo JSON.
+# O primeiro byte nunca é "{", o que permite distinguir do protocolo legado (JSON cru).
+# Arquivo idêntico em validacao_service/src/server/protocol.py e
+# agendamento_service/src/integration/validation_protocol.py: altere os dois juntos.
+MAGIC = b"VAL1"
+HEADER = struct.Struct("!4sII")
+MAX_FRAME_SIZE = 16 * 1024 * 1024
+
+class ProtocolError(Exception):
+    pass
+
+def encode_frame(request_id, payload):
+    body = json.dumps(payload).encode()
+    return HEADER.pack(MAGIC, request_id, len(body)) + body
+
+def recv_exact(sock, size):
+    chunks = []
+    restante = size
+
+    while restante:
+        chunk = sock.recv(min(restante, 65536))
+        if not chunk:
+            if restante == size:
+                return None
+            raise ProtocolError("Conexão encerrada no meio de um quadro.")
+        chunks.append(chunk)
+        restante -= len(chunk)
+
+    return b"".join(chunks)
+
+def parse_header(header):
+    magic, request_id, size = HEADER.unpack(header)
+    if magic != MAGIC:
+        raise ProtocolError("Quadro inválido.")
+    if size > MAX_FRAME_SIZE:
+        raise ProtocolError("Quadro excede o tamanho máximo.")
+
+    return request_id, size
+
+def read_frame(sock):
+    header = recv_exact(sock, HEADER.size)
+    if header is None:
+        return None
+
+    request_id, size = parse_header(header)
+
+    body = recv_exact(sock, size) if size else b""
+    if body is None:
+        raise ProtocolError("Conexão encerrada no meio de um quadro.")
+
+    return request_id, body
@@ -1,29 +1,134 @@
 import sys
 import os
+import signal
+import threading
+import time
 from xmlrpc.server import SimpleXMLRPCServer
 from socketserver import ThreadingMixIn
 
 sys.path.append(os.getcwd())
 
 from src.config import Config
+from src.database.connection import get_pool
+from src.server.async_server import AsyncRPCServer
+from src.server.pooled_server import PooledXMLRPCServer
+from src.server.prefork import PreforkLauncher, enable_reuse_port, ler_metricas, publicar_metricas
+from src.server.request_handler import AgendamentoRequestHandler
 from src.service.agendamento_service import AgendamentoService
+from src.service.async_agendamento_service import AsyncAgendamentoService
+from src.service.export_service import ExportService
 
 class ThreadedXMLRPCServer(ThreadingMixIn, SimpleXMLRPCServer):
     pass
 
+def build_server(address, reuse_port=False):
+    if Config.RPC_SERVER_MODE == "asyncio":
+        return AsyncRPCServer(address, allow_none=True, reuse_port=reuse_port)
+
+    if Config.RPC_SERVER_MODE == "threaded":
+        server = ThreadedXMLRPCServer(
+            address,
+            requestHandler=AgendamentoRequestHandler,
+            allow_none=True,
+            bind_and_activate=not reuse_port
+        )
+    else:
+        server = PooledXMLRPCServer(
+            address,
+            workers=Config.RPC_WORKERS,
+            queue_size=Config.RPC_QUEUE_SIZE,
+            request_timeout=Config.RPC_REQUEST_TIMEOUT,
+            requestHandler=AgendamentoRequestHandler,
+            allow_none=True,
+            bind_and_activate=not reuse_port
+        )
+
+    if reuse_port:
+        enable_reuse_port(server)
+
+    return server
+
 def main():
-    address = ('0.0.0.0', Config.RPC_PORT)
+    if Config.RPC_PROCESSES > 1:
+        PreforkLauncher(Config.RPC_PROCESSES, run_worker).run()
+    else:
+        run_worker()
 
-    server = ThreadedXMLRPCServer(address, allow_none=True)
+def create_server(address, reuse_port=False):
+    server = build_server(address, reuse_port=reuse_port)
 
     service = AgendamentoService()
     server.register_instance(service)
     server.register_introspection_functions()
+    server.register_multicall_functions()
+
+    server.export_service = ExportService(service.agendamento_repository, service.users_client)
+
+    if isinstance(server, AsyncRPCServer):
+        # Só agendar_consulta tem I/O nativo em asyncio; o resto do serviço roda
+        # no pool de threads do AsyncRPCServer.
+        async_service = AsyncAgendamentoService(service)
+        server.register_async_function(async_service.agendar_consulta)
+        server.on_startup.append(async_service.start)
+        server.on_shutdown.append(async_service.close)
+
+    return server, service
+
+def run_worker(worker_id=None, ready=None):
+    # worker_id/ready só vêm do PreforkLauncher; sozinho, o processo atende a porta direto.
+    address = ('0.0.0.0', Config.RPC_PORT)
+
+    server, service = create_server(address, reuse_port=worker_id is not None)
+
+    if service.outbox_relay is not None:
+        service.outbox_relay.start()
+
+    def metricas():
+        resultado = {
+            "db_pool": get_pool().metrics(),
+            "role_cache": service.users_client.role_cache.stats(),
+            "publisher": service.publisher_pool.stats()
+        }
+        if service.outbox_relay is not None:
+            resultado["outbox"] = service.outbox_relay.metrics()
+        if isinstance(server, (PooledXMLRPCServer, AsyncRPCServer)):
+            resultado["rpc_server"] = server.metrics()
+        return resultado
+
+    if worker_id is None:
+        server.register_function(metricas, "metricas")
+    else:
+        def metricas_workers():
+            # A chamada cai em um worker qualquer: devolve os snapshots de todos,
+            # com o do próprio worker atualizado na hora.
+            workers = [w for w in ler_metricas() if w["pid"] != os.getpid()]
+            workers.append({"worker_id": worker_id, "pid": os.getpid(), "atualizado_em": time.time(), "metricas": metricas()})
+            return {"workers": sorted(workers, key=lambda w: w["worker_id"])}
+
+        server.register_function(metricas_workers, "metricas")
+        publicar_metricas(worker_id, metricas)
+
+        # O mestre cuida do Ctrl+C e do reload; SIGTERM encerra o worker drenando as requisições.
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        signal.signal(signal.SIGHUP, signal.SIG_IGN)
+        signal.signal(signal.SIGTERM, lambda signum, frame: threading.Thread(target=server.shutdown, daemon=True).start())
+
+    if ready is not None:
+        if isinstance(server, AsyncRPCServer):
+            server.on_listening.append(ready.set)
+        else:
+            ready.set()
 
     try:
         server.serve_forever()
     except KeyboardInterrupt:
         pass
+    finally:
+        server.server_close()
+
+        if service.outbox_relay is not None:
+            service.outbox_relay.stop()
+        service.publisher_pool.close()
 
 if __name__ == "__main__":
     main()
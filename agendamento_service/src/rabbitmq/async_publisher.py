@@ -0,0 +1,83 @@
+import asyncio
+
+import aio_pika
+
+from src.config import Config
+from src.rabbitmq import topology
+from src.rabbitmq.notification import Notification
+from src.rabbitmq.publisher import MODE_ASYNC_CONFIRM, MODE_FIRE_AND_FORGET, DeclaredQueues
+
+class AsyncNotificationPublisher:
+    # Publicador aio-pika do engine assíncrono (NOTIFICATION_DELIVERY=direct). Uma
+    # conexão robusta (reconecta sozinha) e um canal, que no asyncio não precisam de pool.
+    def __init__(self):
+        self.declared_queues = DeclaredQueues(Config.DECLARED_QUEUES_CACHE_SIZE)
+        self.connection = None
+        self.channel = None
+        self.exchange = None
+
+        self._background = set()
+
+    async def start(self):
+        self.connection = await aio_pika.connect_robust(
+            host=Config.RABBITMQ_HOST,
+            port=Config.RABBITMQ_PORT,
+            login=Config.RABBITMQ_USER,
+            password=Config.RABBITMQ_PASSWORD
+        )
+        self.channel = await self.connection.channel(
+            publisher_confirms=Config.PUBLISH_MODE != MODE_FIRE_AND_FORGET
+        )
+        self.exchange = await self.channel.declare_exchange(
+            Config.NOTIFICATION_EXCHANGE,
+            aio_pika.ExchangeType.DIRECT,
+            durable=True
+        )
+
+    async def publish(self, notification: Notification, mode=None):
+        # Mesmos modos de PublisherPool.publish; no async a RPC não espera o confirm.
+        mode = mode or Config.PUBLISH_MODE
+
+        if mode == MODE_ASYNC_CONFIRM:
+            task = asyncio.ensure_future(self._publish(notification))
+            self._background.add(task)
+            task.add_done_callback(self._background.discard)
+            return task
+
+        await self._publish(notification)
+
+    async def _publish(self, notification: Notification):
+        try:
+            user_queue_name = topology.queue_for(notification.user_id)
+            routing_key = topology.routing_key_for(notification.user_id)
+
+            if user_queue_name not in self.declared_queues:
+                queue = await self.channel.declare_queue(
+                    user_queue_name,
+                    durable=True,
+                    arguments=topology.queue_arguments()
+                )
+                await queue.bind(self.exchange, routing_key=routing_key)
+                self.declared_queues.add(user_queue_name)
+
+            body, content_type = notification.encode(Config.NOTIFICATION_ENCODING == "compact")
+
+            await self.exchange.publish(
+                aio_pika.Message(
+                    body,
+                    delivery_mode=aio_pika.DeliveryMode.PERSISTENT,
+                    content_type=content_type,
+                    headers=topology.message_headers(notification.user_id) or {}
+                ),
+                routing_key=routing_key,
+                timeout=Config.PUBLISH_CONFIRM_TIMEOUT
+            )
+
+        except Exception:
+            raise Exception("Erro interno ao publicar notificação.")
+
+    async def close(self):
+        if self._background:
+            await asyncio.gather(*self._background, return_exceptions=True)
+        if self.connection is not None:
+            await self.connection.close()
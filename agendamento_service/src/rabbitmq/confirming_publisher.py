@@ -0,0 +1,321 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future
+
+import pika
+from pika.adapters.select_connection import IOLoop
+from pika.spec import Basic
+
+from src.config import Config
+from src.rabbitmq.connection import get_parameters
+from src.rabbitmq.notification import Notification
+from src.rabbitmq import topology
+from src.utils.metrics import Histogram
+
+class _Outgoing:
+    __slots__ = ("notification", "future", "attempts", "message_id", "returned", "sent_at")
+
+    def __init__(self, notification, future):
+        self.notification = notification
+        self.future = future
+        self.attempts = 0
+        self.message_id = None
+        self.returned = False
+        self.sent_at = None
+
+class ConfirmingPublisher:
+    # Publica com publisher confirms em uma conexão assíncrona (SelectConnection)
+    # rodando em thread própria. As mensagens são agrupadas em lotes por tamanho ou
+    # por tempo de espera (linger) e os confirms chegam de forma assíncrona.
+    # Todo o estado do canal só é tocado pela thread do ioloop; as outras threads
+    # apenas entregam mensagens no buffer.
+    def __init__(self, declared_queues, batch_size=None, linger=None, max_retries=None, retry_backoff=None):
+        self.declared_queues = declared_queues
+        self.batch_size = batch_size or Config.PUBLISH_BATCH_SIZE
+        self.linger = linger if linger is not None else Config.PUBLISH_LINGER
+        self.max_retries = max_retries if max_retries is not None else Config.PUBLISH_MAX_RETRIES
+        self.retry_backoff = retry_backoff or Config.PUBLISH_RETRY_BACKOFF
+
+        self._lock = threading.Lock()
+        self._buffer = []
+        self._timer_scheduled = False
+
+        # O mesmo ioloop atravessa as reconexões, então timers de retry não se perdem.
+        self._ioloop = IOLoop()
+        self._connection = None
+        self._channel = None
+        self._next_tag = 1
+        self._unconfirmed = OrderedDict()  # delivery_tag -> _Outgoing
+        self._by_message_id = {}
+        self._waiting_queue = {}  # fila sendo declarada -> mensagens aguardando o bind
+        self._stopping = False
+
+        self.published = 0
+        self.confirmed = 0
+        self.nacked = 0
+        self.returned = 0
+        self.retried = 0
+        self.failed = 0
+        self.batches = 0
+        self.confirm_latency = Histogram()
+        self._started_at = time.monotonic()
+
+        self._thread = threading.Thread(target=self._run, name="amqp-confirms", daemon=True)
+        self._thread.start()
+
+    def submit(self, notification: Notification):
+        future = Future()
+        item = _Outgoing(notification, future)
+
+        acao = None
+        with self._lock:
+            self._buffer.append(item)
+
+            if len(self._buffer) >= self.batch_size:
+                acao = self._flush
+            elif not self._timer_scheduled:
+                self._timer_scheduled = True
+                acao = self._schedule_linger
+
+        if acao is not None:
+            self._call_threadsafe(acao)
+
+        return future
+
+    def stats(self):
+        with self._lock:
+            buffered = len(self._buffer)
+
+        uptime = time.monotonic() - self._started_at
+        return {
+            "published": self.published,
+            "confirmed": self.confirmed,
+            "nacked": self.nacked,
+            "returned": self.returned,
+            "retried": self.retried,
+            "failed": self.failed,
+            "batches": self.batches,
+            "pending": buffered + len(self._unconfirmed),
+            "throughput": self.confirmed / uptime if uptime else 0.0,
+            "confirm_latency": self.confirm_latency.snapshot()
+        }
+
+    def close(self, timeout=5):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline and (self._buffer or self._unconfirmed):
+            time.sleep(0.05)
+
+        self._stopping = True
+        self._call_threadsafe(self._close_connection)
+        self._thread.join(timeout)
+
+    def _call_threadsafe(self, callback):
+        self._ioloop.add_callback_threadsafe(callback)
+
+    # A partir daqui, tudo roda na thread do ioloop.
+    def _run(self):
+        while not self._stopping:
+            self._connection = pika.SelectConnection(
+                get_parameters(),
+                on_open_callback=self._on_connection_open,
+                on_open_error_callback=self._on_connection_error,
+                on_close_callback=self._on_connection_closed,
+                custom_ioloop=self._ioloop
+            )
+            self._ioloop.start()
+
+            if not self._stopping:
+                time.sleep(self.retry_backoff)
+
+    def _close_connection(self):
+        if self._connection and self._connection.is_open:
+            self._connection.close()
+
+    def _on_connection_open(self, connection):
+        connection.channel(on_open_callback=self._on_channel_open)
+
+    def _on_connection_error(self, connection, error):
+        self._ioloop.stop()
+
+    def _on_connection_closed(self, connection, reason):
+        self._channel = None
+
+        # Sem confirm não há garantia de entrega: volta tudo para o buffer.
+        pendentes = list(self._unconfirmed.values())
+        for itens in self._waiting_queue.values():
+            pendentes.extend(itens)
+
+        self._unconfirmed.clear()
+        self._by_message_id.clear()
+        self._waiting_queue.clear()
+
+        with self._lock:
+            self._buffer[:0] = pendentes
+            self._timer_scheduled = False
+
+        self._ioloop.stop()
+
+    def _on_channel_open(self, channel):
+        channel.add_on_close_callback(self._on_channel_closed)
+        channel.add_on_return_callback(self._on_return)
+
+        channel.exchange_declare(
+            exchange=Config.NOTIFICATION_EXCHANGE,
+            exchange_type="direct",
+            durable=True,
+            callback=lambda _: channel.confirm_delivery(
+                self._on_delivery_confirmation,
+                callback=lambda _: self._on_ready(channel)
+            )
+        )
+
+    def _on_channel_closed(self, channel, reason):
+        self._channel = None
+        self._close_connection()
+
+    def _on_ready(self, channel):
+        self._channel = channel
+        self._next_tag = 1
+        self._flush()
+
+    def _schedule_linger(self):
+        self._ioloop.call_later(self.linger, self._flush)
+
+    def _flush(self):
+        with self._lock:
+            lote, self._buffer = self._buffer, []
+            self._timer_scheduled = False
+
+        if not lote:
+            return
+
+        if self._channel is None:
+            with self._lock:
+                self._buffer[:0] = lote
+            return
+
+        self.batches += 1
+        for item in lote:
+            self._send(item)
+
+    def _send(self, item):
+        queue_name = topology.queue_for(item.notification.user_id)
+
+        if queue_name in self.declared_queues:
+            self._basic_publish(item)
+            return
+
+        # Publicar antes do bind terminar perderia a mensagem: ela espera a declaração.
+        aguardando = self._waiting_queue.get(queue_name)
+        if aguardando is not None:
+            aguardando.append(item)
+            return
+
+        self._waiting_queue[queue_name] = [item]
+        self._declare(queue_name, item.notification.user_id)
+
+    def _declare(self, queue_name, user_id):
+        channel = self._channel
+
+        def on_bound(_):
+            self.declared_queues.add(queue_name)
+            for item in self._waiting_queue.pop(queue_name, []):
+                self._basic_publish(item)
+
+        def on_declared(_):
+            channel.queue_bind(
+                queue=queue_name,
+                exchange=Config.NOTIFICATION_EXCHANGE,
+                routing_key=topology.routing_key_for(user_id),
+                callback=on_bound
+            )
+
+        channel.queue_declare(
+            queue=queue_name,
+            durable=True,
+            arguments=topology.queue_arguments(),
+            callback=on_declared
+        )
+
+    def _basic_publish(self, item):
+        item.message_id = uuid.uuid4().hex
+        item.returned = False
+        item.sent_at = time.monotonic()
+
+        body, content_type = item.notification.encode(Config.NOTIFICATION_ENCODING == "compact")
+
+        self._channel.basic_publish(
+            exchange=Config.NOTIFICATION_EXCHANGE,
+            routing_key=topology.routing_key_for(item.notification.user_id),
+            body=body,
+            properties=pika.BasicProperties(
+                delivery_mode=2,
+                content_type=content_type,
+                message_id=item.message_id,
+                headers=topology.message_headers(item.notification.user_id)
+            ),
+            mandatory=True
+        )
+
+        self._unconfirmed[self._next_tag] = item
+        self._by_message_id[item.message_id] = item
+        self._next_tag += 1
+        self.published += 1
+
+    def _on_return(self, channel, method, properties, body):
+        # O basic.return chega antes do ack da mesma mensagem.
+        item = self._by_message_id.get(properties.message_id)
+        if item is not None:
+            item.returned = True
+            self.declared_queues.discard(topology.queue_for(item.notification.user_id))
+
+    def _on_delivery_confirmation(self, frame):
+        method = frame.method
+        ack = isinstance(method, Basic.Ack)
+
+        if method.multiple:
+            tags = []
+            for tag in self._unconfirmed:
+                if tag > method.delivery_tag:
+                    break
+                tags.append(tag)
+        else:
+            tags = [method.delivery_tag]
+
+        agora = time.monotonic()
+        for tag in tags:
+            item = self._unconfirmed.pop(tag, None)
+            if item is None:
+                continue
+            self._by_message_id.pop(item.message_id, None)
+
+            if ack and not item.returned:
+                self.confirmed += 1
+                self.confirm_latency.observe(agora - item.sent_at)
+                item.future.set_result(True)
+                continue
+
+            if item.returned:
+                self.returned += 1
+            else:
+                self.nacked += 1
+            self._retry(item)
+
+    def _retry(self, item):
+        item.attempts += 1
+
+        if item.attempts > self.max_retries:
+            self.failed += 1
+            item.future.set_exception(Exception("Erro interno ao publicar notificação."))
+            return
+
+        self.retried += 1
+        atraso = self.retry_backoff * (2 ** (item.attempts - 1))
+        self._ioloop.call_later(atraso, lambda: self._requeue(item))
+
+    def _requeue(self, item):
+        with self._lock:
+            self._buffer.insert(0, item)
+        self._flush()
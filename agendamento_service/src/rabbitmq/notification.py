@@ -1,8 +1,27 @@
-from dataclasses import dataclass, field
-from datetime import datetime, timezone
+from dataclasses import asdict, dataclass, field
+from datetime import date, datetime, timezone
 import json
+import struct
 
-@dataclass
+CONTENT_TYPE_JSON = "application/json"
+CONTENT_TYPE_COMPACT = "application/x-notification-v1"
+
+# Tabelas de códigos do formato compacto: só crescem no fim, nunca reordenar.
+STATUS = ("PENDENTE", "CONFIRMADO", "REJEITADO", "CONCLUIDO", "CANCELADO")
+ORIGENS = ("AGENDAMENTO",)
+
+MENSAGEM = "Sua consulta para o dia {data} às {horario}h teve o status atualizado para {novo_status}"
+
+# versão, flags, user_id, agendamento_id, status, timestamp (epoch ms), origem.
+_HEADER = struct.Struct("!BBQQBqB")
+# Com _FLAG_TEMPLATE: dia (dias desde 1970-01-01) e horário; o cliente remonta a mensagem.
+# Sem a flag, o restante do corpo é a mensagem em UTF-8.
+_AGENDA = struct.Struct("!iB")
+_VERSION = 1
+_FLAG_TEMPLATE = 0x01
+_EPOCH = date(1970, 1, 1).toordinal()
+
+@dataclass(slots=True)
 class Notification:
     user_id: int
     agendamento_id: int
@@ -10,6 +29,47 @@ class Notification:
     mensagem: str
     origem: str = "AGENDAMENTO"
     timestamp: str = field(default_factory=lambda: datetime.now(timezone.utc).isoformat())
+    data: str = None
+    horario: int = None
 
     def to_json(self) -> str:
-        return json.dumps(self.__dict__)
\ No newline at end of file
+        return json.dumps(asdict(self))
+
+    def encode(self, compact=False):
+        # Devolve (corpo, content_type). Se algo não couber no formato compacto
+        # (status ou origem sem código), cai para JSON.
+        if compact and self.novo_status in STATUS and self.origem in ORIGENS:
+            return self._to_compact(), CONTENT_TYPE_COMPACT
+
+        return self.to_json().encode(), CONTENT_TYPE_JSON
+
+    def _to_compact(self) -> bytes:
+        dia = self._dia()
+        template = (
+            dia is not None
+            and self.horario is not None
+            and self.mensagem == MENSAGEM.format(data=self.data, horario=self.horario, novo_status=self.novo_status)
+        )
+
+        header = _HEADER.pack(
+            _VERSION,
+            _FLAG_TEMPLATE if template else 0,
+            int(self.user_id),
+            int(self.agendamento_id),
+            STATUS.index(self.novo_status),
+            int(datetime.fromisoformat(self.timestamp).timestamp() * 1000),
+            ORIGENS.index(self.origem)
+        )
+
+        if template:
+            return header + _AGENDA.pack(dia.toordinal() - _EPOCH, int(self.horario))
+
+        return header + self.mensagem.encode()
+
+    def _dia(self):
+        # Só datas simples (YYYY-MM-DD) são remontadas idênticas no cliente.
+        try:
+            dia = date.fromisoformat(self.data)
+        except (TypeError, ValueError):
+            return None
+        return dia if dia.isoformat() == self.data else None
@@ -0,0 +1,101 @@
+import json
+import threading
+import time
+from concurrent.futures import wait
+
+from src.config import Config
+from src.rabbitmq.notification import Notification
+from src.rabbitmq.publisher import MODE_ASYNC_CONFIRM
+from src.repository.outbox_repository import OutboxRepository
+
+class OutboxRelay:
+    def __init__(self, publisher_pool, repository=None, workers=None, batch_size=None, poll_interval=None):
+        self.publisher_pool = publisher_pool
+        self.repository = repository or OutboxRepository()
+        self.workers = workers or Config.OUTBOX_RELAY_WORKERS
+        self.batch_size = batch_size or Config.OUTBOX_BATCH_SIZE
+        self.poll_interval = poll_interval or Config.OUTBOX_POLL_INTERVAL
+
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._threads = []
+
+        self.relayed = 0
+        self.batches = 0
+        self.failures = 0
+        self._lock = threading.Lock()
+
+    def start(self):
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f"outbox-relay-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def wake(self):
+        self._wakeup.set()
+
+    def stop(self):
+        self._stopping.set()
+        self._wakeup.set()
+
+        for thread in self._threads:
+            thread.join(timeout=Config.PUBLISH_CONFIRM_TIMEOUT)
+
+    def relay_once(self):
+        rows = self.repository.claim_batch(self.batch_size, Config.OUTBOX_CLAIM_LEASE)
+        if not rows:
+            return 0
+
+        # Publica o lote inteiro com confirms e espera todos sob um único prazo.
+        futures = {}
+        try:
+            for outbox_id, payload in rows:
+                future = self.publisher_pool.publish(Notification(**json.loads(payload)), mode=MODE_ASYNC_CONFIRM)
+                futures[future] = outbox_id
+
+            wait(futures, timeout=Config.PUBLISH_CONFIRM_TIMEOUT)
+
+        finally:
+            # Só os confirmados saem do outbox; os demais voltam para a próxima varredura.
+            confirmados = {
+                outbox_id for future, outbox_id in futures.items()
+                if future.done() and not future.cancelled() and future.exception() is None
+            }
+            self.repository.delete(confirmados)
+            self.repository.release([outbox_id for outbox_id, _ in rows if outbox_id not in confirmados])
+
+        with self._lock:
+            self.relayed += len(confirmados)
+            self.batches += 1
+
+        if len(confirmados) < len(rows):
+            raise Exception(f"{len(rows) - len(confirmados)} mensagens do outbox sem confirm.")
+
+        return len(rows)
+
+    def _run(self):
+        while not self._stopping.is_set():
+            try:
+                publicadas = self.relay_once()
+
+            except Exception:
+                with self._lock:
+                    self.failures += 1
+                self._stopping.wait(Config.PUBLISH_RETRY_BACKOFF)
+                continue
+
+            # Lote cheio: provavelmente há mais pendentes, segue sem esperar.
+            if publicadas < self.batch_size:
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+
+    def metrics(self):
+        with self._lock:
+            resultado = {
+                "relayed": self.relayed,
+                "batches": self.batches,
+                "failures": self.failures
+            }
+
+        resultado.update(self.repository.stats())
+        return resultado
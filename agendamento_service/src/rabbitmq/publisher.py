@@ -1,10 +1,64 @@
+import queue
+import threading
+from collections import OrderedDict
+from concurrent.futures import wait
+
 import pika
 from src.config import Config
+from src.rabbitmq.confirming_publisher import ConfirmingPublisher
 from src.rabbitmq.connection import get_connection
 from src.rabbitmq.notification import Notification
+from src.rabbitmq import topology
+
+# Modos de publicação, escolhidos por chamada em PublisherPool.publish.
+MODE_FIRE_AND_FORGET = "fire_and_forget"
+MODE_SYNC_CONFIRM = "sync"
+MODE_ASYNC_CONFIRM = "async"
+
+class DeclaredQueues:
+    # Conjunto LRU limitado das filas já declaradas e ligadas ao exchange.
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._names = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._names)
+
+    def __contains__(self, name):
+        with self._lock:
+            if name in self._names:
+                self._names.move_to_end(name)
+                return True
+            return False
+
+    def add(self, name):
+        with self._lock:
+            self._names[name] = None
+            self._names.move_to_end(name)
+
+            while len(self._names) > self.max_size:
+                self._names.popitem(last=False)
+
+    def discard(self, name):
+        with self._lock:
+            self._names.pop(name, None)
+
+    def clear(self):
+        with self._lock:
+            self._names.clear()
 
 class NotificationPublisher:
-    def __init__(self):
+    def __init__(self, declared_queues=None):
+        self.declared_queues = declared_queues or DeclaredQueues(Config.DECLARED_QUEUES_CACHE_SIZE)
+        self.connection = None
+        self.channel = None
+
+        self._connect()
+
+    def _connect(self):
+        self.close()
+
         self.connection = get_connection()
         self.channel = self.connection.channel()
 
@@ -16,29 +70,160 @@ class NotificationPublisher:
 
     def publish(self, notification: Notification):
         try:
-            user_queue_name = f"notifications.user.{notification.user_id}"
+            try:
+                self._publish(notification)
+
+            except pika.exceptions.AMQPError:
+                # Conexão ou canal caiu desde o último uso: reconecta e tenta uma vez mais.
+                self._connect()
+                self._publish(notification)
+
+        except Exception:
+            raise Exception("Erro interno ao publicar notificação.")
 
+    def _publish(self, notification: Notification):
+        user_queue_name = topology.queue_for(notification.user_id)
+        routing_key = topology.routing_key_for(notification.user_id)
+
+        # Declaração e bind só na primeira vez; depois o caminho quente é um único publish.
+        if user_queue_name not in self.declared_queues:
             self.channel.queue_declare(
                 queue=user_queue_name,
-                durable=True
+                durable=True,
+                arguments=topology.queue_arguments()
             )
 
             self.channel.queue_bind(
                 exchange=Config.NOTIFICATION_EXCHANGE,
                 queue=user_queue_name,
-                routing_key=str(notification.user_id)
+                routing_key=routing_key
             )
 
-            self.channel.basic_publish(
-                exchange=Config.NOTIFICATION_EXCHANGE,
-                routing_key=str(notification.user_id),
-                body=notification.to_json(),
-                properties=pika.BasicProperties(delivery_mode=2) # Mensagens persistente.
+            self.declared_queues.add(user_queue_name)
+
+        body, content_type = notification.encode(Config.NOTIFICATION_ENCODING == "compact")
+
+        self.channel.basic_publish(
+            exchange=Config.NOTIFICATION_EXCHANGE,
+            routing_key=routing_key,
+            body=body,
+            properties=pika.BasicProperties(
+                delivery_mode=2, # Mensagens persistente.
+                content_type=content_type,
+                headers=topology.message_headers(notification.user_id)
             )
+        )
+
+    def close(self):
+        if self.connection and self.connection.is_open:
+            try:
+                self.connection.close()
+            except pika.exceptions.AMQPError:
+                pass
+
+class PublisherPool:
+    # Conexões do pika não são thread-safe: cada publicador atende uma thread por vez
+    # e volta para o pool, mantendo a conexão aberta entre as requisições.
+    def __init__(self, max_size=None, timeout=None):
+        self.max_size = max_size or Config.PUBLISHER_POOL_SIZE
+        self.timeout = timeout or Config.PUBLISHER_POOL_TIMEOUT
+        self.declared_queues = DeclaredQueues(Config.DECLARED_QUEUES_CACHE_SIZE)
+
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(self.max_size)
+
+        self._confirming = None
+        self._confirming_lock = threading.Lock()
 
+    def publish(self, notification: Notification, mode=None):
+        # sync: espera o confirm do broker; async: devolve um Future resolvido no confirm;
+        # fire_and_forget: publica sem confirm, como antes.
+        mode = mode or Config.PUBLISH_MODE
+
+        if mode == MODE_FIRE_AND_FORGET:
+            return self._publish_direct([notification])
+
+        future = self._get_confirming().submit(notification)
+        if mode == MODE_ASYNC_CONFIRM:
+            return future
+
+        try:
+            future.result(timeout=Config.PUBLISH_CONFIRM_TIMEOUT)
+        except Exception:
+            raise Exception("Erro interno ao publicar notificação.")
+
+    def publish_many(self, notifications, mode=None):
+        # O lote inteiro sai por um único canal: no fire_and_forget, um só publicador do
+        # pool; nos modos com confirm, tudo entra no mesmo buffer do ConfirmingPublisher.
+        mode = mode or Config.PUBLISH_MODE
+
+        if not notifications:
+            return []
+
+        if mode == MODE_FIRE_AND_FORGET:
+            return self._publish_direct(notifications)
+
+        confirming = self._get_confirming()
+        futures = [confirming.submit(notification) for notification in notifications]
+        if mode == MODE_ASYNC_CONFIRM:
+            return futures
+
+        _, pendentes = wait(futures, timeout=Config.PUBLISH_CONFIRM_TIMEOUT)
+        if pendentes or any(future.exception() for future in futures):
+            raise Exception("Erro interno ao publicar notificação.")
+
+    def _get_confirming(self):
+        with self._confirming_lock:
+            if self._confirming is None:
+                self._confirming = ConfirmingPublisher(self.declared_queues)
+            return self._confirming
+
+    def stats(self):
+        return {
+            "size": self.max_size,
+            "idle": self._idle.qsize(),
+            "declared_queues": len(self.declared_queues),
+            "confirms": self._confirming.stats() if self._confirming else None
+        }
+
+    def _publish_direct(self, notifications):
+        if not self._slots.acquire(timeout=self.timeout):
+            raise Exception("Erro interno ao publicar notificação.")
+
+        publisher = None
+        try:
+            publisher = self._checkout()
+            for notification in notifications:
+                publisher.publish(notification)
+
+        except Exception:
+            if publisher is not None:
+                publisher.close()
+                publisher = None
+            raise
+
+        finally:
+            if publisher is not None:
+                self._idle.put(publisher)
+            self._slots.release()
+
+    def _checkout(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        try:
+            return NotificationPublisher(self.declared_queues)
         except Exception:
             raise Exception("Erro interno ao publicar notificação.")
 
     def close(self):
-        if self.connection and self.connection.is_open:
-            self.connection.close()
+        if self._confirming is not None:
+            self._confirming.close()
+
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
@@ -0,0 +1,37 @@
+from src.config import Config
+
+# Topologia das notificações. "per_user": uma fila durável por usuário
+# (notifications.user.<id>). "sharded": NOTIFICATION_SHARDS filas stream fixas
+# (notifications.shard.<n>), com o usuário escolhido por id % NOTIFICATION_SHARDS;
+# o consumidor filtra pelo cabeçalho user_id e guarda seu próprio offset.
+
+def is_sharded():
+    return Config.NOTIFICATION_TOPOLOGY == "sharded"
+
+def queue_for(user_id):
+    if is_sharded():
+        return f"notifications.shard.{int(user_id) % Config.NOTIFICATION_SHARDS}"
+    return f"notifications.user.{user_id}"
+
+def routing_key_for(user_id):
+    # No modo sharded a chave é o nome da fila: um bind por shard, não por usuário.
+    if is_sharded():
+        return queue_for(user_id)
+    return str(user_id)
+
+def queue_arguments():
+    if is_sharded():
+        return {
+            "x-queue-type": "stream",
+            "x-max-age": Config.NOTIFICATION_STREAM_MAX_AGE
+        }
+    return None
+
+def message_headers(user_id):
+    if is_sharded():
+        # x-stream-filter-value deixa o broker pular blocos de outros usuários.
+        return {
+            "user_id": str(user_id),
+            "x-stream-filter-value": str(user_id)
+        }
+    return None
@@ -1,22 +1,36 @@
+import uuid
+
 import psycopg2
-from src.database.connection import get_connection
+from psycopg2.extras import execute_values
+from src.database.connection import get_pool
+from src.repository.notificacao_repository import registrar_notificacoes
 
 class AgendamentoError(Exception):
     pass
 
 class AgendamentoRepository:
-    def create(self, paciente_id, medico_id, data, horario, especialidade, tipo_pagamento):
-        conn = get_connection()
-        cursor = conn.cursor()
-        
+    def __init__(self, pool=None):
+        self.pool = pool or get_pool()
+
+    def create(self, paciente_id, medico_id, data, horario, especialidade, tipo_pagamento, status="PENDENTE", notificar=None, outbox=False):
+        # Com notificar, a notificação do novo agendamento é gravada na mesma transação
+        # (caixa de entrada e, com outbox, fila de publicação).
+        conn = self.pool.acquire()
+        cursor = None
+
         try:
+            cursor = conn.cursor()
             query = """
-                INSERT INTO agendamento (paciente_id, medico_id, data, horario, especialidade, tipo_pagamento)
-                VALUES (%s, %s, %s, %s, %s, %s)
+                INSERT INTO agendamento (paciente_id, medico_id, data, horario, especialidade, tipo_pagamento, status)
+                VALUES (%s, %s, %s, %s, %s, %s, %s)
                 RETURNING id;
             """
-            cursor.execute(query, (paciente_id, medico_id, data, horario, especialidade, tipo_pagamento))
+            cursor.execute(query, (paciente_id, medico_id, data, horario, especialidade, tipo_pagamento, status))
             novo_id = cursor.fetchone()[0]
+
+            if notificar is not None:
+                registrar_notificacoes(cursor, [notificar(novo_id)], outbox)
+
             conn.commit()
             return novo_id
 
@@ -36,14 +50,147 @@ class AgendamentoRepository:
             raise e 
         
         finally:
-            cursor.close()
-            conn.close()
+            if cursor is not None:
+                cursor.close()
+            self.pool.release(conn)
+
+    def create_many(self, agendamentos, notificar=None, outbox=False):
+        # agendamentos: lista de (paciente_id, medico_id, data, horario, especialidade, tipo_pagamento, status).
+        # Um único INSERT multi-linha; o erro de um item não derruba os outros.
+        # Devolve, na mesma ordem, (id, None) ou (None, mensagem de erro). Com notificar,
+        # as notificações dos inseridos são gravadas na mesma transação, como em create.
+        if not agendamentos:
+            return []
+
+        conn = self.pool.acquire()
+        cursor = None
+
+        try:
+            cursor = conn.cursor()
+            # Usuário inexistente sairia como IntegrityError e derrubaria o lote: confere
+            # antes, com FOR KEY SHARE para ninguém apagá-lo até o commit.
+            usuarios = sorted({int(a[0]) for a in agendamentos} | {int(a[1]) for a in agendamentos})
+            cursor.execute("SELECT id FROM usuario WHERE id = ANY(%s) FOR KEY SHARE", (usuarios,))
+            existentes = {row[0] for row in cursor.fetchall()}
+
+            medico_ocupado, paciente_ocupado = self._horarios_ocupados(cursor, agendamentos)
+
+            erros = []
+            lote_medico = set()
+            lote_paciente = set()
+            for a in agendamentos:
+                paciente_id, medico_id, data, horario = int(a[0]), int(a[1]), str(a[2]), int(a[3])
+                erro = self._erro_horario(a, medico_ocupado, paciente_ocupado)
+
+                if paciente_id not in existentes:
+                    erro = f"Paciente {paciente_id} não encontrado."
+                elif medico_id not in existentes:
+                    erro = f"Médico {medico_id} não encontrado."
+                elif erro is None and (medico_id, data, horario) in lote_medico:
+                    erro = "Outro item do lote já usa este horário do médico."
+                elif erro is None and (paciente_id, data, horario) in lote_paciente:
+                    erro = "Outro item do lote já usa este horário do paciente."
+
+                if erro is None:
+                    lote_medico.add((medico_id, data, horario))
+                    lote_paciente.add((paciente_id, data, horario))
+                erros.append(erro)
+
+            candidatos = [a for a, erro in zip(agendamentos, erros) if erro is None]
+
+            inseridos = []
+            if candidatos:
+                inseridos = execute_values(
+                    cursor,
+                    """
+                        INSERT INTO agendamento (paciente_id, medico_id, data, horario, especialidade, tipo_pagamento, status)
+                        VALUES %s
+                        ON CONFLICT DO NOTHING
+                        RETURNING id, medico_id, data, horario
+                    """,
+                    candidatos,
+                    page_size=len(candidatos),
+                    fetch=True
+                )
+
+            ids = {(medico_id, str(data), horario): agendamento_id for agendamento_id, medico_id, data, horario in inseridos}
+            resultados = [
+                ids.get((int(a[1]), str(a[2]), int(a[3]))) if erro is None else None
+                for a, erro in zip(agendamentos, erros)
+            ]
+
+            # Candidato barrado pelo ON CONFLICT: outra transação gravou o horário depois
+            # da verificação acima. Consulta de novo para dar a mensagem certa.
+            concorrentes = [a for a, erro, agendamento_id in zip(agendamentos, erros, resultados) if erro is None and agendamento_id is None]
+            if concorrentes:
+                medico_ocupado, paciente_ocupado = self._horarios_ocupados(cursor, concorrentes)
+                erros = [
+                    self._erro_horario(a, medico_ocupado, paciente_ocupado) or "Horário indisponível. Tente novamente."
+                    if erro is None and agendamento_id is None else erro
+                    for a, erro, agendamento_id in zip(agendamentos, erros, resultados)
+                ]
+
+            if notificar is not None:
+                notificacoes = [
+                    notificar(a, agendamento_id)
+                    for a, agendamento_id in zip(agendamentos, resultados)
+                    if agendamento_id is not None
+                ]
+                registrar_notificacoes(cursor, notificacoes, outbox)
+
+            conn.commit()
+
+            return [
+                (agendamento_id, None) if agendamento_id is not None else (None, erro)
+                for agendamento_id, erro in zip(resultados, erros)
+            ]
+
+        except Exception as e:
+            conn.rollback()
+            raise e
+
+        finally:
+            if cursor is not None:
+                cursor.close()
+            self.pool.release(conn)
+
+    def _horarios_ocupados(self, cursor, agendamentos):
+        # Horários já gravados que batem com uk_horario_medico ou uk_horario_paciente.
+        cursor.execute(
+            """
+                SELECT medico_id, paciente_id, data, horario
+                FROM agendamento
+                WHERE (medico_id, data, horario) IN %s OR (paciente_id, data, horario) IN %s
+            """,
+            (
+                tuple((int(a[1]), str(a[2]), int(a[3])) for a in agendamentos),
+                tuple((int(a[0]), str(a[2]), int(a[3])) for a in agendamentos)
+            )
+        )
+
+        medico_ocupado = set()
+        paciente_ocupado = set()
+        for medico_id, paciente_id, data, horario in cursor.fetchall():
+            medico_ocupado.add((medico_id, str(data), horario))
+            paciente_ocupado.add((paciente_id, str(data), horario))
+
+        return medico_ocupado, paciente_ocupado
+
+    def _erro_horario(self, agendamento, medico_ocupado, paciente_ocupado):
+        paciente_id, medico_id, data, horario = int(agendamento[0]), int(agendamento[1]), str(agendamento[2]), int(agendamento[3])
+
+        if (medico_id, data, horario) in medico_ocupado:
+            return "Médico indisponível neste horário."
+        if (paciente_id, data, horario) in paciente_ocupado:
+            return "Paciente já possui um agendamento neste horário."
+        return None
 
     def get_by_id(self, agendamento_id):
-        conn = get_connection()
-        cursor = conn.cursor()
+        conn = self.pool.acquire()
+        cursor = None
 
         try:
+            cursor = conn.cursor()
             query = """
                 SELECT id, paciente_id, medico_id, data, horario, status
                 FROM agendamento
@@ -65,15 +212,17 @@ class AgendamentoRepository:
             }
 
         finally:
-            cursor.close()
-            conn.close()
+            if cursor is not None:
+                cursor.close()
+            self.pool.release(conn)
 
 
     def list_all(self, status=None):
-        conn = get_connection()
-        cursor = conn.cursor()
+        conn = self.pool.acquire()
+        cursor = None
 
         try:
+            cursor = conn.cursor()
             if status:
                 query = """
                     SELECT id, paciente_id, medico_id, data, horario,
@@ -97,14 +246,16 @@ class AgendamentoRepository:
             return [self._row_to_dict(row) for row in rows]
 
         finally:
-            cursor.close()
-            conn.close()
+            if cursor is not None:
+                cursor.close()
+            self.pool.release(conn)
 
     def list_by_paciente(self, paciente_id, status=None):
-        conn = get_connection()
-        cursor = conn.cursor()
+        conn = self.pool.acquire()
+        cursor = None
 
         try:
+            cursor = conn.cursor()
             if status:
                 query = """
                     SELECT id, paciente_id, medico_id, data, horario,
@@ -128,14 +279,16 @@ class AgendamentoRepository:
             return [self._row_to_dict(row) for row in rows]
 
         finally:
-            cursor.close()
-            conn.close()
+            if cursor is not None:
+                cursor.close()
+            self.pool.release(conn)
 
     def list_by_medico(self, medico_id, status=None):
-        conn = get_connection()
-        cursor = conn.cursor()
+        conn = self.pool.acquire()
+        cursor = None
 
         try:
+            cursor = conn.cursor()
             if status:
                 query = """
                     SELECT id, paciente_id, medico_id, data, horario,
@@ -159,8 +312,142 @@ class AgendamentoRepository:
             return [self._row_to_dict(row) for row in rows]
 
         finally:
-            cursor.close()
-            conn.close()
+            if cursor is not None:
+                cursor.close()
+            self.pool.release(conn)
+
+    def list_page(self, paciente_id=None, medico_id=None, status=None, data_inicio=None, data_fim=None,
+                  especialidade=None, after=None, limit=50):
+        # Paginação por keyset em (data, horario, id): cada página continua de onde a
+        # anterior parou, sem OFFSET. Busca um item a mais para saber se há próxima página.
+        conn = self.pool.acquire()
+        cursor = None
+
+        try:
+            cursor = conn.cursor()
+            condicoes = []
+            params = []
+
+            filtros = (
+                ("paciente_id = %s", paciente_id),
+                ("medico_id = %s", medico_id),
+                ("status = %s", status),
+                ("data >= %s", data_inicio),
+                ("data <= %s", data_fim),
+                ("especialidade = %s", especialidade)
+            )
+            for condicao, valor in filtros:
+                if valor is not None:
+                    condicoes.append(condicao)
+                    params.append(valor)
+
+            # Com paciente ou médico no filtro, (data, horario) já é único (uk_horario_paciente,
+            # uk_horario_medico): o id não desempata nada e a ordem sai direto desses índices.
+            if paciente_id is not None or medico_id is not None:
+                ordem = ("data", "horario")
+            else:
+                ordem = ("data", "horario", "id")
+
+            if after is not None:
+                condicoes.append(f"({', '.join(ordem)}) > ({', '.join(['%s'] * len(ordem))})")
+                params.extend(after[:len(ordem)])
+
+            where = f"WHERE {' AND '.join(condicoes)}" if condicoes else ""
+
+            query = f"""
+                SELECT id, paciente_id, medico_id, data, horario,
+                       especialidade, tipo_pagamento, status
+                FROM agendamento
+                {where}
+                ORDER BY {', '.join(ordem)}
+                LIMIT %s
+            """
+            cursor.execute(query, (*params, limit + 1))
+            rows = cursor.fetchall()
+
+            itens = [self._row_to_dict(row) for row in rows[:limit]]
+            tem_mais = len(rows) > limit
+
+            return itens, tem_mais
+
+        finally:
+            if cursor is not None:
+                cursor.close()
+            self.pool.release(conn)
+
+    def occupancy(self, data_inicio, data_fim, medico_id=None):
+        # Um bitmap de 11 bits por (médico, dia): o bit (horario - 6) ligado indica horário
+        # ocupado. Qualquer status conta, já que uk_horario_medico vale também para
+        # agendamentos cancelados ou rejeitados. A agregação vem de uk_horario_medico.
+        conn = self.pool.acquire()
+        cursor = None
+
+        try:
+            cursor = conn.cursor()
+            condicoes = ["m.tipo = 'MEDICO'"]
+            params = [data_inicio, data_fim, data_inicio, data_fim]
+
+            if medico_id is not None:
+                condicoes.append("m.id = %s")
+                params.append(medico_id)
+
+            query = f"""
+                SELECT m.id, d.dia::date, COALESCE(o.ocupados, 0)
+                FROM usuario m
+                CROSS JOIN generate_series(%s::date, %s::date, interval '1 day') AS d(dia)
+                LEFT JOIN (
+                    SELECT medico_id, data, bit_or(1 << (horario - 6)) AS ocupados
+                    FROM agendamento
+                    WHERE data BETWEEN %s AND %s
+                    GROUP BY medico_id, data
+                ) o ON o.medico_id = m.id AND o.data = d.dia::date
+                WHERE {' AND '.join(condicoes)}
+                ORDER BY m.id, d.dia
+            """
+            cursor.execute(query, params)
+
+            return [(row[0], str(row[1]), row[2]) for row in cursor.fetchall()]
+
+        finally:
+            if cursor is not None:
+                cursor.close()
+            self.pool.release(conn)
+
+    def stream(self, paciente_id=None, medico_id=None, status=None, itersize=2000):
+        # Cursor nomeado (server-side): o Postgres entrega as linhas em blocos de
+        # itersize, então a memória não cresce com o tamanho da tabela.
+        conn = self.pool.acquire()
+        cursor = None
+
+        try:
+            cursor = conn.cursor(name=f"stream_{uuid.uuid4().hex}")
+            cursor.itersize = itersize
+            condicoes = []
+            params = []
+
+            for condicao, valor in (("paciente_id = %s", paciente_id), ("medico_id = %s", medico_id), ("status = %s", status)):
+                if valor is not None:
+                    condicoes.append(condicao)
+                    params.append(valor)
+
+            where = f"WHERE {' AND '.join(condicoes)}" if condicoes else ""
+
+            query = f"""
+                SELECT id, paciente_id, medico_id, data, horario,
+                       especialidade, tipo_pagamento, status
+                FROM agendamento
+                {where}
+                ORDER BY data, horario, id
+            """
+            cursor.execute(query, params)
+
+            for row in cursor:
+                yield row
+
+        finally:
+            if cursor is not None:
+                cursor.close()
+            self.pool.release(conn)
 
     def _row_to_dict(self, row):
         return {
@@ -174,11 +461,12 @@ class AgendamentoRepository:
             "status": row[7]
         }
 
-    def update_status(self, agendamento_id, status):
-        conn = get_connection()
-        cursor = conn.cursor()
+    def update_status(self, agendamento_id, status, notificacao=None, outbox=False):
+        conn = self.pool.acquire()
+        cursor = None
 
         try:
+            cursor = conn.cursor()
             query = """
                 UPDATE agendamento
                 SET status = %s
@@ -189,6 +477,10 @@ class AgendamentoRepository:
             if cursor.rowcount == 0:
                 raise AgendamentoError("Agendamento não encontrado.")
 
+            # Na mesma transação: a notificação só existe se o status mudou.
+            if notificacao is not None:
+                registrar_notificacoes(cursor, [notificacao], outbox)
+
             conn.commit()
 
         except psycopg2.Error:
@@ -196,5 +488,6 @@ class AgendamentoRepository:
             raise AgendamentoError("Erro interno no servidor.")
 
         finally:
-            cursor.close()
-            conn.close()
\ No newline at end of file
+            if cursor is not None:
+                cursor.close()
+            self.pool.release(conn)
\ No newline at end of file
@@ -0,0 +1,76 @@
+import asyncio
+
+import asyncpg
+
+from src.config import Config
+from src.repository.agendamento_repository import AgendamentoError
+
+class AsyncAgendamentoRepository:
+    # Caminho de escrita do agendamento no engine assíncrono (asyncpg). Mesmas
+    # consultas e mensagens de AgendamentoRepository.create e registrar_notificacoes.
+    def __init__(self):
+        self.pool = None
+
+    async def start(self):
+        self.pool = await asyncpg.create_pool(
+            host=Config.DB_HOST,
+            port=int(Config.DB_PORT),
+            user=Config.DB_USER,
+            password=Config.DB_PASSWORD,
+            database=Config.DB_NAME,
+            min_size=Config.DB_POOL_MIN_SIZE,
+            max_size=Config.ASYNC_DB_POOL_MAX_SIZE,
+            max_inactive_connection_lifetime=Config.DB_POOL_MAX_AGE
+        )
+
+    async def close(self):
+        if self.pool is not None:
+            await self.pool.close()
+
+    async def create(self, paciente_id, medico_id, data, horario, especialidade, tipo_pagamento, status="PENDENTE", notificar=None, outbox=False):
+        try:
+            async with self.pool.acquire(timeout=Config.DB_POOL_TIMEOUT) as conn:
+                async with conn.transaction():
+                    # Datas seguem como texto, como no psycopg2, e o Postgres converte.
+                    novo_id = await conn.fetchval(
+                        """
+                            INSERT INTO agendamento (paciente_id, medico_id, data, horario, especialidade, tipo_pagamento, status)
+                            VALUES ($1, $2, $3::text::date, $4, $5, $6, $7)
+                            RETURNING id
+                        """,
+                        int(paciente_id), int(medico_id), data, int(horario), especialidade, tipo_pagamento, status
+                    )
+
+                    if notificar is not None:
+                        await self._registrar_notificacoes(conn, [notificar(novo_id)], outbox)
+
+                    return novo_id
+
+        except asyncpg.IntegrityConstraintViolationError as e:
+            erro_str = str(e)
+
+            if "uk_horario_medico" in erro_str:
+                raise AgendamentoError("Médico indisponível neste horário.")
+            if "uk_horario_paciente" in erro_str:
+                raise AgendamentoError("Paciente já possui um agendamento neste horário.")
+
+            raise AgendamentoError("Dados inválidos (verifique se paciente/médico existem).")
+
+        except asyncio.TimeoutError:
+            raise Exception("Erro interno no servidor: pool de conexões esgotado.")
+
+    async def _registrar_notificacoes(self, conn, notificacoes, outbox):
+        if Config.NOTIFICATION_INBOX:
+            await conn.executemany(
+                """
+                    INSERT INTO notificacao (user_id, agendamento_id, novo_status, mensagem, origem, criado_em)
+                    VALUES ($1, $2, $3, $4, $5, $6::text::timestamptz)
+                """,
+                [(int(n.user_id), n.agendamento_id, n.novo_status, n.mensagem, n.origem, n.timestamp) for n in notificacoes]
+            )
+
+        if outbox:
+            await conn.executemany(
+                "INSERT INTO outbox (user_id, payload) VALUES ($1, $2)",
+                [(int(n.user_id), n.to_json()) for n in notificacoes]
+            )
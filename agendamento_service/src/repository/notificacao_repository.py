@@ -0,0 +1,135 @@
+from psycopg2.extras import execute_values
+
+from src.config import Config
+from src.database.connection import get_pool
+
+def registrar_notificacoes(cursor, notificacoes, outbox):
+    # Roda dentro da transação de quem chama: caixa de entrada (histórico) e, se
+    # pedido, outbox (publicação) nascem junto com a mudança de status.
+    if not notificacoes:
+        return
+
+    if Config.NOTIFICATION_INBOX:
+        execute_values(
+            cursor,
+            """
+                INSERT INTO notificacao (user_id, agendamento_id, novo_status, mensagem, origem, criado_em)
+                VALUES %s
+            """,
+            [(n.user_id, n.agendamento_id, n.novo_status, n.mensagem, n.origem, n.timestamp) for n in notificacoes],
+            page_size=len(notificacoes)
+        )
+
+    if outbox:
+        execute_values(
+            cursor,
+            "INSERT INTO outbox (user_id, payload) VALUES %s",
+            [(n.user_id, n.to_json()) for n in notificacoes],
+            page_size=len(notificacoes)
+        )
+
+class NotificacaoRepository:
+    def __init__(self, pool=None):
+        self.pool = pool or get_pool()
+
+    def list_page(self, user_id, before=None, limit=50):
+        # Mais recentes primeiro, por keyset em (criado_em, id) sobre idx_notificacao_usuario_criado.
+        conn = self.pool.acquire()
+        cursor = None
+
+        try:
+            cursor = conn.cursor()
+            condicoes = ["n.user_id = %s"]
+            params = [user_id]
+
+            if before is not None:
+                condicoes.append("(n.criado_em, n.id) < (%s, %s)")
+                params.extend(before)
+
+            query = f"""
+                SELECT n.id, n.agendamento_id, n.novo_status, n.mensagem, n.origem, n.criado_em,
+                       l.user_id IS NOT NULL AND (n.criado_em, n.id) <= (l.lida_ate_em, l.lida_ate_id)
+                FROM notificacao n
+                LEFT JOIN notificacao_leitura l ON l.user_id = n.user_id
+                WHERE {' AND '.join(condicoes)}
+                ORDER BY n.criado_em DESC, n.id DESC
+                LIMIT %s
+            """
+            cursor.execute(query, (*params, limit + 1))
+            rows = cursor.fetchall()
+
+            itens = [
+                {
+                    "id": row[0],
+                    "agendamento_id": row[1],
+                    "novo_status": row[2],
+                    "mensagem": row[3],
+                    "origem": row[4],
+                    "timestamp": row[5].isoformat(),
+                    "lida": bool(row[6])
+                }
+                for row in rows[:limit]
+            ]
+
+            return itens, len(rows) > limit
+
+        finally:
+            if cursor is not None:
+                cursor.close()
+            self.pool.release(conn)
+
+    def unread_count(self, user_id):
+        conn = self.pool.acquire()
+        cursor = None
+
+        try:
+            cursor = conn.cursor()
+            cursor.execute(
+                "SELECT lida_ate_em, lida_ate_id FROM notificacao_leitura WHERE user_id = %s",
+                (user_id,)
+            )
+            leitura = cursor.fetchone()
+
+            if leitura is None:
+                cursor.execute("SELECT count(*) FROM notificacao WHERE user_id = %s", (user_id,))
+            else:
+                cursor.execute(
+                    "SELECT count(*) FROM notificacao WHERE user_id = %s AND (criado_em, id) > (%s, %s)",
+                    (user_id, *leitura)
+                )
+
+            return cursor.fetchone()[0]
+
+        finally:
+            if cursor is not None:
+                cursor.close()
+            self.pool.release(conn)
+
+    def mark_read(self, user_id):
+        # Avança o cursor de leitura até a notificação mais recente do usuário.
+        conn = self.pool.acquire()
+        cursor = None
+
+        try:
+            cursor = conn.cursor()
+            query = """
+                INSERT INTO notificacao_leitura (user_id, lida_ate_em, lida_ate_id)
+                SELECT user_id, criado_em, id
+                FROM notificacao
+                WHERE user_id = %s
+                ORDER BY criado_em DESC, id DESC
+                LIMIT 1
+                ON CONFLICT (user_id) DO UPDATE
+                SET lida_ate_em = EXCLUDED.lida_ate_em, lida_ate_id = EXCLUDED.lida_ate_id
+            """
+            cursor.execute(query, (user_id,))
+            conn.commit()
+
+        except Exception:
+            conn.rollback()
+            raise
+
+        finally:
+            if cursor is not None:
+                cursor.close()
+            self.pool.release(conn)
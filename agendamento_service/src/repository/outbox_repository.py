@@ -0,0 +1,94 @@
+from src.database.connection import get_pool
+
+class OutboxRepository:
+    def __init__(self, pool=None):
+        self.pool = pool or get_pool()
+
+    def claim_batch(self, limit, lease):
+        # Reserva um lote de mensagens pendentes por `lease` segundos e faz commit na
+        # hora: nenhum lock fica aberto enquanto o broker confirma. SKIP LOCKED deixa
+        # outros relays pegarem os lotes seguintes em paralelo; reserva vencida (relay
+        # que caiu no meio) volta a ser elegível.
+        conn = self.pool.acquire()
+        cursor = None
+
+        try:
+            cursor = conn.cursor()
+            query = """
+                UPDATE outbox
+                SET reservado_ate = now() + make_interval(secs => %s)
+                WHERE id IN (
+                    SELECT id
+                    FROM outbox
+                    WHERE reservado_ate IS NULL OR reservado_ate < now()
+                    ORDER BY id
+                    LIMIT %s
+                    FOR UPDATE SKIP LOCKED
+                )
+                RETURNING id, payload
+            """
+            cursor.execute(query, (lease, limit))
+            rows = sorted(cursor.fetchall())
+            conn.commit()
+
+            return rows
+
+        except Exception:
+            conn.rollback()
+            raise
+
+        finally:
+            if cursor is not None:
+                cursor.close()
+            self.pool.release(conn)
+
+    def delete(self, ids):
+        self._execute("DELETE FROM outbox WHERE id = ANY(%s)", ids)
+
+    def release(self, ids):
+        # Devolve as mensagens não confirmadas para a próxima varredura.
+        self._execute("UPDATE outbox SET reservado_ate = NULL WHERE id = ANY(%s)", ids)
+
+    def _execute(self, query, ids):
+        if not ids:
+            return
+
+        conn = self.pool.acquire()
+        cursor = None
+
+        try:
+            cursor = conn.cursor()
+            cursor.execute(query, (list(ids),))
+            conn.commit()
+
+        except Exception:
+            conn.rollback()
+            raise
+
+        finally:
+            if cursor is not None:
+                cursor.close()
+            self.pool.release(conn)
+
+    def stats(self):
+        conn = self.pool.acquire()
+        cursor = None
+
+        try:
+            cursor = conn.cursor()
+            query = """
+                SELECT count(*), COALESCE(EXTRACT(EPOCH FROM now() - min(criado_em)), 0)
+                FROM outbox
+            """
+            cursor.execute(query)
+            backlog, lag = cursor.fetchone()
+
+            return {
+                "backlog": backlog,
+                "lag": float(lag)
+            }
+
+        finally:
+            if cursor is not None:
+                cursor.close()
+            self.pool.release(conn)
@@ -0,0 +1,322 @@
+import asyncio
+import time
+import xmlrpc.client
+from http import HTTPStatus
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, urlsplit
+from xmlrpc.client import gzip_decode, gzip_encode
+from xmlrpc.server import SimpleXMLRPCDispatcher
+
+from src.config import Config
+from src.server import jsonrpc
+from src.utils.metrics import Histogram
+
+SOBRECARGA = "Servidor sobrecarregado. Tente novamente em instantes."
+
+class _HTTPError(Exception):
+    def __init__(self, status, reason):
+        super().__init__(reason)
+        self.status = status
+        self.reason = reason
+
+class AsyncRPCServer(SimpleXMLRPCDispatcher):
+    # Engine asyncio (RPC_SERVER_MODE=asyncio): um processo, um loop, milhares de
+    # conexões keep-alive. Atende as mesmas rotas do AgendamentoRequestHandler (XML-RPC
+    # em / e /RPC2, JSON-RPC em /jsonrpc, exportação em GET). Métodos registrados com
+    # register_async_function rodam no loop; os demais (register_instance,
+    # register_function, system.*) passam pelo dispatcher síncrono em um pool de threads,
+    # com o mesmo marshalling do SimpleXMLRPCServer.
+    rpc_paths = ("/", "/RPC2")
+    jsonrpc_paths = ("/jsonrpc",)
+    export_paths = ("/export/agendamentos",)
+
+    def __init__(self, address, allow_none=False, encoding=None, blocking_workers=None, reuse_port=False):
+        super().__init__(allow_none, encoding)
+        self.address = address
+        self.reuse_port = reuse_port
+
+        self.async_funcs = {}
+        self.on_startup = []
+        self.on_listening = []
+        self.on_shutdown = []
+
+        self._loop = None
+        self._stop = None
+
+        self.blocking_workers = blocking_workers or Config.ASYNC_BLOCKING_WORKERS
+        self.executor = ThreadPoolExecutor(
+            max_workers=self.blocking_workers,
+            thread_name_prefix="rpc-blocking"
+        )
+
+        self.service_time = Histogram()
+        self.in_flight = 0
+        self.connections = 0
+        self.rejected = 0
+
+    def register_async_function(self, function, name=None):
+        self.async_funcs[name or function.__name__] = function
+
+    async def dispatch(self, method, params):
+        function = self.async_funcs.get(method)
+        if function is not None:
+            return await function(*params)
+
+        return await asyncio.get_running_loop().run_in_executor(self.executor, self._dispatch, method, params)
+
+    def serve_forever(self):
+        asyncio.run(self._serve())
+
+    def shutdown(self):
+        # Pode ser chamado de outra thread (ex.: handler de SIGTERM), como no socketserver.
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._stop.set)
+
+    def server_close(self):
+        self.executor.shutdown(wait=False)
+
+    def metrics(self):
+        return {
+            "connections": self.connections,
+            "in_flight": self.in_flight,
+            "max_in_flight": Config.ASYNC_MAX_IN_FLIGHT,
+            "rejected": self.rejected,
+            "blocking_workers": self.blocking_workers,
+            "service_time": self.service_time.snapshot()
+        }
+
+    async def _serve(self):
+        self._loop = asyncio.get_running_loop()
+        self._stop = asyncio.Event()
+
+        for hook in self.on_startup:
+            await hook()
+
+        try:
+            server = await asyncio.start_server(
+                self._handle_connection,
+                self.address[0],
+                self.address[1],
+                reuse_address=True,
+                reuse_port=self.reuse_port or None,
+                backlog=Config.ASYNC_BACKLOG
+            )
+
+            for hook in self.on_listening:
+                hook()
+
+            async with server:
+                await self._stop.wait()
+
+            # Parou de aceitar conexões; espera as chamadas em andamento terminarem.
+            prazo = time.monotonic() + Config.RPC_SHUTDOWN_TIMEOUT
+            while self.in_flight and time.monotonic() < prazo:
+                await asyncio.sleep(0.05)
+
+        finally:
+            for hook in reversed(self.on_shutdown):
+                await hook()
+
+    async def _handle_connection(self, reader, writer):
+        self.connections += 1
+        timeout = Config.RPC_REQUEST_TIMEOUT
+
+        try:
+            while True:
+                try:
+                    request = await asyncio.wait_for(self._read_request(reader), timeout)
+                except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError, ValueError):
+                    return  # Ociosa, encerrada pelo cliente ou requisição malformada.
+
+                if request is None:
+                    return
+
+                method, path, headers, body, keep_alive = request
+                keep_alive = keep_alive and Config.RPC_KEEPALIVE
+
+                inicio = time.monotonic()
+                try:
+                    status, content_type, response = await self._route(method, path, headers, body, writer)
+                except _HTTPError as e:
+                    status, content_type, response = e.status, "text/plain", e.reason.encode()
+                    keep_alive = False
+                finally:
+                    self.service_time.observe(time.monotonic() - inicio)
+
+                if status is None:
+                    return  # Exportação: resposta já escrita, conexão encerrada.
+
+                await self._write_response(writer, status, content_type, response, headers, keep_alive)
+
+                if not keep_alive:
+                    return
+
+                # Conexão ociosa fecha antes, como no servidor síncrono.
+                timeout = Config.RPC_KEEPALIVE_TIMEOUT
+
+        except (ConnectionError, OSError):
+            pass
+
+        finally:
+            self.connections -= 1
+            writer.close()
+
+    async def _read_request(self, reader):
+        linha = await reader.readline()
+        if not linha:
+            return None
+
+        try:
+            method, target, version = linha.decode("latin-1").split()
+        except ValueError:
+            raise ConnectionError("Requisição HTTP inválida.")
+
+        headers = {}
+        while True:
+            linha = await reader.readline()
+            if linha in (b"\r\n", b"\n", b""):
+                break
+            nome, _, valor = linha.decode("latin-1").partition(":")
+            headers[nome.strip().lower()] = valor.strip()
+
+            if len(headers) > 100:
+                raise ConnectionError("Cabeçalhos demais.")
+
+        tamanho = int(headers.get("content-length") or 0)
+        body = await reader.readexactly(tamanho) if tamanho else b""
+
+        connection = headers.get("connection", "").lower()
+        if version == "HTTP/1.1":
+            keep_alive = connection != "close"
+        else:
+            keep_alive = connection == "keep-alive"
+
+        return method, target, headers, body, keep_alive
+
+    async def _route(self, method, target, headers, body, writer):
+        path = urlsplit(target).path
+
+        if method == "GET" and path in self.export_paths:
+            await self._export(target, headers, writer)
+            return None, None, None
+
+        if method != "POST":
+            raise _HTTPError(501, "Not Implemented")
+
+        if path not in self.rpc_paths and path not in self.jsonrpc_paths:
+            raise _HTTPError(404, "Not Found")
+
+        if headers.get("content-encoding", "identity").lower() == "gzip":
+            try:
+                body = gzip_decode(body)
+            except ValueError:
+                raise _HTTPError(400, "error decoding gzip content")
+
+        json_rpc = path in self.jsonrpc_paths
+
+        if self.in_flight >= Config.ASYNC_MAX_IN_FLIGHT:
+            self.rejected += 1
+            if json_rpc:
+                return 200, "application/json", jsonrpc.dumps(jsonrpc.error(None, 3, SOBRECARGA))
+            return 200, "text/xml", self._dumps_fault(xmlrpc.client.Fault(3, SOBRECARGA))
+
+        self.in_flight += 1
+        try:
+            if json_rpc:
+                response = await jsonrpc.handle_async(self.dispatch, body)
+                if response is None:
+                    return 204, "application/json", b""
+                return 200, "application/json", response
+
+            return 200, "text/xml", await self._xmlrpc(body)
+
+        finally:
+            self.in_flight -= 1
+
+    async def _xmlrpc(self, data):
+        try:
+            params, method = xmlrpc.client.loads(data, use_builtin_types=self.use_builtin_types)
+        except Exception as e:
+            return self._dumps_fault(xmlrpc.client.Fault(1, "%s:%s" % (type(e), e)))
+
+        if method not in self.async_funcs:
+            # Despacho e marshalling no pool, exatamente como no SimpleXMLRPCServer.
+            return await asyncio.get_running_loop().run_in_executor(self.executor, self._marshaled_dispatch, data)
+
+        try:
+            response = await self.dispatch(method, params)
+            return xmlrpc.client.dumps(
+                (response,), methodresponse=1, allow_none=self.allow_none, encoding=self.encoding
+            ).encode(self.encoding, "xmlcharrefreplace")
+
+        except xmlrpc.client.Fault as fault:
+            return self._dumps_fault(fault)
+
+        except BaseException as e:
+            return self._dumps_fault(xmlrpc.client.Fault(1, "%s:%s" % (type(e), e)))
+
+    def _dumps_fault(self, fault):
+        return xmlrpc.client.dumps(
+            fault, allow_none=self.allow_none, encoding=self.encoding
+        ).encode(self.encoding, "xmlcharrefreplace")
+
+    async def _write_response(self, writer, status, content_type, body, request_headers, keep_alive):
+        headers = [f"HTTP/1.1 {status} {HTTPStatus(status).phrase}", f"Content-Type: {content_type}"]
+
+        if (
+            Config.RPC_GZIP_MIN_SIZE is not None
+            and len(body) > Config.RPC_GZIP_MIN_SIZE
+            and "gzip" in request_headers.get("accept-encoding", "")
+        ):
+            body = gzip_encode(body)
+            headers.append("Content-Encoding: gzip")
+
+        headers.append(f"Content-Length: {len(body)}")
+        if not keep_alive:
+            headers.append("Connection: close")
+
+        writer.write(("\r\n".join(headers) + "\r\n\r\n").encode("latin-1") + body)
+        await writer.drain()
+
+    async def _export(self, target, headers, writer):
+        # O export_service é síncrono (cursor nomeado do psycopg2): cada bloco é lido
+        # em uma thread do pool e escrito no loop.
+        loop = asyncio.get_running_loop()
+        params = parse_qs(urlsplit(target).query)
+        token = headers.get("x-token") or params.get("token", [None])[0]
+        status = params.get("status", [None])[0]
+
+        try:
+            linhas = await loop.run_in_executor(self.executor, self.export_service.exportar_agendamentos, token, status)
+        except xmlrpc.client.Fault as e:
+            corpo = jsonrpc.dumps({"erro": e.faultString})
+            await self._write_response(writer, 400 if e.faultCode == 1 else 500, "application/json", corpo, {}, False)
+            return
+
+        def proximo_bloco():
+            buffer = []
+            tamanho = 0
+            for linha in linhas:
+                buffer.append(linha)
+                tamanho += len(linha)
+                if tamanho >= Config.EXPORT_CHUNK_SIZE:
+                    break
+            return b"".join(buffer)
+
+        try:
+            writer.write(
+                b"HTTP/1.1 200 OK\r\n"
+                b"Content-Type: application/x-ndjson\r\n"
+                b"Transfer-Encoding: chunked\r\n"
+                b"Connection: close\r\n\r\n"
+            )
+
+            while bloco := await loop.run_in_executor(self.executor, proximo_bloco):
+                writer.write(f"{len(bloco):X}\r\n".encode() + bloco + b"\r\n")
+                await writer.drain()
+
+            writer.write(b"0\r\n\r\n")
+            await writer.drain()
+
+        finally:
+            await loop.run_in_executor(self.executor, linhas.close)
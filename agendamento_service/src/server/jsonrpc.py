@@ -0,0 +1,100 @@
+import asyncio
+import json
+import xmlrpc.client
+
+# JSON-RPC 2.0 sobre o mesmo dispatcher do XML-RPC: mesmos métodos e o Fault vira
+# o objeto de erro com o mesmo código (1 negócio, 2 interno, 3 sobrecarga).
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+INTERNAL_ERROR = -32603
+
+def dumps(obj):
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False, default=str).encode()
+
+def handle(server, data):
+    # Devolve o corpo da resposta, ou None quando só havia notificações (sem id).
+    requests, batch, erro = _parse(data)
+    if erro is not None:
+        return erro
+
+    return _encode([_call(server._dispatch, request) for request in requests], batch)
+
+async def handle_async(dispatch, data):
+    # Mesmo que handle, para o engine asyncio: dispatch é uma corrotina e as
+    # chamadas de um lote rodam em paralelo.
+    requests, batch, erro = _parse(data)
+    if erro is not None:
+        return erro
+
+    respostas = await asyncio.gather(*(_call_async(dispatch, request) for request in requests))
+    return _encode(respostas, batch)
+
+def _parse(data):
+    try:
+        payload = json.loads(data)
+    except ValueError:
+        return None, False, dumps(error(None, PARSE_ERROR, "Parse error"))
+
+    if isinstance(payload, list):
+        if not payload:
+            return None, True, dumps(error(None, INVALID_REQUEST, "Invalid Request"))
+        return payload, True, None
+
+    return [payload], False, None
+
+def _encode(respostas, batch):
+    respostas = [r for r in respostas if r is not None]
+    if not respostas:
+        return None
+    return dumps(respostas if batch else respostas[0])
+
+def _check(request):
+    # Devolve (request_id, notificacao, resposta de erro ou None).
+    if not isinstance(request, dict) or request.get("jsonrpc") != "2.0" or not isinstance(request.get("method"), str):
+        return None, False, error(request.get("id") if isinstance(request, dict) else None, INVALID_REQUEST, "Invalid Request")
+
+    request_id = request.get("id")
+    notificacao = "id" not in request
+
+    if not isinstance(request.get("params", []), list):
+        # Os métodos são posicionais, como no XML-RPC.
+        return request_id, notificacao, error(request_id, INVALID_PARAMS, "params deve ser uma lista.")
+
+    return request_id, notificacao, None
+
+def _call(dispatch, request):
+    request_id, notificacao, resposta = _check(request)
+
+    if resposta is None:
+        try:
+            resposta = {"jsonrpc": "2.0", "result": dispatch(request["method"], request.get("params", [])), "id": request_id}
+        except Exception as e:
+            resposta = _exception(request_id, e)
+
+    return None if notificacao else resposta
+
+async def _call_async(dispatch, request):
+    request_id, notificacao, resposta = _check(request)
+
+    if resposta is None:
+        try:
+            resposta = {"jsonrpc": "2.0", "result": await dispatch(request["method"], request.get("params", [])), "id": request_id}
+        except Exception as e:
+            resposta = _exception(request_id, e)
+
+    return None if notificacao else resposta
+
+def _exception(request_id, e):
+    if isinstance(e, xmlrpc.client.Fault):
+        return error(request_id, e.faultCode, e.faultString)
+    if isinstance(e, TypeError):
+        return error(request_id, INVALID_PARAMS, str(e))
+
+    msg = str(e)
+    codigo = METHOD_NOT_FOUND if "is not supported" in msg else INTERNAL_ERROR
+    return error(request_id, codigo, msg)
+
+def error(request_id, code, message):
+    return {"jsonrpc": "2.0", "error": {"code": code, "message": message}, "id": request_id}
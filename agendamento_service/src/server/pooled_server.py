@@ -0,0 +1,240 @@
+import queue
+import selectors
+import socket
+import threading
+import time
+import xmlrpc.client
+from xmlrpc.server import SimpleXMLRPCServer
+
+from src.config import Config
+from src.server import jsonrpc
+from src.utils.metrics import Histogram
+
+# Atende requisições com um número fixo de workers e uma fila de espera limitada.
+# Conexão keep-alive ociosa não ocupa worker: fica em um selector e volta para a
+# fila só quando chega a próxima requisição.
+class PooledXMLRPCServer(SimpleXMLRPCServer):
+    def __init__(self, address, workers, queue_size, request_timeout, **kwargs):
+        self.workers = workers
+        self.request_timeout = request_timeout
+        self.requests = queue.Queue(maxsize=queue_size)
+
+        self.queue_wait = Histogram()
+        self.service_time = Histogram()
+        self.rejected = 0
+        self.expired = 0
+        self._stats_lock = threading.Lock()
+
+        super().__init__(address, **kwargs)
+
+        self._threads = []
+        for i in range(workers):
+            thread = threading.Thread(target=self._worker, name=f"rpc-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+        self._selector = selectors.DefaultSelector()
+        self._parking = []
+        self._parking_lock = threading.Lock()
+        self._wakeup_r, self._wakeup_w = socket.socketpair()
+        self._wakeup_r.setblocking(False)
+        self._selector.register(self._wakeup_r, selectors.EVENT_READ)
+        self._idle = {}  # socket -> (client_address, ociosa desde)
+        self._closing = False
+
+        self._idle_thread = threading.Thread(target=self._watch_idle, name="rpc-keepalive", daemon=True)
+        self._idle_thread.start()
+
+    def process_request(self, request, client_address):
+        try:
+            self.requests.put_nowait((request, client_address, time.monotonic()))
+        except queue.Full:
+            with self._stats_lock:
+                self.rejected += 1
+            self._reject(request, "Servidor sobrecarregado. Tente novamente em instantes.")
+
+    def _worker(self):
+        while True:
+            item = self.requests.get()
+            if item is None:
+                return
+
+            request, client_address, enfileirada_em = item
+            espera = time.monotonic() - enfileirada_em
+            self.queue_wait.observe(espera)
+
+            # Requisição que estourou o prazo na fila não chega ao serviço.
+            if self.request_timeout and espera > self.request_timeout:
+                with self._stats_lock:
+                    self.expired += 1
+                self._reject(request, "Tempo limite da requisição excedido.")
+                continue
+
+            keep_alive = False
+            try:
+                if self.request_timeout:
+                    request.settimeout(self.request_timeout)
+                keep_alive = self.finish_request(request, client_address)
+            except Exception:
+                self.handle_error(request, client_address)
+            finally:
+                if keep_alive:
+                    self.park(request, client_address)
+                else:
+                    self.shutdown_request(request)
+
+    def finish_request(self, request, client_address):
+        # O handler diz se a conexão continua aberta esperando a próxima requisição.
+        handler = self.RequestHandlerClass(request, client_address, self)
+        return getattr(handler, "keep_alive", False)
+
+    def park(self, request, client_address):
+        with self._parking_lock:
+            if self._closing:
+                self.shutdown_request(request)
+                return
+            self._parking.append((request, client_address))
+
+        # O selector só é tocado pela thread rpc-keepalive.
+        self._wakeup_w.send(b"\0")
+
+    def _watch_idle(self):
+        while not self._closing:
+            agora = time.monotonic()
+            for request, (client_address, desde) in list(self._idle.items()):
+                if agora - desde > Config.RPC_KEEPALIVE_TIMEOUT:
+                    self._unpark(request)
+                    self.shutdown_request(request)
+
+            espera = min(
+                (desde + Config.RPC_KEEPALIVE_TIMEOUT - agora for _, desde in self._idle.values()),
+                default=Config.RPC_KEEPALIVE_TIMEOUT
+            )
+
+            for key, _ in self._selector.select(timeout=max(espera, 0.01)):
+                if key.fileobj is self._wakeup_r:
+                    self._register_parked()
+                    continue
+
+                # Chegou a próxima requisição (ou o cliente fechou): volta para a fila.
+                request = key.fileobj
+                client_address, _ = self._unpark(request)
+                self.process_request(request, client_address)
+
+        for request in list(self._idle):
+            self._unpark(request)
+            self.shutdown_request(request)
+
+        self._selector.close()
+        self._wakeup_r.close()
+        self._wakeup_w.close()
+
+    def _register_parked(self):
+        try:
+            while self._wakeup_r.recv(4096):
+                pass
+        except (BlockingIOError, InterruptedError):
+            pass
+
+        with self._parking_lock:
+            novas, self._parking = self._parking, []
+
+        agora = time.monotonic()
+        for request, client_address in novas:
+            try:
+                self._selector.register(request, selectors.EVENT_READ)
+            except (ValueError, OSError):
+                self.shutdown_request(request)  # Fechada nesse meio tempo.
+                continue
+            self._idle[request] = (client_address, agora)
+
+    def _unpark(self, request):
+        self._selector.unregister(request)
+        return self._idle.pop(request)
+
+    def _reject(self, request, mensagem):
+        try:
+            # A primeira linha diz se a chamada era XML-RPC ou JSON-RPC. A conexão
+            # costuma ser aceita antes de ela chegar, então espera um pouco por ela.
+            primeira_linha = self._read_request_line(request)
+
+            # Descarta o resto que já chegou para o close não virar um RST no cliente.
+            request.setblocking(False)
+            try:
+                while request.recv(65536):
+                    pass
+            except (BlockingIOError, InterruptedError):
+                pass
+
+            if primeira_linha.startswith(b"POST /jsonrpc"):
+                content_type = "application/json"
+                body = jsonrpc.dumps(jsonrpc.error(None, 3, mensagem))
+            else:
+                content_type = "text/xml"
+                body = xmlrpc.client.dumps(
+                    xmlrpc.client.Fault(3, mensagem),
+                    methodresponse=True,
+                    allow_none=True
+                ).encode()
+
+            header = (
+                "HTTP/1.0 200 OK\r\n"
+                f"Content-Type: {content_type}\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                "Connection: close\r\n\r\n"
+            ).encode()
+
+            request.setblocking(True)
+            request.settimeout(1)
+            request.sendall(header + body)
+        except OSError:
+            pass
+        finally:
+            self.shutdown_request(request)
+
+    def _read_request_line(self, request):
+        recebido = b""
+        request.settimeout(Config.RPC_REJECT_READ_TIMEOUT)
+        try:
+            while b"\n" not in recebido and len(recebido) < 8192:
+                chunk = request.recv(8192 - len(recebido))
+                if not chunk:
+                    break
+                recebido += chunk
+        except TimeoutError:
+            pass  # Cliente lento: responde como XML-RPC.
+
+        return recebido
+
+    def metrics(self):
+        with self._stats_lock:
+            rejected, expired = self.rejected, self.expired
+
+        return {
+            "workers": self.workers,
+            "queue_size": self.requests.maxsize,
+            "queued": self.requests.qsize(),
+            "rejected": rejected,
+            "expired": expired,
+            "idle_connections": len(self._idle),
+            "queue_wait": self.queue_wait.snapshot(),
+            "service_time": self.service_time.snapshot()
+        }
+
+    def server_close(self):
+        super().server_close()
+
+        with self._parking_lock:
+            self._closing = True
+            parking, self._parking = self._parking, []
+        for request, _ in parking:
+            self.shutdown_request(request)
+
+        self._wakeup_w.send(b"\0")
+        self._idle_thread.join(timeout=1)
+
+        for _ in self._threads:
+            self.requests.put(None)
+
+        for thread in self._threads:
+            thread.join(timeout=self.request_timeout or None)
@@ -0,0 +1,184 @@
+import glob
+import json
+import multiprocessing
+import os
+import signal
+import socket
+import threading
+import time
+
+from src.config import Config
+
+# Modo multiprocesso (RPC_PROCESSES > 1): o processo mestre só supervisiona. Cada
+# worker é um processo novo (spawn, não fork: canais gRPC e conexões não sobrevivem
+# a um fork) que abre seu próprio pool do banco, canal gRPC e conexões AMQP, e faz
+# bind na mesma porta com SO_REUSEPORT; o kernel distribui as conexões entre eles.
+#
+# Sinais no mestre: SIGTERM/SIGINT encerram (workers drenam as requisições em
+# andamento), SIGHUP recarrega (sobe uma nova geração e só então aposenta a antiga).
+# Worker que morre sozinho é reiniciado.
+
+def enable_reuse_port(server):
+    # Para os servidores de socketserver criados com bind_and_activate=False.
+    server.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    server.server_bind()
+    server.server_activate()
+
+class _Worker:
+    def __init__(self, context, worker_id, target):
+        self.worker_id = worker_id
+        self.ready = context.Event()
+        self.process = context.Process(
+            target=target,
+            args=(worker_id, self.ready),
+            name=f"agendamento-worker-{worker_id}"
+        )
+        self.started_at = time.monotonic()
+        self.process.start()
+
+    def alive(self):
+        return self.process.is_alive()
+
+    def stop(self):
+        if self.process.is_alive():
+            os.kill(self.process.pid, signal.SIGTERM)
+
+class PreforkLauncher:
+    def __init__(self, processes, target):
+        self.processes = processes
+        self.target = target
+        self.context = multiprocessing.get_context("spawn")
+
+        self.workers = {}
+        self.restarts = 0
+
+        self._stopping = False
+        self._reload = False
+        self._wakeup = threading.Event()
+
+    def run(self):
+        signal.signal(signal.SIGTERM, self._on_stop)
+        signal.signal(signal.SIGINT, self._on_stop)
+        signal.signal(signal.SIGHUP, self._on_reload)
+
+        limpar_metricas()
+        for worker_id in range(self.processes):
+            self.workers[worker_id] = _Worker(self.context, worker_id, self.target)
+
+        print(f"Mestre {os.getpid()}: {self.processes} workers na porta {Config.RPC_PORT}.", flush=True)
+
+        while not self._stopping:
+            self._wakeup.wait(1)
+            self._wakeup.clear()
+
+            if self._reload:
+                self._reload = False
+                self._reload_workers()
+
+            self._restart_crashed()
+
+        self._stop_workers(list(self.workers.values()))
+
+    def _on_stop(self, signum, frame):
+        self._stopping = True
+        self._wakeup.set()
+
+    def _on_reload(self, signum, frame):
+        self._reload = True
+        self._wakeup.set()
+
+    def _restart_crashed(self):
+        for worker_id, worker in list(self.workers.items()):
+            if worker.alive() or self._stopping:
+                continue
+
+            print(f"Worker {worker_id} (pid {worker.process.pid}) saiu com código {worker.process.exitcode}; reiniciando.", flush=True)
+
+            # Worker que cai logo ao subir (porta ocupada, banco fora) não pode virar um loop quente.
+            if time.monotonic() - worker.started_at < Config.RPC_WORKER_MIN_UPTIME:
+                time.sleep(Config.RPC_WORKER_MIN_UPTIME)
+
+            self.restarts += 1
+            self.workers[worker_id] = _Worker(self.context, worker_id, self.target)
+            remover_metricas(worker.process.pid)
+
+    def _reload_workers(self):
+        antigos = list(self.workers.values())
+        novos = {worker_id: _Worker(self.context, worker_id, self.target) for worker_id in self.workers}
+
+        # A geração antiga continua atendendo até a nova estar escutando na porta.
+        prazo = time.monotonic() + Config.RPC_WORKER_START_TIMEOUT
+        while time.monotonic() < prazo and not self._stopping:
+            if all(worker.ready.is_set() for worker in novos.values()):
+                break
+            if not all(worker.alive() for worker in novos.values()):
+                break
+            time.sleep(0.1)
+
+        if not all(worker.ready.is_set() for worker in novos.values()):
+            print("Reload abortado: nova geração não ficou pronta a tempo.", flush=True)
+            self._stop_workers(list(novos.values()))
+            return
+
+        self.workers = novos
+        self._stop_workers(antigos)
+        print(f"Reload concluído: {len(novos)} workers novos.", flush=True)
+
+    def _stop_workers(self, workers):
+        for worker in workers:
+            worker.stop()
+
+        prazo = time.monotonic() + Config.RPC_SHUTDOWN_TIMEOUT
+        for worker in workers:
+            worker.process.join(max(0, prazo - time.monotonic()))
+            if worker.process.is_alive():
+                worker.process.kill()
+                worker.process.join()
+            remover_metricas(worker.process.pid)
+
+# Métricas por worker: cada worker grava periodicamente um snapshot em
+# RPC_METRICS_DIR e o metricas de qualquer worker devolve todos.
+def _arquivo_metricas(pid):
+    return os.path.join(Config.RPC_METRICS_DIR, f"worker-{pid}.json")
+
+def publicar_metricas(worker_id, coletar):
+    os.makedirs(Config.RPC_METRICS_DIR, exist_ok=True)
+
+    def loop():
+        while True:
+            gravar_metricas(worker_id, coletar())
+            time.sleep(Config.RPC_METRICS_INTERVAL)
+
+    threading.Thread(target=loop, name="metrics-publisher", daemon=True).start()
+
+def gravar_metricas(worker_id, metricas):
+    destino = _arquivo_metricas(os.getpid())
+    temporario = destino + ".tmp"
+
+    with open(temporario, "w") as f:
+        json.dump({"worker_id": worker_id, "pid": os.getpid(), "atualizado_em": time.time(), "metricas": metricas}, f, default=str)
+    os.replace(temporario, destino)
+
+def ler_metricas():
+    workers = []
+    for caminho in glob.glob(os.path.join(Config.RPC_METRICS_DIR, "worker-*.json")):
+        try:
+            with open(caminho) as f:
+                workers.append(json.load(f))
+        except (OSError, ValueError):
+            pass  # Worker reescrevendo ou saindo.
+
+    return sorted(workers, key=lambda w: w["worker_id"])
+
+def remover_metricas(pid):
+    try:
+        os.remove(_arquivo_metricas(pid))
+    except OSError:
+        pass
+
+def limpar_metricas():
+    for caminho in glob.glob(os.path.join(Config.RPC_METRICS_DIR, "worker-*.json")):
+        try:
+            os.remove(caminho)
+        except OSError:
+            pass
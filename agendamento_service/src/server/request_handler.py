@@ -0,0 +1,145 @@
+import json
+import time
+import xmlrpc.client
+from urllib.parse import parse_qs, urlsplit
+from xmlrpc.client import gzip_encode
+from xmlrpc.server import SimpleXMLRPCRequestHandler
+
+from src.config import Config
+from src.server import jsonrpc
+
+class AgendamentoRequestHandler(SimpleXMLRPCRequestHandler):
+    # POST continua sendo XML-RPC (ou JSON-RPC em /jsonrpc); GET atende exportações em NDJSON.
+    export_paths = ("/export/agendamentos",)
+    jsonrpc_paths = ("/jsonrpc",)
+
+    # HTTP/1.1 mantém a conexão aberta entre chamadas (ServerProxy e clientes JSON-RPC).
+    protocol_version = "HTTP/1.1" if Config.RPC_KEEPALIVE else "HTTP/1.0"
+    encode_threshold = Config.RPC_GZIP_MIN_SIZE
+
+    def handle(self):
+        self.keep_alive = False
+        self.handle_one_request()
+
+        while not self.close_connection:
+            # No pool, a conexão ociosa volta para o servidor e libera o worker; só
+            # segue aqui se a próxima requisição já estiver no buffer.
+            if hasattr(self.server, "park") and not self._request_buffered():
+                self.keep_alive = True
+                return
+
+            self.connection.settimeout(Config.RPC_KEEPALIVE_TIMEOUT)
+            self.handle_one_request()
+
+    def _request_buffered(self):
+        # peek sem bloquear: devolve o que já está no buffer do rfile ou no socket.
+        self.connection.setblocking(False)
+        try:
+            return bool(self.rfile.peek(1))
+        except (BlockingIOError, InterruptedError):
+            return False
+        except OSError:
+            self.close_connection = True
+            return False
+        finally:
+            self.connection.setblocking(True)
+
+    def do_POST(self):
+        # Tempo de serviço por requisição; com keep-alive a conexão atende várias.
+        inicio = time.monotonic()
+        try:
+            self._handle_post()
+        finally:
+            service_time = getattr(self.server, "service_time", None)
+            if service_time is not None:
+                service_time.observe(time.monotonic() - inicio)
+
+    def _handle_post(self):
+        if urlsplit(self.path).path not in self.jsonrpc_paths:
+            super().do_POST()
+            return
+
+        try:
+            data = self.rfile.read(int(self.headers["content-length"]))
+        except (TypeError, ValueError):
+            self.send_error(411)
+            return
+
+        data = self.decode_request_content(data)
+        if data is None:
+            return  # Resposta de erro já enviada.
+
+        response = jsonrpc.handle(self.server, data)
+
+        if response is None:
+            self.send_response(204)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        if self.encode_threshold is not None and len(response) > self.encode_threshold and self.accept_encodings().get("gzip", 0):
+            response = gzip_encode(response)
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(response)))
+        self.end_headers()
+        self.wfile.write(response)
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if url.path not in self.export_paths:
+            self.report_404()
+            return
+
+        params = parse_qs(url.query)
+        token = self.headers.get("X-Token") or params.get("token", [None])[0]
+        status = params.get("status", [None])[0]
+
+        try:
+            linhas = self.server.export_service.exportar_agendamentos(token, status)
+        except xmlrpc.client.Fault as e:
+            self._send_error_json(400 if e.faultCode == 1 else 500, e.faultString)
+            return
+
+        try:
+            self.protocol_version = "HTTP/1.1"
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.send_header("Connection", "close")
+            self.end_headers()
+            self.close_connection = True
+
+            buffer = []
+            tamanho = 0
+            for linha in linhas:
+                buffer.append(linha)
+                tamanho += len(linha)
+
+                if tamanho >= Config.EXPORT_CHUNK_SIZE:
+                    self._write_chunk(b"".join(buffer))
+                    buffer = []
+                    tamanho = 0
+
+            if buffer:
+                self._write_chunk(b"".join(buffer))
+            self.wfile.write(b"0\r\n\r\n")
+
+        except (ConnectionError, OSError):
+            pass  # Cliente desconectou no meio da exportação.
+
+        finally:
+            linhas.close()
+
+    def _write_chunk(self, data):
+        self.wfile.write(f"{len(data):X}\r\n".encode() + data + b"\r\n")
+
+    def _send_error_json(self, code, mensagem):
+        body = json.dumps({"erro": mensagem}).encode()
+
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
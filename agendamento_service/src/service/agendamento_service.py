@@ -1,94 +1,197 @@
+import base64
+import json
 import xmlrpc.client
-from datetime import datetime, time
+from datetime import date, datetime
 
+from src.config import Config
 from src.integration.users_client import UsersClient
 from src.integration.validation_client import ValidationClient
 
-from src.rabbitmq.notification import Notification
-from src.rabbitmq.publisher import NotificationPublisher
+from src.rabbitmq.notification import MENSAGEM, Notification
+from src.rabbitmq.outbox_relay import OutboxRelay
+from src.rabbitmq.publisher import PublisherPool
 
 from src.repository.agendamento_repository import AgendamentoRepository, AgendamentoError
+from src.repository.notificacao_repository import NotificacaoRepository
+from src.service import regras_agendamento as regras
 from src.utils.validators import validar_enum
 
 class AgendamentoService:
     def __init__(self):
         self.agendamento_repository = AgendamentoRepository()
+        self.notificacao_repository = NotificacaoRepository()
         self.users_client = UsersClient()
         self.validation_client = ValidationClient()
+        self.publisher_pool = PublisherPool()
+        self.outbox_relay = OutboxRelay(self.publisher_pool) if Config.NOTIFICATION_DELIVERY == "outbox" else None
 
-        self.ESPECIALIDADES = {'CARDIOLOGIA', 'PEDIATRIA', 'ORTOPEDIA', 'DERMATOLOGIA'}
-        self.PAGAMENTOS = {'CONVENIO', 'PARTICULAR'}
-        self.STATUS = {'PENDENTE', 'CONFIRMADO', 'REJEITADO', 'CONCLUIDO', 'CANCELADO'}
+        self.ESPECIALIDADES = regras.ESPECIALIDADES
+        self.PAGAMENTOS = regras.PAGAMENTOS
+        self.STATUS = regras.STATUS
+        self.HORARIOS = regras.HORARIOS
 
     def agendar_consulta(self, token, paciente_id, medico_id, data, horario, especialidade, tipo_pagamento, dados_pagamento):
-        if not all([token, paciente_id, medico_id, data, horario, especialidade, tipo_pagamento, dados_pagamento]):
-             raise xmlrpc.client.Fault(1, "Todos os campos são obrigatórios.")
+        regras.validar_campos(token, paciente_id, medico_id, data, horario, especialidade, tipo_pagamento, dados_pagamento)
 
         try:
-            if not (6 <= horario <= 16):
-                raise xmlrpc.client.Fault(1, "Horário inválido. A clínica funciona das 06:00 às 17:00.")
-            
-            data_hora_agendada = self._data_hora_agendamento(data, horario)
+            regras.validar_agendamento(data, horario, especialidade, tipo_pagamento)
 
-            if datetime.now() > data_hora_agendada:
-                raise xmlrpc.client.Fault(1, "Não é possível agendar consultas para datas passadas.")
-            
-            validar_enum(especialidade, self.ESPECIALIDADES, "Especialidade")
-            validar_enum(tipo_pagamento, self.PAGAMENTOS, "Tipo de Pagamento")
+            # A validação do pagamento corre junto com as consultas de role; o INSERT
+            # só acontece depois, já com o status final.
+            validacao = self.validation_client.validate_payment_async(
+                tipo_pagamento,
+                dados_pagamento
+            )
 
-            # Consulta role do requisitante (token == requisitante_id).
-            requester_role = self.users_client.get_user_role(token, token)
+            # Consulta as três roles em paralelo (token == requisitante_id), mas
+            # avalia os resultados na ordem original para manter as mesmas falhas.
+            lookups = self.users_client.get_user_roles([
+                (token, token),
+                (token, paciente_id),
+                (token, medico_id)
+            ])
+            regras.validar_permissao(token, paciente_id, medico_id, *lookups)
+
+            status_validacao = regras.validar_status(validacao.result())
+
+            # Um INSERT, uma transação: não sobra linha PENDENTE se algo falhar no meio.
+            notificacoes = []
+
+            def notificar(agendamento_id):
+                notificacoes.append(self._notificacao(paciente_id, agendamento_id, status_validacao, data, horario))
+                return notificacoes[-1]
+
+            agendamento_id = self.agendamento_repository.create(
+                paciente_id, medico_id, data, horario, especialidade, tipo_pagamento,
+                status=status_validacao,
+                notificar=notificar,
+                outbox=self.outbox_relay is not None
+            )
 
-            if requester_role == "PACIENTE":
-                if int(token) != int(paciente_id):
-                    raise xmlrpc.client.Fault(1, "Paciente só pode agendar consultas para si mesmo.")
-            
-            elif requester_role == "RECEPCIONISTA":
-                pass
-            
+            if self.outbox_relay is not None:
+                self.outbox_relay.wake()
             else:
-                raise xmlrpc.client.Fault(1, "Apenas Pacientes e Recepcionistas podem criar agendamentos.")
+                self.publisher_pool.publish(notificacoes[0])
 
-            paciente_role = self.users_client.get_user_role(token, paciente_id)
-            if paciente_role != "PACIENTE":
-                raise xmlrpc.client.Fault(1, f"O ID informado ({paciente_id}) não pertence a um Paciente.")
+            return regras.resposta_agendamento(agendamento_id, status_validacao)
 
-            medico_role = self.users_client.get_user_role(token, medico_id)
-            if medico_role != "MEDICO":
-                raise xmlrpc.client.Fault(1, f"O ID informado ({medico_id}) não pertence a um Médico.")
+        except Exception as e:
+            raise regras.erro_para_fault(e)
+            
+    def agendar_consultas_lote(self, token, itens):
+        # itens: lista de dicts com os mesmos campos de agendar_consulta. Devolve um
+        # resultado por item, na mesma ordem; a falha de um item não afeta os demais.
+        if not token:
+            raise xmlrpc.client.Fault(1, "Token é obrigatório.")
 
+        if not isinstance(itens, list) or not itens:
+            raise xmlrpc.client.Fault(1, "Informe ao menos um agendamento.")
 
-            agendamento_id = self.agendamento_repository.create(paciente_id, medico_id, data, horario, especialidade, tipo_pagamento)
+        if len(itens) > Config.BOOKING_BATCH_MAX:
+            raise xmlrpc.client.Fault(1, f"Lote excede o limite de {Config.BOOKING_BATCH_MAX} agendamentos.")
 
-            status_validacao = self.validation_client.validate_payment(
-                tipo_pagamento,
-                dados_pagamento
+        try:
+            resultados = [None] * len(itens)
+            validos = {}
+
+            for indice, item in enumerate(itens):
+                try:
+                    validos[indice] = self._validar_item_lote(item)
+                except Exception as e:
+                    resultados[indice] = {"erro": self._mensagem_erro(e)}
+
+            # Uma consulta de role por usuário distinto do lote, todas em paralelo.
+            usuarios = sorted({item[campo] for item in validos.values() for campo in ("paciente_id", "medico_id")})
+            lookups = self.users_client.get_user_roles([(token, token)] + [(token, usuario) for usuario in usuarios])
+
+            requester_role = lookups[0].result()
+            if requester_role not in {"PACIENTE", "RECEPCIONISTA"}:
+                raise xmlrpc.client.Fault(1, "Apenas Pacientes e Recepcionistas podem criar agendamentos.")
+
+            roles = {}
+            for usuario, lookup in zip(usuarios, lookups[1:]):
+                try:
+                    roles[usuario] = lookup.result()
+                except Exception as e:
+                    roles[usuario] = e
+
+            for indice, item in list(validos.items()):
+                erro = None
+                paciente_role = roles[item["paciente_id"]]
+                medico_role = roles[item["medico_id"]]
+
+                if requester_role == "PACIENTE" and int(token) != item["paciente_id"]:
+                    erro = "Paciente só pode agendar consultas para si mesmo."
+                elif isinstance(paciente_role, Exception):
+                    erro = self._mensagem_erro(paciente_role)
+                elif paciente_role != "PACIENTE":
+                    erro = f"O ID informado ({item['paciente_id']}) não pertence a um Paciente."
+                elif isinstance(medico_role, Exception):
+                    erro = self._mensagem_erro(medico_role)
+                elif medico_role != "MEDICO":
+                    erro = f"O ID informado ({item['medico_id']}) não pertence a um Médico."
+
+                if erro:
+                    resultados[indice] = {"erro": erro}
+                    del validos[indice]
+
+            # Pagamentos validados em uma única troca com o serviço de validação.
+            indices = list(validos)
+            validacoes = self.validation_client.validate_many(
+                [(validos[i]["tipo_pagamento"], validos[i]["dados_pagamento"]) for i in indices]
             )
 
-            validar_enum(status_validacao, self.STATUS, "Status")
+            agendamentos = []
+            for indice, validacao in zip(indices, validacoes):
+                status = validacao.get("status")
+                if status not in self.STATUS:
+                    resultados[indice] = {"erro": validacao.get("erro") or "Erro interno na validação do pagamento."}
+                    continue
+
+                item = validos[indice]
+                item["status"] = status
+                agendamentos.append((indice, item))
+
+            notificacoes = []
+
+            def notificar(linha, agendamento_id):
+                notificacoes.append(self._notificacao(linha[0], agendamento_id, linha[6], linha[2], linha[3]))
+                return notificacoes[-1]
+
+            criados = self.agendamento_repository.create_many(
+                [
+                    (item["paciente_id"], item["medico_id"], item["data"], item["horario"],
+                     item["especialidade"], item["tipo_pagamento"], item["status"])
+                    for _, item in agendamentos
+                ],
+                notificar=notificar,
+                outbox=self.outbox_relay is not None
+            )
 
-            self.atualizar_status_e_notificar(paciente_id, agendamento_id, status_validacao, data, horario)
-            
-            return {
-                "id": agendamento_id,
-                "status": status_validacao,
-                "mensagem": (
-                    "Agendamento confirmado."
-                    if status_validacao == "CONFIRMADO"
-                    else "Agendamento rejeitado."
-                )
-            }
+            for (indice, item), (agendamento_id, erro) in zip(agendamentos, criados):
+                if erro:
+                    resultados[indice] = {"erro": erro}
+                    continue
 
-        except AgendamentoError as e:
-            raise xmlrpc.client.Fault(1, str(e))
-            
-        except Exception as e:
-            msg = str(e)
-            if "interno" in msg.lower():
-                 raise xmlrpc.client.Fault(2, msg)
+                resultados[indice] = regras.resposta_agendamento(agendamento_id, item["status"])
+
+            resposta = {"resultados": resultados}
+
+            if self.outbox_relay is not None:
+                if notificacoes:
+                    self.outbox_relay.wake()
             else:
-                 raise xmlrpc.client.Fault(1, msg)
-            
+                # Os agendamentos já foram gravados: uma falha aqui não invalida os resultados.
+                try:
+                    self.publisher_pool.publish_many(notificacoes)
+                except Exception as e:
+                    resposta["aviso"] = str(e)
+
+            return resposta
+
+        except Exception as e:
+            raise regras.erro_para_fault(e)
+
     def consultar_agendamentos(self, token, status=None):
         if not token:
             raise xmlrpc.client.Fault(1, "Token é obrigatório.")
@@ -120,6 +223,191 @@ class AgendamentoService:
             else:
                 raise xmlrpc.client.Fault(1, msg)
     
+    def consultar_agendamentos_pagina(self, token, status=None, cursor=None, tamanho_pagina=None, filtros=None):
+        # filtros (opcional): {"data_inicio", "data_fim", "especialidade", "medico_id"}.
+        if not token:
+            raise xmlrpc.client.Fault(1, "Token é obrigatório.")
+
+        try:
+            filtros = filtros or {}
+
+            if status:
+                validar_enum(status, self.STATUS, "Status")
+
+            especialidade = filtros.get("especialidade")
+            if especialidade:
+                validar_enum(especialidade, self.ESPECIALIDADES, "Especialidade")
+
+            data_inicio = self._data_filtro(filtros.get("data_inicio"))
+            data_fim = self._data_filtro(filtros.get("data_fim"))
+            medico_id = int(filtros["medico_id"]) if filtros.get("medico_id") else None
+
+            tamanho_pagina = int(tamanho_pagina or Config.PAGE_SIZE_DEFAULT)
+            if not (1 <= tamanho_pagina <= Config.PAGE_SIZE_MAX):
+                raise xmlrpc.client.Fault(1, f"Tamanho de página deve estar entre 1 e {Config.PAGE_SIZE_MAX}.")
+
+            after = self._decodificar_cursor(cursor) if cursor else None
+
+            requester_role = self.users_client.get_user_role(token, token)
+
+            escopo = {}
+            if requester_role == "PACIENTE":
+                escopo = {"paciente_id": int(token), "medico_id": medico_id}
+            elif requester_role == "MEDICO":
+                escopo = {"medico_id": int(token)}
+            elif requester_role in {"RECEPCIONISTA", "ADMINISTRADOR"}:
+                escopo = {"medico_id": medico_id}
+            else:
+                raise xmlrpc.client.Fault(1, "permissão negada para consultar agendamentos.")
+
+            itens, tem_mais = self.agendamento_repository.list_page(
+                status=status or None,
+                data_inicio=data_inicio,
+                data_fim=data_fim,
+                especialidade=especialidade or None,
+                after=after,
+                limit=tamanho_pagina,
+                **escopo
+            )
+
+            proximo_cursor = None
+            if tem_mais:
+                ultimo = itens[-1]
+                proximo_cursor = self._codificar_cursor(ultimo["data"], ultimo["horario"], ultimo["id"])
+
+            return {
+                "itens": itens,
+                "proximo_cursor": proximo_cursor
+            }
+
+        except AgendamentoError as e:
+            raise xmlrpc.client.Fault(1, str(e))
+
+        except Exception as e:
+            msg = str(e)
+            if "interno" in msg.lower():
+                raise xmlrpc.client.Fault(2, msg)
+            else:
+                raise xmlrpc.client.Fault(1, msg)
+
+    def horarios_disponiveis(self, token, medico_id=None, especialidade=None, data_inicio=None, data_fim=None):
+        # Devolve [{"medico_id", "data", "horarios"}] só com os dias que têm horário livre.
+        if not token:
+            raise xmlrpc.client.Fault(1, "Token é obrigatório.")
+
+        # Médicos não têm especialidade cadastrada, então não há como filtrar por ela;
+        # o parâmetro fica na assinatura só para não deslocar os seguintes.
+        if especialidade:
+            raise xmlrpc.client.Fault(1, "Filtro por especialidade indisponível: médicos não têm especialidade cadastrada.")
+
+        try:
+            hoje = date.today().isoformat()
+            inicio = self._data_filtro(data_inicio) or hoje
+            fim = self._data_filtro(data_fim) or inicio
+
+            dias = (date.fromisoformat(fim) - date.fromisoformat(inicio)).days
+            if dias < 0:
+                raise xmlrpc.client.Fault(1, "Data final anterior à data inicial.")
+            if dias >= Config.AVAILABILITY_MAX_DAYS:
+                raise xmlrpc.client.Fault(1, f"Intervalo máximo de {Config.AVAILABILITY_MAX_DAYS} dias.")
+
+            requester_role = self.users_client.get_user_role(token, token)
+            if requester_role not in {"PACIENTE", "MEDICO", "RECEPCIONISTA", "ADMINISTRADOR"}:
+                raise xmlrpc.client.Fault(1, "permissão negada para consultar horários.")
+
+            # Sem médico, devolve os horários livres de todos os médicos, um item por médico e dia.
+            ocupacao = self.agendamento_repository.occupancy(inicio, fim, medico_id=int(medico_id) if medico_id else None)
+
+            if medico_id and not ocupacao:
+                raise xmlrpc.client.Fault(1, f"O ID informado ({medico_id}) não pertence a um Médico.")
+
+            # Horários de hoje que já passaram não podem ser agendados.
+            hora_atual = datetime.now().hour
+
+            disponiveis = []
+            for medico, dia, ocupados in ocupacao:
+                if dia < hoje:
+                    continue
+
+                horarios = [
+                    horario for horario in self.HORARIOS
+                    if not (ocupados >> (horario - 6)) & 1
+                    and (dia > hoje or horario > hora_atual)
+                ]
+
+                if horarios:
+                    disponiveis.append({"medico_id": medico, "data": dia, "horarios": horarios})
+
+            return disponiveis
+
+        except xmlrpc.client.Fault:
+            raise
+
+        except AgendamentoError as e:
+            raise xmlrpc.client.Fault(1, str(e))
+
+        except Exception as e:
+            msg = str(e)
+            if "interno" in msg.lower():
+                raise xmlrpc.client.Fault(2, msg)
+            else:
+                raise xmlrpc.client.Fault(1, msg)
+
+    def consultar_notificacoes(self, token, cursor=None, tamanho_pagina=None):
+        # Caixa de entrada do próprio usuário, mais recentes primeiro, com o total de não lidas.
+        if not token:
+            raise xmlrpc.client.Fault(1, "Token é obrigatório.")
+
+        try:
+            tamanho_pagina = int(tamanho_pagina or Config.PAGE_SIZE_DEFAULT)
+            if not (1 <= tamanho_pagina <= Config.PAGE_SIZE_MAX):
+                raise xmlrpc.client.Fault(1, f"Tamanho de página deve estar entre 1 e {Config.PAGE_SIZE_MAX}.")
+
+            before = self._decodificar_cursor_notificacao(cursor) if cursor else None
+
+            # Só confirma que o token pertence a um usuário válido.
+            self.users_client.get_user_role(token, token)
+
+            itens, tem_mais = self.notificacao_repository.list_page(int(token), before=before, limit=tamanho_pagina)
+
+            proximo_cursor = None
+            if tem_mais:
+                ultimo = itens[-1]
+                proximo_cursor = self._codificar_cursor_notificacao(ultimo["timestamp"], ultimo["id"])
+
+            return {
+                "itens": itens,
+                "proximo_cursor": proximo_cursor,
+                "nao_lidas": self.notificacao_repository.unread_count(int(token))
+            }
+
+        except AgendamentoError as e:
+            raise xmlrpc.client.Fault(1, str(e))
+
+        except Exception as e:
+            msg = str(e)
+            if "interno" in msg.lower():
+                raise xmlrpc.client.Fault(2, msg)
+            else:
+                raise xmlrpc.client.Fault(1, msg)
+
+    def marcar_notificacoes_lidas(self, token):
+        if not token:
+            raise xmlrpc.client.Fault(1, "Token é obrigatório.")
+
+        try:
+            self.users_client.get_user_role(token, token)
+            self.notificacao_repository.mark_read(int(token))
+
+            return {"nao_lidas": 0}
+
+        except Exception as e:
+            msg = str(e)
+            if "interno" in msg.lower():
+                raise xmlrpc.client.Fault(2, msg)
+            else:
+                raise xmlrpc.client.Fault(1, msg)
+
     def cancelar_agendamento(self, token, agendamento_id):
         if not token:
             raise xmlrpc.client.Fault(1, "Token é obrigatório.")
@@ -189,7 +477,7 @@ class AgendamentoService:
                 raise xmlrpc.client.Fault(1, "Médico só pode concluir agendamentos sob sua responsabilidade.")
 
             # Evita médico concluir uma consulta que ainda não aconteceu.
-            data_hora_agendada = self._data_hora_agendamento(agendamento["data"], agendamento["horario"])
+            data_hora_agendada = regras.data_hora_agendamento(agendamento["data"], agendamento["horario"])
 
             if datetime.now() < data_hora_agendada:
                 raise xmlrpc.client.Fault(1, "Não é possível concluir um agendamento antes do horário marcado.")
@@ -213,24 +501,81 @@ class AgendamentoService:
                 raise xmlrpc.client.Fault(1, msg)
             
     # Funções helper.
-    def _data_hora_agendamento(self, data, horario):
-        return datetime.combine(
-            datetime.fromisoformat(data).date(),
-            time(hour=horario)
+    def _data_filtro(self, valor):
+        if not valor:
+            return None
+
+        try:
+            return datetime.fromisoformat(valor).date().isoformat()
+        except ValueError:
+            raise xmlrpc.client.Fault(1, "Data inválida. Use o formato YYYY-MM-DD.")
+
+    def _validar_item_lote(self, item):
+        campos = ("paciente_id", "medico_id", "data", "horario", "especialidade", "tipo_pagamento", "dados_pagamento")
+        if not isinstance(item, dict) or not all(item.get(campo) for campo in campos):
+            raise xmlrpc.client.Fault(1, "Todos os campos são obrigatórios.")
+
+        horario = int(item["horario"])
+        data = self._data_filtro(item["data"])
+        regras.validar_agendamento(data, horario, item["especialidade"], item["tipo_pagamento"])
+
+        return {
+            "paciente_id": int(item["paciente_id"]),
+            "medico_id": int(item["medico_id"]),
+            "data": data,
+            "horario": horario,
+            "especialidade": item["especialidade"],
+            "tipo_pagamento": item["tipo_pagamento"],
+            "dados_pagamento": item["dados_pagamento"]
+        }
+
+    def _mensagem_erro(self, e):
+        return e.faultString if isinstance(e, xmlrpc.client.Fault) else str(e)
+
+    def _codificar_cursor(self, data, horario, agendamento_id):
+        return base64.urlsafe_b64encode(json.dumps([data, horario, agendamento_id]).encode()).decode()
+
+    def _decodificar_cursor(self, cursor):
+        try:
+            data, horario, agendamento_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            return (datetime.fromisoformat(data).date().isoformat(), int(horario), int(agendamento_id))
+        except Exception:
+            raise xmlrpc.client.Fault(1, "Cursor inválido.")
+
+    def _codificar_cursor_notificacao(self, timestamp, notificacao_id):
+        return base64.urlsafe_b64encode(json.dumps([timestamp, notificacao_id]).encode()).decode()
+
+    def _decodificar_cursor_notificacao(self, cursor):
+        try:
+            timestamp, notificacao_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            return (datetime.fromisoformat(timestamp).isoformat(), int(notificacao_id))
+        except Exception:
+            raise xmlrpc.client.Fault(1, "Cursor inválido.")
+
+    def _notificacao(self, paciente_id, agendamento_id, novo_status, data, horario):
+        return Notification(
+            user_id=paciente_id,
+            agendamento_id=agendamento_id,
+            novo_status=novo_status,
+            mensagem=MENSAGEM.format(data=data, horario=horario, novo_status=novo_status),
+            data=str(data),
+            horario=int(horario)
         )
-    
+
     def atualizar_status_e_notificar(self, paciente_id, agendamento_id, novo_status, data, horario):
-        self.agendamento_repository.update_status(agendamento_id, novo_status)
+        notif_paciente = self._notificacao(paciente_id, agendamento_id, novo_status, data, horario)
+
+        # A caixa de entrada é gravada junto com o status. Com outbox a RPC termina
+        # no commit e o relay publica em segundo plano.
+        self.agendamento_repository.update_status(
+            agendamento_id,
+            novo_status,
+            notificacao=notif_paciente,
+            outbox=self.outbox_relay is not None
+        )
 
-        publisher = NotificationPublisher()
-        try:
-            notif_paciente = Notification(
-                user_id=paciente_id,
-                agendamento_id=agendamento_id,
-                novo_status=novo_status,
-                mensagem=f"Sua consulta para o dia {data} às {horario}h teve o status atualizado para {novo_status}"
-            )
-            publisher.publish(notif_paciente)
+        if self.outbox_relay is not None:
+            self.outbox_relay.wake()
+            return
 
-        finally:
-            publisher.close()
\ No newline at end of file
+        self.publisher_pool.publish(notif_paciente)
\ No newline at end of file
@@ -0,0 +1,78 @@
+import asyncio
+
+from src.integration.async_users_client import AsyncUsersClient
+from src.integration.async_validation_client import AsyncValidationClient
+from src.rabbitmq.async_publisher import AsyncNotificationPublisher
+from src.repository.async_agendamento_repository import AsyncAgendamentoRepository
+from src.service import regras_agendamento as regras
+
+class AsyncAgendamentoService:
+    # I/O nativo em asyncio para RPC_SERVER_MODE=asyncio; por enquanto só em
+    # agendar_consulta. Regras, ordem das verificações e mensagens vêm de
+    # regras_agendamento, as mesmas do AgendamentoService; daqui só sai o I/O. Do
+    # serviço síncrono vêm _notificacao e o relay do outbox, e os demais métodos
+    # continuam nele, rodando no pool de threads do AsyncRPCServer.
+    def __init__(self, service):
+        self.service = service
+
+        self.users_client = AsyncUsersClient(service.users_client.role_cache)
+        self.validation_client = AsyncValidationClient()
+        self.agendamento_repository = AsyncAgendamentoRepository()
+        self.publisher = AsyncNotificationPublisher() if service.outbox_relay is None else None
+
+    async def start(self):
+        await self.users_client.start()
+        await self.agendamento_repository.start()
+        if self.publisher is not None:
+            await self.publisher.start()
+
+    async def close(self):
+        if self.publisher is not None:
+            await self.publisher.close()
+        await self.agendamento_repository.close()
+        await self.validation_client.close()
+        await self.users_client.close()
+
+    async def agendar_consulta(self, token, paciente_id, medico_id, data, horario, especialidade, tipo_pagamento, dados_pagamento):
+        regras.validar_campos(token, paciente_id, medico_id, data, horario, especialidade, tipo_pagamento, dados_pagamento)
+
+        try:
+            regras.validar_agendamento(data, horario, especialidade, tipo_pagamento)
+
+            # Validação e consultas de role correm juntas no mesmo loop.
+            validacao = asyncio.ensure_future(
+                self.validation_client.validate_payment(tipo_pagamento, dados_pagamento)
+            )
+            validacao.add_done_callback(lambda t: t.cancelled() or t.exception())
+
+            lookups = await self.users_client.get_user_roles([
+                (token, token),
+                (token, paciente_id),
+                (token, medico_id)
+            ])
+            regras.validar_permissao(token, paciente_id, medico_id, *lookups)
+
+            status_validacao = regras.validar_status(await validacao)
+
+            notificacoes = []
+
+            def notificar(agendamento_id):
+                notificacoes.append(self.service._notificacao(paciente_id, agendamento_id, status_validacao, data, horario))
+                return notificacoes[-1]
+
+            agendamento_id = await self.agendamento_repository.create(
+                paciente_id, medico_id, data, horario, especialidade, tipo_pagamento,
+                status=status_validacao,
+                notificar=notificar,
+                outbox=self.publisher is None
+            )
+
+            if self.publisher is None:
+                self.service.outbox_relay.wake()
+            else:
+                await self.publisher.publish(notificacoes[0])
+
+            return regras.resposta_agendamento(agendamento_id, status_validacao)
+
+        except Exception as e:
+            raise regras.erro_para_fault(e)
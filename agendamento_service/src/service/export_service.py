@@ -0,0 +1,60 @@
+import json
+import xmlrpc.client
+
+from src.config import Config
+from src.repository.agendamento_repository import AgendamentoError
+from src.service.regras_agendamento import STATUS
+from src.utils.validators import validar_enum
+
+class ExportService:
+    # Fica fora do register_instance: devolve geradores, que o XML-RPC não serializa.
+    COLUNAS = ["id", "paciente_id", "medico_id", "data", "horario", "especialidade", "tipo_pagamento", "status"]
+    STATUS = STATUS
+
+    def __init__(self, agendamento_repository, users_client):
+        self.agendamento_repository = agendamento_repository
+        self.users_client = users_client
+
+    def exportar_agendamentos(self, token, status=None):
+        # As verificações rodam aqui, antes do primeiro byte; o gerador só é criado no fim.
+        if not token:
+            raise xmlrpc.client.Fault(1, "Token é obrigatório.")
+
+        try:
+            if status:
+                validar_enum(status, self.STATUS, "Status")
+
+            requester_role = self.users_client.get_user_role(token, token)
+
+            if requester_role == "PACIENTE":
+                escopo = {"paciente_id": int(token)}
+            elif requester_role == "MEDICO":
+                escopo = {"medico_id": int(token)}
+            elif requester_role in {"RECEPCIONISTA", "ADMINISTRADOR"}:
+                escopo = {}
+            else:
+                raise xmlrpc.client.Fault(1, "permissão negada para consultar agendamentos.")
+
+        except xmlrpc.client.Fault:
+            raise
+
+        except AgendamentoError as e:
+            raise xmlrpc.client.Fault(1, str(e))
+
+        except Exception as e:
+            msg = str(e)
+            if "interno" in msg.lower():
+                raise xmlrpc.client.Fault(2, msg)
+            else:
+                raise xmlrpc.client.Fault(1, msg)
+
+        return self._linhas_ndjson(status=status or None, **escopo)
+
+    def _linhas_ndjson(self, **filtros):
+        # Primeira linha traz as colunas; as seguintes são arrays, mais compactos que objetos.
+        yield (json.dumps({"colunas": self.COLUNAS}) + "\n").encode()
+
+        for row in self.agendamento_repository.stream(itersize=Config.EXPORT_ITERSIZE, **filtros):
+            linha = list(row)
+            linha[3] = str(linha[3])
+            yield (json.dumps(linha, separators=(",", ":")) + "\n").encode()
@@ -0,0 +1,74 @@
+import xmlrpc.client
+from datetime import datetime, time
+
+from src.repository.agendamento_repository import AgendamentoError
+from src.utils.validators import validar_enum
+
+# Regras de agendar_consulta sem I/O, usadas pelos dois engines (AgendamentoService
+# e AsyncAgendamentoService). Mudança de regra ou de mensagem é feita só aqui.
+ESPECIALIDADES = {'CARDIOLOGIA', 'PEDIATRIA', 'ORTOPEDIA', 'DERMATOLOGIA'}
+PAGAMENTOS = {'CONVENIO', 'PARTICULAR'}
+STATUS = {'PENDENTE', 'CONFIRMADO', 'REJEITADO', 'CONCLUIDO', 'CANCELADO'}
+HORARIOS = range(6, 17)
+
+def data_hora_agendamento(data, horario):
+    return datetime.combine(
+        datetime.fromisoformat(data).date(),
+        time(hour=horario)
+    )
+
+def validar_campos(*campos):
+    if not all(campos):
+        raise xmlrpc.client.Fault(1, "Todos os campos são obrigatórios.")
+
+def validar_agendamento(data, horario, especialidade, tipo_pagamento):
+    if not (6 <= horario <= 16):
+        raise xmlrpc.client.Fault(1, "Horário inválido. A clínica funciona das 06:00 às 17:00.")
+
+    if datetime.now() > data_hora_agendamento(data, horario):
+        raise xmlrpc.client.Fault(1, "Não é possível agendar consultas para datas passadas.")
+
+    validar_enum(especialidade, ESPECIALIDADES, "Especialidade")
+    validar_enum(tipo_pagamento, PAGAMENTOS, "Tipo de Pagamento")
+
+def validar_permissao(token, paciente_id, medico_id, requester_lookup, paciente_lookup, medico_lookup):
+    # Recebe os lookups (future/task com result()) e não as roles: cada erro de
+    # consulta aparece na mesma ordem em que a regra olha para ele.
+    requester_role = requester_lookup.result()
+
+    if requester_role == "PACIENTE":
+        if int(token) != int(paciente_id):
+            raise xmlrpc.client.Fault(1, "Paciente só pode agendar consultas para si mesmo.")
+
+    elif requester_role != "RECEPCIONISTA":
+        raise xmlrpc.client.Fault(1, "Apenas Pacientes e Recepcionistas podem criar agendamentos.")
+
+    if paciente_lookup.result() != "PACIENTE":
+        raise xmlrpc.client.Fault(1, f"O ID informado ({paciente_id}) não pertence a um Paciente.")
+
+    if medico_lookup.result() != "MEDICO":
+        raise xmlrpc.client.Fault(1, f"O ID informado ({medico_id}) não pertence a um Médico.")
+
+def validar_status(status):
+    validar_enum(status, STATUS, "Status")
+    return status
+
+def resposta_agendamento(agendamento_id, status):
+    return {
+        "id": agendamento_id,
+        "status": status,
+        "mensagem": (
+            "Agendamento confirmado."
+            if status == "CONFIRMADO"
+            else "Agendamento rejeitado."
+        )
+    }
+
+def erro_para_fault(e):
+    if isinstance(e, AgendamentoError):
+        return xmlrpc.client.Fault(1, str(e))
+
+    msg = str(e)
+    if "interno" in msg.lower():
+        return xmlrpc.client.Fault(2, msg)
+    return xmlrpc.client.Fault(1, msg)
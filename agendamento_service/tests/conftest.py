@@ -0,0 +1,9 @@
+import os
+import sys
+from pathlib import Path
+
+# Config lê estas variáveis na importação; os testes sobem os próprios serviços.
+for nome in ("RPC_PORT", "VALIDATION_PORT", "RABBITMQ_PORT"):
+    os.environ.setdefault(nome, "0")
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
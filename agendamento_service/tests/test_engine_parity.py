@@ -0,0 +1,249 @@
+# Paridade entre engines: agendar_consulta e os principais caminhos de erro devem
+# devolver a mesma resposta XML-RPC (ou o mesmo Fault) no engine com threads e no
+# asyncio. Precisa de um Postgres (DB_HOST, DB_PORT, DB_USER, DB_PASSWORD); os
+# serviços de usuários e de validação sobem aqui mesmo.
+import json
+import os
+import re
+import socket
+import threading
+import xmlrpc.client
+from concurrent import futures
+from pathlib import Path
+
+import pytest
+
+psycopg2 = pytest.importorskip("psycopg2")
+grpc = pytest.importorskip("grpc")
+pytest.importorskip("asyncpg")
+pytest.importorskip("aio_pika")
+pytest.importorskip("src.pb.users_pb2")
+
+from src import main
+from src.config import Config
+from src.integration.validation_protocol import encode_frame, read_frame
+from src.pb import users_pb2, users_pb2_grpc
+
+if not os.getenv("DB_HOST"):
+    pytest.skip("DB_HOST não definido.", allow_module_level=True)
+
+DATABASE_DIR = Path(__file__).resolve().parents[2] / "database"
+ENGINES = ("threaded", "asyncio")
+DATA = "2040-05-10"
+
+# O init.sql já cria o administrador com id 1.
+RECEPCIONISTA, PACIENTE, OUTRO_PACIENTE, MEDICO, OUTRO_MEDICO = 10, 11, 12, 13, 14
+USUARIOS = {
+    RECEPCIONISTA: "RECEPCIONISTA",
+    PACIENTE: "PACIENTE",
+    OUTRO_PACIENTE: "PACIENTE",
+    MEDICO: "MEDICO",
+    OUTRO_MEDICO: "MEDICO"
+}
+
+CARTAO_CONFIRMADO = "4111111111111112"
+CARTAO_REJEITADO = "4111111111111111"
+CARTAO_ERRO = "erro-interno"
+
+def consulta(token=RECEPCIONISTA, paciente_id=PACIENTE, medico_id=MEDICO, data=DATA, horario=9,
+             especialidade="CARDIOLOGIA", tipo_pagamento="PARTICULAR", dados_pagamento=CARTAO_CONFIRMADO):
+    # Mesmos tipos que o cliente envia: ids como texto, horário como inteiro.
+    return [str(token), str(paciente_id), str(medico_id), data, horario, especialidade, tipo_pagamento, dados_pagamento]
+
+# (nome, agendamentos feitos antes, chamada, resultado esperado: status ou código do Fault)
+CASOS = [
+    ("confirmado_recepcionista", [], consulta(), "CONFIRMADO"),
+    ("rejeitado_paciente", [], consulta(token=PACIENTE, dados_pagamento=CARTAO_REJEITADO), "REJEITADO"),
+    ("convenio", [], consulta(tipo_pagamento="CONVENIO", dados_pagamento="Unimed"), "CONFIRMADO"),
+    ("paciente_para_outro", [], consulta(token=PACIENTE, paciente_id=OUTRO_PACIENTE), 1),
+    ("medico_agendando", [], consulta(token=MEDICO), 1),
+    ("paciente_id_de_medico", [], consulta(paciente_id=OUTRO_MEDICO), 1),
+    ("medico_id_de_paciente", [], consulta(medico_id=OUTRO_PACIENTE), 1),
+    ("usuario_inexistente", [], consulta(medico_id=99), 1),
+    ("token_inexistente", [], consulta(token=99), 1),
+    ("campo_vazio", [], consulta(especialidade=""), 1),
+    ("horario_fora", [], consulta(horario=5), 1),
+    ("data_passada", [], consulta(data="2020-01-06"), 1),
+    ("especialidade_invalida", [], consulta(especialidade="NEUROLOGIA"), 1),
+    ("pagamento_invalido", [], consulta(tipo_pagamento="PIX"), 1),
+    ("medico_ocupado", [consulta(paciente_id=OUTRO_PACIENTE)], consulta(), 1),
+    ("paciente_ocupado", [consulta(medico_id=OUTRO_MEDICO)], consulta(), 1),
+    ("validacao_erro_interno", [], consulta(dados_pagamento=CARTAO_ERRO), 2)
+]
+
+class _Users(users_pb2_grpc.UserServiceServicer):
+    def GetUser(self, request, context):
+        tipo = USUARIOS.get(request.user_id)
+        if tipo is None:
+            context.abort(grpc.StatusCode.NOT_FOUND, "Usuário não encontrado.")
+        return users_pb2.UserResponse(user_id=request.user_id, user_type=users_pb2.UserType.Value(tipo))
+
+def _validar(payload):
+    dados = payload["dados_pagamento"]
+    if dados == CARTAO_ERRO:
+        return {"erro": "Erro interno na validação do pagamento."}
+    if payload["tipo_pagamento"] == "PARTICULAR":
+        confirmado = dados[-1].isdigit() and int(dados[-1]) % 2 == 0
+    else:
+        confirmado = len(dados) % 2 == 0
+    return {"status": "CONFIRMADO" if confirmado else "REJEITADO"}
+
+def _atender_validacao(conn):
+    with conn:
+        while True:
+            frame = read_frame(conn)
+            if frame is None:
+                return
+            request_id, body = frame
+            conn.sendall(encode_frame(request_id, _validar(json.loads(body.decode()))))
+
+def _validation_server():
+    listener = socket.create_server(("127.0.0.1", 0))
+
+    def aceitar():
+        while True:
+            try:
+                conn, _ = listener.accept()
+            except OSError:
+                return
+            threading.Thread(target=_atender_validacao, args=(conn,), daemon=True).start()
+
+    threading.Thread(target=aceitar, daemon=True).start()
+    return listener
+
+def _porta_livre():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def _statements(path):
+    sql = path.read_text()
+    return [stmt.strip() for stmt in re.split(r";\s*$", sql, flags=re.MULTILINE) if stmt.strip()]
+
+@pytest.fixture(scope="module")
+def banco():
+    nome = f"{os.environ.get('DB_NAME', 'clinica')}_parity"
+    params = dict(host=Config.DB_HOST, port=Config.DB_PORT, user=Config.DB_USER, password=Config.DB_PASSWORD)
+
+    admin = psycopg2.connect(dbname="postgres", **params)
+    admin.autocommit = True
+    admin.cursor().execute(f"DROP DATABASE IF EXISTS {nome}")
+    admin.cursor().execute(f"CREATE DATABASE {nome}")
+
+    conn = psycopg2.connect(dbname=nome, **params)
+    conn.autocommit = True
+    cursor = conn.cursor()
+    for arquivo in [DATABASE_DIR / "init.sql"] + sorted((DATABASE_DIR / "migrations").glob("*.sql")):
+        for stmt in _statements(arquivo):
+            cursor.execute(stmt)
+    for user_id, tipo in USUARIOS.items():
+        cursor.execute(
+            "INSERT INTO usuario (id, nome, email, senha, tipo) VALUES (%s, %s, %s, 'x', %s)",
+            (user_id, f"{tipo} {user_id}", f"u{user_id}@parity.test", tipo)
+        )
+
+    try:
+        yield nome, conn
+    finally:
+        conn.close()
+        admin.cursor().execute(f"DROP DATABASE IF EXISTS {nome} WITH (FORCE)")
+        admin.close()
+
+@pytest.fixture(scope="module")
+def ambiente(banco):
+    nome, conn = banco
+
+    users = grpc.server(futures.ThreadPoolExecutor(8))
+    users_pb2_grpc.add_UserServiceServicer_to_server(_Users(), users)
+    users_port = users.add_insecure_port("127.0.0.1:0")
+    users.start()
+
+    validacao = _validation_server()
+
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setenv("GRPC_ADDRESS", f"127.0.0.1:{users_port}")
+        mp.setattr(Config, "DB_NAME", nome)
+        mp.setattr(Config, "VALIDATION_HOST", "127.0.0.1")
+        mp.setattr(Config, "VALIDATION_PORT", validacao.getsockname()[1])
+        mp.setattr(Config, "VALIDATION_MODE", "framed")
+        mp.setattr(Config, "NOTIFICATION_DELIVERY", "outbox")
+        yield conn
+
+    validacao.close()
+    users.stop(None)
+
+@pytest.fixture(scope="module")
+def engines(ambiente):
+    urls = {}
+    servidores = []
+
+    with pytest.MonkeyPatch.context() as mp:
+        for engine in ENGINES:
+            mp.setattr(Config, "RPC_SERVER_MODE", engine)
+            server, service = main.create_server(("127.0.0.1", _porta_livre()))
+
+            pronto = threading.Event()
+            if engine == "asyncio":
+                server.on_listening.append(pronto.set)
+            else:
+                pronto.set()
+
+            thread = threading.Thread(target=server.serve_forever, daemon=True)
+            thread.start()
+            assert pronto.wait(10)
+
+            host, port = server.address if engine == "asyncio" else server.server_address
+            urls[engine] = f"http://{host}:{port}/"
+            servidores.append((server, thread))
+
+    yield urls
+
+    for server, thread in servidores:
+        server.shutdown()
+        thread.join(10)
+        server.server_close()
+
+def _chamar(url, params):
+    proxy = xmlrpc.client.ServerProxy(url, allow_none=True)
+    try:
+        return ("ok", proxy.agendar_consulta(*params))
+    except xmlrpc.client.Fault as fault:
+        return ("fault", fault.faultCode, fault.faultString)
+
+def _executar(conn, url, antes, params):
+    # Mesmo estado inicial em cada engine, inclusive os ids gerados.
+    conn.cursor().execute("TRUNCATE agendamento, outbox, notificacao RESTART IDENTITY CASCADE")
+    for previo in antes:
+        assert _chamar(url, previo)[0] == "ok"
+    return _chamar(url, params)
+
+@pytest.mark.parametrize("antes, params, esperado", [caso[1:] for caso in CASOS], ids=[caso[0] for caso in CASOS])
+def test_agendar_consulta_mesma_resposta_nos_engines(ambiente, engines, antes, params, esperado):
+    respostas = {engine: _executar(ambiente, url, antes, params) for engine, url in engines.items()}
+
+    assert respostas["threaded"] == respostas["asyncio"]
+
+    resposta = respostas["threaded"]
+    if isinstance(esperado, str):
+        assert resposta[0] == "ok"
+        assert resposta[1]["status"] == esperado
+    else:
+        assert resposta[:2] == ("fault", esperado)
+
+def test_agendar_consulta_grava_o_mesmo_agendamento(ambiente, engines):
+    linhas = {}
+    for engine, url in engines.items():
+        assert _executar(ambiente, url, [], consulta())[0] == "ok"
+
+        cursor = ambiente.cursor()
+        cursor.execute("SELECT paciente_id, medico_id, data::text, horario, especialidade, tipo_pagamento, status FROM agendamento")
+        agendamentos = cursor.fetchall()
+        cursor.execute("SELECT user_id, agendamento_id, novo_status, mensagem, origem FROM notificacao")
+        notificacoes = cursor.fetchall()
+        cursor.execute("SELECT user_id, payload FROM outbox")
+        # O timestamp é o único campo que muda de uma chamada para outra.
+        outbox = [(user_id, {**json.loads(payload), "timestamp": None}) for user_id, payload in cursor.fetchall()]
+        linhas[engine] = (agendamentos, notificacoes, outbox)
+
+    assert linhas["threaded"] == linhas["asyncio"]
+    assert [len(tabela) for tabela in linhas["threaded"]] == [1, 1, 1]
@@ -0,0 +1,243 @@
+# Regras de agendar_consulta sem banco: os helpers de regras_agendamento e os dois
+# engines rodando os mesmos casos com usuários, validação e repositório falsos.
+import asyncio
+import xmlrpc.client
+from concurrent.futures import Future
+
+import pytest
+
+pytest.importorskip("psycopg2")
+
+from src.repository.agendamento_repository import AgendamentoError
+from src.service import regras_agendamento as regras
+
+DATA = "2040-05-10"
+
+RECEPCIONISTA, PACIENTE, OUTRO_PACIENTE, MEDICO, OUTRO_MEDICO = 10, 11, 12, 13, 14
+USUARIOS = {
+    RECEPCIONISTA: "RECEPCIONISTA",
+    PACIENTE: "PACIENTE",
+    OUTRO_PACIENTE: "PACIENTE",
+    MEDICO: "MEDICO",
+    OUTRO_MEDICO: "MEDICO"
+}
+
+CARTAO_CONFIRMADO = "4111111111111112"
+CARTAO_REJEITADO = "4111111111111111"
+CARTAO_ERRO = "erro-interno"
+OCUPADO = "Médico já possui agendamento neste horário."
+
+def consulta(token=RECEPCIONISTA, paciente_id=PACIENTE, medico_id=MEDICO, data=DATA, horario=9,
+             especialidade="CARDIOLOGIA", tipo_pagamento="PARTICULAR", dados_pagamento=CARTAO_CONFIRMADO):
+    return [str(token), str(paciente_id), str(medico_id), data, horario, especialidade, tipo_pagamento, dados_pagamento]
+
+def _lookup(valor=None, erro=None):
+    future = Future()
+    if erro is None:
+        future.set_result(valor)
+    else:
+        future.set_exception(erro)
+    return future
+
+def _fault(chamada):
+    with pytest.raises(xmlrpc.client.Fault) as excinfo:
+        chamada()
+    return excinfo.value.faultCode, excinfo.value.faultString
+
+def test_validar_campos_exige_todos():
+    regras.validar_campos(*consulta())
+    assert _fault(lambda: regras.validar_campos(*consulta(especialidade=""))) == (1, "Todos os campos são obrigatórios.")
+
+@pytest.mark.parametrize("data, horario, especialidade, tipo_pagamento, trecho", [
+    (DATA, 5, "CARDIOLOGIA", "PARTICULAR", "Horário inválido"),
+    (DATA, 17, "CARDIOLOGIA", "PARTICULAR", "Horário inválido"),
+    ("2020-01-06", 9, "CARDIOLOGIA", "PARTICULAR", "datas passadas"),
+    (DATA, 9, "NEUROLOGIA", "PARTICULAR", "Especialidade inválido"),
+    (DATA, 9, "CARDIOLOGIA", "PIX", "Tipo de Pagamento inválido")
+])
+def test_validar_agendamento_rejeita(data, horario, especialidade, tipo_pagamento, trecho):
+    codigo, mensagem = _fault(lambda: regras.validar_agendamento(data, horario, especialidade, tipo_pagamento))
+    assert codigo == 1
+    assert trecho in mensagem
+
+def test_validar_agendamento_aceita_limites():
+    for horario in (6, 16):
+        regras.validar_agendamento(DATA, horario, "PEDIATRIA", "CONVENIO")
+
+@pytest.mark.parametrize("token, paciente_id, roles, mensagem", [
+    (RECEPCIONISTA, PACIENTE, ("RECEPCIONISTA", "PACIENTE", "MEDICO"), None),
+    (PACIENTE, PACIENTE, ("PACIENTE", "PACIENTE", "MEDICO"), None),
+    (PACIENTE, OUTRO_PACIENTE, ("PACIENTE", "PACIENTE", "MEDICO"), "Paciente só pode agendar consultas para si mesmo."),
+    (MEDICO, PACIENTE, ("MEDICO", "PACIENTE", "MEDICO"), "Apenas Pacientes e Recepcionistas podem criar agendamentos."),
+    (RECEPCIONISTA, PACIENTE, ("RECEPCIONISTA", "MEDICO", "MEDICO"), f"O ID informado ({PACIENTE}) não pertence a um Paciente."),
+    (RECEPCIONISTA, PACIENTE, ("RECEPCIONISTA", "PACIENTE", "PACIENTE"), f"O ID informado ({MEDICO}) não pertence a um Médico.")
+])
+def test_validar_permissao(token, paciente_id, roles, mensagem):
+    lookups = [_lookup(role) for role in roles]
+    chamada = lambda: regras.validar_permissao(str(token), str(paciente_id), str(MEDICO), *lookups)
+
+    if mensagem is None:
+        chamada()
+    else:
+        assert _fault(chamada) == (1, mensagem)
+
+def test_validar_permissao_respeita_a_ordem_dos_erros():
+    # O erro do paciente aparece antes do erro do médico, mesmo que os dois falhem.
+    lookups = [_lookup("RECEPCIONISTA"), _lookup(erro=Exception("paciente")), _lookup(erro=Exception("medico"))]
+    with pytest.raises(Exception, match="paciente"):
+        regras.validar_permissao(str(RECEPCIONISTA), str(PACIENTE), str(MEDICO), *lookups)
+
+def test_validar_status_e_resposta():
+    assert regras.validar_status("REJEITADO") == "REJEITADO"
+    assert _fault(lambda: regras.validar_status("APROVADO"))[0] == 1
+    assert regras.resposta_agendamento(7, "CONFIRMADO") == {"id": 7, "status": "CONFIRMADO", "mensagem": "Agendamento confirmado."}
+    assert regras.resposta_agendamento(8, "REJEITADO")["mensagem"] == "Agendamento rejeitado."
+
+def test_erro_para_fault():
+    for erro, codigo in [
+        (AgendamentoError("Erro interno no banco."), 1),
+        (Exception("Erro interno no servidor."), 2),
+        (Exception("Usuário não encontrado."), 1)
+    ]:
+        fault = regras.erro_para_fault(erro)
+        assert (fault.faultCode, fault.faultString) == (codigo, str(erro))
+
+# Engines com I/O falso: a mesma chamada deve dar a mesma resposta (ou o mesmo Fault).
+
+def _role(target_id):
+    role = USUARIOS.get(int(target_id))
+    if role is None:
+        raise Exception("Usuário não encontrado.")
+    return role
+
+def _validar(tipo_pagamento, dados_pagamento):
+    if dados_pagamento == CARTAO_ERRO:
+        raise Exception("Erro interno na validação do pagamento.")
+    if tipo_pagamento == "PARTICULAR":
+        return "CONFIRMADO" if int(dados_pagamento[-1]) % 2 == 0 else "REJEITADO"
+    return "CONFIRMADO" if len(dados_pagamento) % 2 == 0 else "REJEITADO"
+
+def _executar(funcao, *args):
+    future = Future()
+    try:
+        future.set_result(funcao(*args))
+    except Exception as e:
+        future.set_exception(e)
+    return future
+
+class _Users:
+    def get_user_roles(self, pairs):
+        return [_executar(_role, target_id) for _, target_id in pairs]
+
+class _AsyncUsers:
+    async def get_user_roles(self, pairs):
+        # Como o AsyncUsersClient: tasks já concluídas, com o erro no lugar do valor.
+        tasks = [asyncio.ensure_future(self._role(target_id)) for _, target_id in pairs]
+        await asyncio.wait(tasks)
+        return tasks
+
+    async def _role(self, target_id):
+        return _role(target_id)
+
+class _Validation:
+    def validate_payment_async(self, tipo_pagamento, dados_pagamento):
+        return _executar(_validar, tipo_pagamento, dados_pagamento)
+
+class _AsyncValidation:
+    async def validate_payment(self, tipo_pagamento, dados_pagamento):
+        return _validar(tipo_pagamento, dados_pagamento)
+
+class _Repository:
+    def __init__(self):
+        self.criados = []
+
+    def _create(self, paciente_id, medico_id, data, horario, especialidade, tipo_pagamento, status, notificar, outbox):
+        if any(linha[1:4] == (medico_id, data, horario) for linha in self.criados):
+            raise AgendamentoError(OCUPADO)
+        self.criados.append((paciente_id, medico_id, data, horario, especialidade, tipo_pagamento, status))
+        notificar(len(self.criados))
+        return len(self.criados)
+
+    def create(self, *args, status="PENDENTE", notificar=None, outbox=False):
+        return self._create(*args, status, notificar, outbox)
+
+class _AsyncRepository(_Repository):
+    async def create(self, *args, status="PENDENTE", notificar=None, outbox=False):
+        return self._create(*args, status, notificar, outbox)
+
+class _Relay:
+    def __init__(self):
+        self.acordado = 0
+
+    def wake(self):
+        self.acordado += 1
+
+@pytest.fixture
+def engines():
+    pytest.importorskip("grpc")
+    pytest.importorskip("asyncpg")
+    pytest.importorskip("aio_pika")
+    pytest.importorskip("src.pb.users_pb2")
+
+    from src.service.agendamento_service import AgendamentoService
+    from src.service.async_agendamento_service import AsyncAgendamentoService
+
+    # Sem __init__: nada de pool, gRPC ou RabbitMQ, só as dependências falsas.
+    service = AgendamentoService.__new__(AgendamentoService)
+    service.users_client = _Users()
+    service.validation_client = _Validation()
+    service.agendamento_repository = _Repository()
+    service.outbox_relay = _Relay()
+
+    async_service = AsyncAgendamentoService.__new__(AsyncAgendamentoService)
+    async_service.service = service
+    async_service.users_client = _AsyncUsers()
+    async_service.validation_client = _AsyncValidation()
+    async_service.agendamento_repository = _AsyncRepository()
+    async_service.publisher = None
+
+    return {
+        "threaded": (service.agendar_consulta, service.agendamento_repository),
+        "asyncio": (lambda *args: asyncio.run(async_service.agendar_consulta(*args)), async_service.agendamento_repository)
+    }
+
+CASOS = [
+    ("confirmado_recepcionista", [], consulta(), "CONFIRMADO"),
+    ("rejeitado_paciente", [], consulta(token=PACIENTE, dados_pagamento=CARTAO_REJEITADO), "REJEITADO"),
+    ("convenio", [], consulta(tipo_pagamento="CONVENIO", dados_pagamento="Unimed"), "CONFIRMADO"),
+    ("paciente_para_outro", [], consulta(token=PACIENTE, paciente_id=OUTRO_PACIENTE), 1),
+    ("medico_agendando", [], consulta(token=MEDICO), 1),
+    ("paciente_id_de_medico", [], consulta(paciente_id=OUTRO_MEDICO), 1),
+    ("medico_id_de_paciente", [], consulta(medico_id=OUTRO_PACIENTE), 1),
+    ("usuario_inexistente", [], consulta(medico_id=99), 1),
+    ("campo_vazio", [], consulta(especialidade=""), 1),
+    ("horario_fora", [], consulta(horario=5), 1),
+    ("data_passada", [], consulta(data="2020-01-06"), 1),
+    ("especialidade_invalida", [], consulta(especialidade="NEUROLOGIA"), 1),
+    ("pagamento_invalido", [], consulta(tipo_pagamento="PIX"), 1),
+    ("medico_ocupado", [consulta(paciente_id=OUTRO_PACIENTE)], consulta(), 1),
+    ("validacao_erro_interno", [], consulta(dados_pagamento=CARTAO_ERRO), 2)
+]
+
+def _chamar(agendar, params):
+    try:
+        return ("ok", agendar(*params))
+    except xmlrpc.client.Fault as fault:
+        return ("fault", fault.faultCode, fault.faultString)
+
+@pytest.mark.parametrize("antes, params, esperado", [caso[1:] for caso in CASOS], ids=[caso[0] for caso in CASOS])
+def test_engines_dao_a_mesma_resposta(engines, antes, params, esperado):
+    respostas = {}
+    for engine, (agendar, repository) in engines.items():
+        for previo in antes:
+            assert _chamar(agendar, previo)[0] == "ok"
+        respostas[engine] = (_chamar(agendar, params), repository.criados)
+
+    assert respostas["threaded"] == respostas["asyncio"]
+
+    resposta = respostas["threaded"][0]
+    if isinstance(esperado, str):
+        assert resposta[0] == "ok"
+        assert resposta[1]["status"] == esperado
+    else:
+        assert resposta[:2] == ("fault", esperado)
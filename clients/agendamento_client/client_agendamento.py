@@ -1,12 +1,19 @@
 import xmlrpc.client
 import argparse
+import csv
+import json
 import os
 import sys
+import urllib.parse
+import urllib.request
 
 sys.path.append(os.getcwd())
 
 from utils.session_manager import load_session
-from src.rabbitmq.consumer import NotificationConsumer
+from src.config import Config
+from src.rabbitmq.consumer import create_consumer
+from src.rabbitmq.daemon import serve as serve_daemon
+from src.rabbitmq.notification import Notification
 
 RPC_ADDRESS = os.getenv("RPC_ADDRESS")
 
@@ -35,7 +42,42 @@ def agendar(server, args):
     except Exception as e:
         print(f"Erro: {e}")
 
+def agendar_lote(server, args):
+    # CSV com cabeçalho: paciente_id,medico_id,data,horario,especialidade,tipo_pagamento,dados_pagamento
+    try:
+        session = load_session()
+
+        with open(args.arquivo, newline="", encoding="utf-8") as arquivo:
+            itens = [dict(linha, horario=int(linha["horario"] or 0)) for linha in csv.DictReader(arquivo)]
+
+        response = server.agendar_consultas_lote(session, itens)
+
+        for linha, r in enumerate(response["resultados"], start=2):
+            if "erro" in r:
+                print(f"Linha {linha} | Erro: {r['erro']}")
+            else:
+                print(f"Linha {linha} | ID: {r['id']} | Status: {r['status']} | Mensagem: {r['mensagem']}")
+
+        if response.get("aviso"):
+            print(f"Aviso: {response['aviso']}")
+
+    except xmlrpc.client.Fault as e:
+        handle_rpc_error(e)
+    except Exception as e:
+        print(f"Erro: {e}")
+
 def listar(server, args):
+    filtros = {
+        "data_inicio": args.data_inicio,
+        "data_fim": args.data_fim,
+        "especialidade": args.especialidade,
+        "medico_id": args.medico_id
+    }
+    filtros = {chave: valor for chave, valor in filtros.items() if valor is not None}
+
+    if args.tamanho_pagina or filtros:
+        return listar_paginado(server, args, filtros)
+
     try:
         session = load_session()
 
@@ -53,37 +95,157 @@ def listar(server, args):
     except Exception as e:
         print(f"Erro: {e}")
 
-def cancelar(server, args):
+def listar_paginado(server, args, filtros):
+    # Imprime cada página assim que chega, seguindo o cursor até o fim.
     try:
         session = load_session()
 
-        response = server.cancelar_agendamento(session, str(args.agendamento_id))
+        cursor = None
+        total = 0
 
-        print(f"ID: {response['id']} | Status: {response['status']} | Mensagem: {response['mensagem']}")
+        while True:
+            pagina = server.consultar_agendamentos_pagina(session, args.status, cursor, args.tamanho_pagina, filtros)
+
+            for a in pagina["itens"]:
+                print(f"ID: {a['id']} | Data: {a['data']} {a['horario']}h | Status: {a['status']} | Médico: {a['medico_id']} | Paciente: {a['paciente_id']}")
+            total += len(pagina["itens"])
+
+            cursor = pagina["proximo_cursor"]
+            if not cursor:
+                break
+
+        if not total:
+            print("Nenhum agendamento encontrado.")
 
     except xmlrpc.client.Fault as e:
         handle_rpc_error(e)
     except Exception as e:
         print(f"Erro: {e}")
 
+def horarios(server, args):
+    try:
+        session = load_session()
+
+        disponiveis = server.horarios_disponiveis(session, args.medico_id, None, args.data_inicio, args.data_fim)
+
+        if not disponiveis:
+            print("Nenhum horário disponível.")
+            return
+
+        for d in disponiveis:
+            print(f"Médico: {d['medico_id']} | Data: {d['data']} | Horários: {', '.join(f'{h}h' for h in d['horarios'])}")
+
+    except xmlrpc.client.Fault as e:
+        handle_rpc_error(e)
+    except Exception as e:
+        print(f"Erro: {e}")
+
+def cancelar(server, args):
+    alterar_status(server, "cancelar_agendamento", args.agendamento_ids)
+
 def concluir(server, args):
+    alterar_status(server, "concluir_agendamento", args.agendamento_ids)
+
+def alterar_status(server, metodo, valores):
     try:
         session = load_session()
+        ids = ids_informados(valores)
 
-        response = server.concluir_agendamento(session, str(args.agendamento_id))
+        if len(ids) == 1:
+            response = getattr(server, metodo)(session, str(ids[0]))
+            print(f"ID: {response['id']} | Status: {response['status']} | Mensagem: {response['mensagem']}")
+            return
 
-        print(f"ID: {response['id']} | Status: {response['status']} | Mensagem: {response['mensagem']}")
+        # Vários IDs: uma requisição system.multicall por bloco, com o resultado de cada item.
+        for inicio in range(0, len(ids), Config.MULTICALL_BATCH_SIZE):
+            bloco = ids[inicio:inicio + Config.MULTICALL_BATCH_SIZE]
+
+            multicall = xmlrpc.client.MultiCall(server)
+            for agendamento_id in bloco:
+                getattr(multicall, metodo)(session, str(agendamento_id))
+            resultados = multicall()
+
+            for i, agendamento_id in enumerate(bloco):
+                try:
+                    response = resultados[i]
+                    print(f"ID: {response['id']} | Status: {response['status']} | Mensagem: {response['mensagem']}")
+                except xmlrpc.client.Fault as e:
+                    print(f"ID: {agendamento_id} | Erro [{e.faultCode}]: {e.faultString}")
 
     except xmlrpc.client.Fault as e:
         handle_rpc_error(e)
     except Exception as e:
         print(f"Erro: {e}")
 
-def ouvir_notificacoes():
+def ids_informados(valores):
+    # "--id -" lê os IDs da entrada padrão, separados por espaço ou quebra de linha.
+    if valores == ["-"]:
+        valores = sys.stdin.read().split()
+
+    ids = [int(v) for v in valores]
+    if not ids:
+        raise Exception("Nenhum ID informado.")
+    return ids
+
+def notificacoes(server, args):
+    # Histórico pela caixa de entrada do serviço: uma consulta, sem tocar no RabbitMQ.
+    try:
+        session = load_session()
+
+        pagina = server.consultar_notificacoes(session, None, args.tamanho_pagina)
+
+        print(f"Não lidas: {pagina['nao_lidas']}\n")
+        if not pagina["itens"]:
+            print("Nenhuma notificação.")
+
+        for n in pagina["itens"]:
+            marcador = " " if n["lida"] else "*"
+            print(
+                f"{marcador} [{n['timestamp']}] "
+                f"Agendamento {n['agendamento_id']} → {n['novo_status']}\n"
+                f"  {n['mensagem']}\n"
+            )
+
+        if args.marcar_lidas:
+            server.marcar_notificacoes_lidas(session)
+            print("Notificações marcadas como lidas.")
+
+    except xmlrpc.client.Fault as e:
+        handle_rpc_error(e)
+    except Exception as e:
+        print(f"Erro: {e}")
+
+def ouvir_notificacoes(server, args):
     session = load_session()
 
-    consumer = NotificationConsumer(int(session))
-    mensagens = consumer.consume_all()
+    if args.daemon:
+        return ouvir_notificacoes_daemon(args.daemon, session, args.follow)
+
+    consumer = create_consumer(int(session))
+
+    anteriores = []
+    if consumer.primeira_leitura:
+        anteriores = notificacoes_anteriores(server, session)
+
+    # Uma notificação publicada logo depois de gravada pode vir da caixa de entrada e da stream.
+    vistas = {(n.agendamento_id, n.novo_status) for n in anteriores}
+
+    def nova(n):
+        return (n.agendamento_id, n.novo_status) not in vistas
+
+    def imprimir_nova(n):
+        if nova(n):
+            imprimir_notificacao(n)
+
+    if args.follow:
+        for n in anteriores:
+            imprimir_notificacao(n)
+
+        print("Aguardando notificações (Ctrl+C para sair)...\n")
+        consumer.follow(imprimir_nova)
+        return
+
+    mensagens = anteriores + [n for n in consumer.consume_all() if nova(n)]
 
     if not mensagens:
         print("Nenhuma notificação pendente.")
@@ -91,11 +253,70 @@ def ouvir_notificacoes():
 
     print("\nNotificações:\n")
     for n in mensagens:
-        print(
-            f"[{n.timestamp}] "
-            f"Agendamento {n.agendamento_id} → {n.novo_status}\n"
-            f"{n.mensagem}\n"
+        imprimir_notificacao(n)
+
+def notificacoes_anteriores(server, session):
+    # Primeira leitura nesta máquina: a stream começa de agora, então as não lidas de
+    # antes vêm da caixa de entrada do serviço, da mais antiga para a mais recente.
+    try:
+        pagina = server.consultar_notificacoes(session, None, None)
+    except (xmlrpc.client.Fault, OSError) as e:
+        print(f"Não foi possível consultar a caixa de entrada: {e}")
+        return []
+
+    return [
+        Notification(
+            user_id=int(session),
+            agendamento_id=n["agendamento_id"],
+            novo_status=n["novo_status"],
+            mensagem=n["mensagem"],
+            origem=n["origem"],
+            timestamp=n["timestamp"]
         )
+        for n in reversed(pagina["itens"])
+        if not n["lida"]
+    ]
+
+def ouvir_notificacoes_daemon(endereco, session, follow):
+    # Consulta o daemon local em vez de abrir uma conexão AMQP a cada execução.
+    def poll(espera):
+        query = urllib.parse.urlencode({"token": session, "espera": espera})
+        with urllib.request.urlopen(f"{endereco}/notificacoes?{query}", timeout=espera + 10) as resposta:
+            return [Notification(**n) for n in json.load(resposta)["notificacoes"]]
+
+    try:
+        if not follow:
+            mensagens = poll(0)
+
+            if not mensagens:
+                print("Nenhuma notificação pendente.")
+                return
+
+            print("\nNotificações:\n")
+            for n in mensagens:
+                imprimir_notificacao(n)
+            return
+
+        print("Aguardando notificações (Ctrl+C para sair)...\n")
+        while True:
+            for n in poll(Config.DAEMON_MAX_WAIT):
+                imprimir_notificacao(n)
+
+    except KeyboardInterrupt:
+        pass
+    except OSError as e:
+        print(f"Erro ao consultar o daemon em {endereco}: {e}")
+
+def daemon(args):
+    serve_daemon(args.host, args.porta)
+
+def imprimir_notificacao(n):
+    print(
+        f"[{n.timestamp}] "
+        f"Agendamento {n.agendamento_id} → {n.novo_status}\n"
+        f"{n.mensagem}\n",
+        flush=True
+    )
 
 def main():
     parser = argparse.ArgumentParser(description="Cliente XML-RPC - Agendamento Service")
@@ -119,20 +340,47 @@ def main():
     )
     agendar_parser.add_argument("--dados-pagamento", required=True)
 
+    agendar_lote_parser = subparsers.add_parser("agendar-lote")
+    agendar_lote_parser.add_argument("--arquivo", required=True, help="CSV com um agendamento por linha")
+
     listar_parser = subparsers.add_parser("listar")
     listar_parser.add_argument(
         "--status", 
         required=False, 
         choices=['PENDENTE', 'CONFIRMADO', 'REJEITADO', 'CONCLUIDO', 'CANCELADO']
     )
+    listar_parser.add_argument("--tamanho-pagina", type=int, required=False, help="Lista em páginas deste tamanho")
+    listar_parser.add_argument("--data-inicio", required=False, help="YYYY-MM-DD")
+    listar_parser.add_argument("--data-fim", required=False, help="YYYY-MM-DD")
+    listar_parser.add_argument(
+        "--especialidade",
+        required=False,
+        choices=['CARDIOLOGIA', 'PEDIATRIA', 'ORTOPEDIA', 'DERMATOLOGIA']
+    )
+    listar_parser.add_argument("--medico-id", type=int, required=False)
+
+    horarios_parser = subparsers.add_parser("horarios")
+    horarios_parser.add_argument("--medico-id", type=int, required=False, help="Padrão: todos os médicos")
+    horarios_parser.add_argument("--data-inicio", required=False, help="YYYY-MM-DD (padrão: hoje)")
+    horarios_parser.add_argument("--data-fim", required=False, help="YYYY-MM-DD (padrão: data inicial)")
 
     cancelar_parser = subparsers.add_parser("cancelar")
-    cancelar_parser.add_argument("--id", type=int, required=True, dest="agendamento_id")
+    cancelar_parser.add_argument("--id", nargs="+", required=True, dest="agendamento_ids", help="Um ou mais IDs; '-' lê da entrada padrão")
 
     concluir_parser = subparsers.add_parser("concluir")
-    concluir_parser.add_argument("--id", type=int, required=True, dest="agendamento_id")
+    concluir_parser.add_argument("--id", nargs="+", required=True, dest="agendamento_ids", help="Um ou mais IDs; '-' lê da entrada padrão")
+
+    notificacoes_parser = subparsers.add_parser("notificacoes")
+    notificacoes_parser.add_argument("--tamanho-pagina", type=int, required=False)
+    notificacoes_parser.add_argument("--marcar-lidas", action="store_true")
+
+    ouvir_parser = subparsers.add_parser("ouvir-notificacoes")
+    ouvir_parser.add_argument("--follow", action="store_true", help="Continua recebendo novas notificações")
+    ouvir_parser.add_argument("--daemon", default=Config.DAEMON_ADDRESS, help="Endereço do daemon local (ex.: http://127.0.0.1:8765)")
 
-    subparsers.add_parser("ouvir-notificacoes")
+    daemon_parser = subparsers.add_parser("daemon")
+    daemon_parser.add_argument("--host", default=Config.DAEMON_HOST)
+    daemon_parser.add_argument("--porta", type=int, default=Config.DAEMON_PORT)
 
     args = parser.parse_args()
 
@@ -141,14 +389,22 @@ def main():
     match args.command:
         case "agendar":
             agendar(server, args)
+        case "agendar-lote":
+            agendar_lote(server, args)
         case "listar":
             listar(server, args)
+        case "horarios":
+            horarios(server, args)
         case "cancelar":
             cancelar(server, args)
         case "concluir":
             concluir(server, args)
+        case "notificacoes":
+            notificacoes(server, args)
         case "ouvir-notificacoes":
-            ouvir_notificacoes()
+            ouvir_notificacoes(server, args)
+        case "daemon":
+            daemon(args)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -6,4 +6,23 @@ class Config:
     RABBITMQ_USER = os.getenv("RABBITMQ_USER")
     RABBITMQ_PASSWORD = os.getenv("RABBITMQ_PASSWORD")
 
-    NOTIFICATION_EXCHANGE = "notifications"
\ No newline at end of file
+    NOTIFICATION_EXCHANGE = "notifications"
+    NOTIFICATION_TOPOLOGY = os.getenv("NOTIFICATION_TOPOLOGY", "per_user")  # "per_user" ou "sharded"; igual ao serviço.
+    NOTIFICATION_SHARDS = int(os.getenv("NOTIFICATION_SHARDS", "16"))
+    NOTIFICATION_STREAM_MAX_AGE = os.getenv("NOTIFICATION_STREAM_MAX_AGE", "7D")
+    NOTIFICATION_OFFSETS_FILE = os.path.expanduser(os.getenv("NOTIFICATION_OFFSETS_FILE", "~/.med_session/offsets.json"))  # Posição de leitura na stream por usuário.
+
+    CONSUMER_MODE = os.getenv("CONSUMER_MODE", "consume")  # "consume" (basic_consume) ou "get" (basic_get).
+    CONSUMER_PREFETCH = int(os.getenv("CONSUMER_PREFETCH", "500"))
+    CONSUMER_ACK_BATCH = int(os.getenv("CONSUMER_ACK_BATCH", "100"))  # Mensagens por ack cumulativo.
+    CONSUMER_ACK_INTERVAL = float(os.getenv("CONSUMER_ACK_INTERVAL", "0.2"))  # Segundos até confirmar o que estiver pendente.
+    CONSUMER_IDLE_TIMEOUT = float(os.getenv("CONSUMER_IDLE_TIMEOUT", "1"))  # Segundos sem mensagem para considerar a fila vazia.
+    DAEMON_HOST = os.getenv("DAEMON_HOST", "127.0.0.1")
+    DAEMON_PORT = int(os.getenv("DAEMON_PORT", "8765"))
+    DAEMON_ADDRESS = os.getenv("DAEMON_ADDRESS")  # Ex.: http://127.0.0.1:8765; se definido, ouvir-notificacoes consulta o daemon.
+    DAEMON_MAX_WAIT = float(os.getenv("DAEMON_MAX_WAIT", "25"))  # Segundos máximos de long-poll por requisição.
+    DAEMON_SUBSCRIBE_WAIT = float(os.getenv("DAEMON_SUBSCRIBE_WAIT", "2"))  # Segundos que o primeiro poll de um usuário espera o backlog da fila.
+    DAEMON_USER_IDLE = float(os.getenv("DAEMON_USER_IDLE", "300"))  # Segundos sem poll até fechar o canal do usuário.
+    DAEMON_RECONNECT_DELAY = float(os.getenv("DAEMON_RECONNECT_DELAY", "2"))
+
+    MULTICALL_BATCH_SIZE = int(os.getenv("MULTICALL_BATCH_SIZE", "100"))  # Chamadas por system.multicall nos comandos em lote.
@@ -1,3 +1,8 @@
+import json
+import os
+import time
+from datetime import datetime, timezone
+
 from src.rabbitmq.connection import get_connection
 from src.config import Config
 from src.rabbitmq.notification import Notification
@@ -16,10 +21,11 @@ class NotificationConsumer:
             durable=True
         )
 
-        self.channel.queue_declare(
+        declare = self.channel.queue_declare(
             queue=self.queue_name,
             durable=True
         )
+        self.pending_on_open = declare.method.message_count
 
         self.channel.queue_bind(
             exchange=Config.NOTIFICATION_EXCHANGE,
@@ -27,11 +33,87 @@ class NotificationConsumer:
             routing_key=str(user_id)
         )
 
+        self._last_tag = None
+        self._unacked = 0
+        self._last_ack = time.monotonic()
+
+        # A fila do usuário guarda tudo o que ainda não foi lido.
+        self.primeira_leitura = False
+
     def consume_all(self):
+        if Config.CONSUMER_MODE == "get":
+            return self._consume_all_get()
+
+        mensagens = []
+
+        # Só o que já estava na fila ao abrir o consumidor; o follow cuida do resto.
+        if self.pending_on_open:
+            for delivery_tag, notification in self._stream(Config.CONSUMER_IDLE_TIMEOUT):
+                if notification is None:
+                    break
+
+                mensagens.append(notification)
+                self._processed(delivery_tag)
+
+                if len(mensagens) >= self.pending_on_open:
+                    break
+
+        self.close()
+        return mensagens
+
+    def follow(self, callback):
+        # Entrega cada notificação ao callback assim que chega, até Ctrl+C.
+        try:
+            for delivery_tag, notification in self._stream(Config.CONSUMER_ACK_INTERVAL):
+                if notification is not None:
+                    callback(notification)
+                    self._processed(delivery_tag)
+
+        except KeyboardInterrupt:
+            pass
+
+        finally:
+            self.close()
+
+    def _stream(self, inactivity_timeout):
+        # basic_consume com prefetch: o broker empurra as mensagens sem uma ida e volta
+        # por item. Gera (None, None) quando a fila fica ociosa, depois de confirmar o
+        # que estava pendente.
+        self.channel.basic_qos(prefetch_count=Config.CONSUMER_PREFETCH)
+
+        for method, properties, body in self.channel.consume(
+            queue=self.queue_name,
+            auto_ack=False,
+            inactivity_timeout=inactivity_timeout
+        ):
+            if method is None:
+                self._ack_pending()
+                yield None, None
+                continue
+
+            yield method.delivery_tag, Notification.decode(body, properties.content_type)
+
+    def _processed(self, delivery_tag):
+        # Ack cumulativo (multiple=True) a cada CONSUMER_ACK_BATCH mensagens ou
+        # CONSUMER_ACK_INTERVAL segundos, sempre depois do processamento.
+        self._last_tag = delivery_tag
+        self._unacked += 1
+
+        if (self._unacked >= Config.CONSUMER_ACK_BATCH
+                or time.monotonic() - self._last_ack >= Config.CONSUMER_ACK_INTERVAL):
+            self._ack_pending()
+
+    def _ack_pending(self):
+        if self._unacked:
+            self.channel.basic_ack(delivery_tag=self._last_tag, multiple=True)
+            self._unacked = 0
+        self._last_ack = time.monotonic()
+
+    def _consume_all_get(self):
         mensagens = []
 
         while True:
-            method, _, body = self.channel.basic_get(
+            method, properties, body = self.channel.basic_get(
                 queue=self.queue_name,
                 auto_ack=False
             )
@@ -39,12 +121,168 @@ class NotificationConsumer:
             if method is None:
                 break
 
-            mensagens.append(Notification.from_json(body.decode()))
+            mensagens.append(Notification.decode(body, properties.content_type))
             self.channel.basic_ack(method.delivery_tag)
 
         self.close()
         return mensagens
 
     def close(self):
-        if self.connection.is_open:
-            self.connection.close()
+        if not self.connection.is_open:
+            return
+
+        # Confirma o que já foi processado e devolve o resto (prefetch) para a fila.
+        if self.channel.is_open:
+            self._ack_pending()
+            self.channel.cancel()
+
+        self.connection.close()
+
+class OffsetStore:
+    # Posição de leitura por usuário no seu shard: um JSON pequeno ao lado da sessão.
+    # O valor é o último offset lido ou, antes da primeira mensagem, {"desde": <epoch>}.
+    def __init__(self, path=None):
+        self.path = path or Config.NOTIFICATION_OFFSETS_FILE
+
+    def load(self, user_id):
+        try:
+            with open(self.path, "r") as f:
+                return json.load(f).get(str(user_id))
+        except (OSError, ValueError):
+            return None
+
+    def save(self, user_id, offset):
+        try:
+            with open(self.path, "r") as f:
+                offsets = json.load(f)
+        except (OSError, ValueError):
+            offsets = {}
+
+        offsets[str(user_id)] = offset
+
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(offsets, f)
+        os.replace(tmp, self.path)
+
+class ShardedNotificationConsumer(NotificationConsumer):
+    # Topologia sharded: a fila é uma stream compartilhada por vários usuários. A
+    # leitura não remove mensagens; cada usuário retoma do offset salvo e descarta
+    # as notificações de outros usuários.
+    def __init__(self, user_id: int, offsets=None):
+        self.user_id = user_id
+        self.queue_name = f"notifications.shard.{int(user_id) % Config.NOTIFICATION_SHARDS}"
+        self.offsets = offsets or OffsetStore()
+
+        self.connection = get_connection()
+        self.channel = self.connection.channel()
+
+        self.channel.exchange_declare(
+            exchange=Config.NOTIFICATION_EXCHANGE,
+            exchange_type="direct",
+            durable=True
+        )
+
+        self.channel.queue_declare(
+            queue=self.queue_name,
+            durable=True,
+            arguments={
+                "x-queue-type": "stream",
+                "x-max-age": Config.NOTIFICATION_STREAM_MAX_AGE
+            }
+        )
+
+        self.channel.queue_bind(
+            exchange=Config.NOTIFICATION_EXCHANGE,
+            queue=self.queue_name,
+            routing_key=self.queue_name
+        )
+
+        self._last_tag = None
+        self._unacked = 0
+        self._last_ack = time.monotonic()
+
+        posicao = self.offsets.load(user_id)
+
+        # Sem posição salva (ex.: quiosque novo), começar do "first" varreria até
+        # NOTIFICATION_STREAM_MAX_AGE do tráfego de todos os usuários do shard. Começa
+        # de agora e grava o ponto de partida; o que chegou antes está na caixa de
+        # entrada do serviço (consultar_notificacoes).
+        self.primeira_leitura = posicao is None
+        if posicao is None:
+            posicao = {"desde": int(time.time())}
+            self.offsets.save(user_id, posicao)
+
+        self._offset = posicao if isinstance(posicao, int) else None
+        self._desde = posicao["desde"] if isinstance(posicao, dict) else None
+        self._saved_offset = self._offset
+        self._offset_by_tag = {}
+
+    def consume_all(self):
+        # Sem contagem por usuário na stream: lê até a fila ficar ociosa.
+        mensagens = []
+
+        for delivery_tag, notification in self._stream(Config.CONSUMER_IDLE_TIMEOUT):
+            if notification is None:
+                break
+
+            mensagens.append(notification)
+            self._processed(delivery_tag)
+
+        self.close()
+        return mensagens
+
+    def _stream(self, inactivity_timeout):
+        # Streams exigem ack manual e prefetch; o ack só devolve crédito ao consumidor.
+        self.channel.basic_qos(prefetch_count=Config.CONSUMER_PREFETCH)
+
+        for method, properties, body in self.channel.consume(
+            queue=self.queue_name,
+            auto_ack=False,
+            inactivity_timeout=inactivity_timeout,
+            arguments={
+                "x-stream-offset": self._stream_offset(),
+                "x-stream-filter": str(self.user_id),
+                "x-stream-match-unfiltered": True
+            }
+        ):
+            if method is None:
+                self._ack_pending()
+                yield None, None
+                continue
+
+            headers = properties.headers or {}
+            self._offset_by_tag[method.delivery_tag] = headers.get("x-stream-offset")
+
+            # O filtro do broker é probabilístico: a checagem final é aqui.
+            if str(headers.get("user_id")) != str(self.user_id):
+                self._processed(method.delivery_tag)
+                continue
+
+            yield method.delivery_tag, Notification.decode(body, properties.content_type)
+
+    def _stream_offset(self):
+        if self._offset is not None:
+            return self._offset + 1
+        # Offset por timestamp: o broker entrega a partir do primeiro chunk desse instante.
+        return datetime.fromtimestamp(self._desde, timezone.utc)
+
+    def _processed(self, delivery_tag):
+        offset = self._offset_by_tag.pop(delivery_tag, None)
+        if offset is not None:
+            self._offset = offset
+        super()._processed(delivery_tag)
+
+    def _ack_pending(self):
+        super()._ack_pending()
+
+        # O offset só avança no disco junto com os acks, nunca antes do processamento.
+        if self._offset != self._saved_offset:
+            self.offsets.save(self.user_id, self._offset)
+            self._saved_offset = self._offset
+
+def create_consumer(user_id: int):
+    if Config.NOTIFICATION_TOPOLOGY == "sharded":
+        return ShardedNotificationConsumer(user_id)
+    return NotificationConsumer(user_id)
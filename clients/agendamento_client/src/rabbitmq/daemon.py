@@ -0,0 +1,275 @@
+import json
+import threading
+import time
+from dataclasses import asdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pika
+
+from src.config import Config
+from src.rabbitmq.connection import get_connection
+from src.rabbitmq.notification import Notification
+
+class _Assinatura:
+    # Estado de um usuário no daemon. channel e buffer só são tocados pela thread do
+    # AMQP; os quiosques leem o buffer sob a condition.
+    def __init__(self, user_id):
+        self.user_id = user_id
+        self.queue_name = f"notifications.user.{user_id}"
+        self.channel = None
+        self.buffer = []  # (channel, delivery_tag, Notification)
+        # pronto: consume registrado; pendentes: mensagens na fila nesse momento.
+        self.pronto = False
+        self.pendentes = 0
+        self.cond = threading.Condition()
+        self.last_poll = time.monotonic()
+
+class NotificationDaemon:
+    # Uma única conexão AMQP com um canal consumidor por usuário ativo. Os quiosques
+    # consultam pelo HTTP local em vez de abrir conexão e declarar fila a cada poll.
+    # pika não é thread-safe: tudo que mexe em canal roda na thread do loop, e as
+    # outras threads só agendam trabalho via add_callback_threadsafe.
+    def __init__(self):
+        if Config.NOTIFICATION_TOPOLOGY != "per_user":
+            raise Exception("O daemon de notificações suporta apenas a topologia per_user.")
+
+        self.connection = None
+        self.running = True
+
+        self._assinaturas = {}
+        self._lock = threading.Lock()
+
+        # Filas já ligadas à exchange sobrevivem às reconexões: na volta o bind não é refeito.
+        self._declared = set()
+        self._exchange_declared = False
+
+    def poll(self, user_id, espera=0):
+        # Devolve (notificações pendentes, entrega), esperando até `espera` segundos se
+        # ainda não houver nenhuma. Quem chama confirma a entrega depois de responder
+        # ao quiosque, ou a devolve para a fila se a resposta falhar.
+        with self._lock:
+            assinatura = self._assinaturas.get(user_id)
+            if assinatura is None:
+                assinatura = self._assinaturas[user_id] = _Assinatura(user_id)
+                self._call(self._ensure_channels)
+
+            assinatura.last_poll = time.monotonic()
+
+        with assinatura.cond:
+            if not assinatura.pronto:
+                # Assinatura nova ou refeita: espera o consume e o backlog da fila chegarem.
+                assinatura.cond.wait_for(
+                    lambda: assinatura.pronto and len(assinatura.buffer) >= assinatura.pendentes,
+                    Config.DAEMON_SUBSCRIBE_WAIT
+                )
+            if not assinatura.buffer and espera:
+                assinatura.cond.wait(min(espera, Config.DAEMON_MAX_WAIT))
+            entregues, assinatura.buffer = assinatura.buffer, []
+
+        entrega = entregues[-1][:2] if entregues else None
+        return [notification for _, _, notification in entregues], entrega
+
+    def confirmar(self, entrega):
+        if entrega is not None:
+            channel, delivery_tag = entrega
+            self._call(lambda: self._ack(channel, delivery_tag))
+
+    def devolver(self, entrega):
+        if entrega is not None:
+            channel, delivery_tag = entrega
+            self._call(lambda: self._nack(channel, delivery_tag))
+
+    def stats(self):
+        with self._lock:
+            return {
+                "conectado": bool(self.connection and self.connection.is_open),
+                "usuarios": len(self._assinaturas),
+                "filas_declaradas": len(self._declared)
+            }
+
+    def run(self):
+        while self.running:
+            try:
+                self.connection = get_connection()
+                self._ensure_channels()
+
+                while self.running:
+                    self.connection.process_data_events(time_limit=1)
+                    self._expire_idle()
+
+            except pika.exceptions.AMQPError:
+                self._on_disconnect()
+                if self.running:
+                    time.sleep(Config.DAEMON_RECONNECT_DELAY)
+
+    def close(self):
+        self.running = False
+        if self.connection and self.connection.is_open:
+            self.connection.close()
+
+    def _call(self, callback):
+        connection = self.connection
+        if connection is None or not connection.is_open:
+            return  # O loop refaz os canais ao reconectar.
+
+        try:
+            connection.add_callback_threadsafe(callback)
+        except pika.exceptions.AMQPError:
+            pass
+
+    # A partir daqui, tudo roda na thread do loop AMQP.
+    def _ensure_channels(self):
+        with self._lock:
+            pendentes = [
+                a for a in self._assinaturas.values()
+                if a.channel is None or not a.channel.is_open
+            ]
+
+        for assinatura in pendentes:
+            self._subscribe(assinatura)
+
+    def _subscribe(self, assinatura):
+        if assinatura.channel is not None:
+            # Canal fechado pelo broker (ex.: fila removida): declara de novo.
+            self._declared.discard(assinatura.queue_name)
+            self._drop_buffer(assinatura)
+
+        channel = self.connection.channel()
+
+        if not self._exchange_declared:
+            channel.exchange_declare(
+                exchange=Config.NOTIFICATION_EXCHANGE,
+                exchange_type="direct",
+                durable=True
+            )
+            self._exchange_declared = True
+
+        # O queue_declare se repete a cada assinatura porque devolve quantas mensagens
+        # já estão na fila; o bind só na primeira vez.
+        declarada = channel.queue_declare(queue=assinatura.queue_name, durable=True)
+        if assinatura.queue_name not in self._declared:
+            channel.queue_bind(
+                exchange=Config.NOTIFICATION_EXCHANGE,
+                queue=assinatura.queue_name,
+                routing_key=str(assinatura.user_id)
+            )
+            self._declared.add(assinatura.queue_name)
+
+        channel.basic_qos(prefetch_count=Config.CONSUMER_PREFETCH)
+        channel.basic_consume(
+            queue=assinatura.queue_name,
+            on_message_callback=lambda ch, method, properties, body: self._on_message(assinatura, ch, method, properties, body),
+            auto_ack=False
+        )
+
+        assinatura.channel = channel
+
+        with assinatura.cond:
+            assinatura.pendentes = min(declarada.method.message_count, Config.CONSUMER_PREFETCH)
+            assinatura.pronto = True
+            assinatura.cond.notify_all()
+
+    def _on_message(self, assinatura, channel, method, properties, body):
+        notification = Notification.decode(body, properties.content_type)
+
+        with assinatura.cond:
+            assinatura.buffer.append((channel, method.delivery_tag, notification))
+            assinatura.cond.notify_all()
+
+    def _ack(self, channel, delivery_tag):
+        # Se o canal caiu, as mensagens já voltaram para a fila e serão reentregues.
+        if channel.is_open:
+            channel.basic_ack(delivery_tag=delivery_tag, multiple=True)
+
+    def _nack(self, channel, delivery_tag):
+        # Volta para a fila e é reentregue a este mesmo canal.
+        if channel.is_open:
+            channel.basic_nack(delivery_tag=delivery_tag, multiple=True, requeue=True)
+
+    def _expire_idle(self):
+        limite = time.monotonic() - Config.DAEMON_USER_IDLE
+        with self._lock:
+            ociosos = [a for a in self._assinaturas.values() if a.last_poll < limite]
+            for assinatura in ociosos:
+                del self._assinaturas[assinatura.user_id]
+
+        # Fechar o canal devolve para a fila o que não foi entregue.
+        for assinatura in ociosos:
+            if assinatura.channel is not None and assinatura.channel.is_open:
+                assinatura.channel.close()
+
+    def _on_disconnect(self):
+        # Tags de entrega valem só no canal de origem: o que estava em buffer será reentregue.
+        with self._lock:
+            assinaturas = list(self._assinaturas.values())
+
+        for assinatura in assinaturas:
+            assinatura.channel = None
+            self._drop_buffer(assinatura)
+
+    def _drop_buffer(self, assinatura):
+        with assinatura.cond:
+            assinatura.buffer = []
+            assinatura.pronto = False
+
+class _DaemonRequestHandler(BaseHTTPRequestHandler):
+    # GET /notificacoes?token=<id>&espera=<segundos> e GET /saude.
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = parse_qs(url.query)
+
+        if url.path == "/saude":
+            return self._send_json(200, self.server.notification_daemon.stats())
+
+        if url.path != "/notificacoes":
+            return self._send_json(404, {"erro": "Rota não encontrada."})
+
+        try:
+            user_id = int(params["token"][0])
+            espera = float(params.get("espera", ["0"])[0])
+        except (KeyError, ValueError):
+            return self._send_json(400, {"erro": "Informe token (inteiro) e espera (segundos)."})
+
+        daemon = self.server.notification_daemon
+        notificacoes, entrega = daemon.poll(user_id, espera)
+
+        # Só confirma o que chegou ao quiosque; se a escrita falhar, volta para a fila.
+        try:
+            self._send_json(200, {"notificacoes": [asdict(n) for n in notificacoes]})
+            self.wfile.flush()
+        except OSError:
+            daemon.devolver(entrega)
+            return
+
+        daemon.confirmar(entrega)
+
+    def _send_json(self, status, corpo):
+        body = json.dumps(corpo).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def serve(host=None, port=None):
+    daemon = NotificationDaemon()
+
+    server = ThreadingHTTPServer((host or Config.DAEMON_HOST, port or Config.DAEMON_PORT), _DaemonRequestHandler)
+    server.daemon_threads = True
+    server.notification_daemon = daemon
+
+    threading.Thread(target=server.serve_forever, name="daemon-http", daemon=True).start()
+    print(f"Daemon de notificações em http://{server.server_address[0]}:{server.server_address[1]}", flush=True)
+
+    try:
+        daemon.run()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.shutdown()
+        server.server_close()
+        daemon.close()
@@ -1,8 +1,24 @@
 from dataclasses import dataclass, field
-from datetime import datetime, timezone
+from datetime import date, datetime, timedelta, timezone
 import json
+import struct
 
-@dataclass
+CONTENT_TYPE_JSON = "application/json"
+CONTENT_TYPE_COMPACT = "application/x-notification-v1"
+
+# Mesmo esquema de agendamento_service/src/rabbitmq/notification.py.
+STATUS = ("PENDENTE", "CONFIRMADO", "REJEITADO", "CONCLUIDO", "CANCELADO")
+ORIGENS = ("AGENDAMENTO",)
+
+MENSAGEM = "Sua consulta para o dia {data} às {horario}h teve o status atualizado para {novo_status}"
+
+_HEADER = struct.Struct("!BBQQBqB")
+_AGENDA = struct.Struct("!iB")
+_VERSION = 1
+_FLAG_TEMPLATE = 0x01
+_EPOCH = date(1970, 1, 1)
+
+@dataclass(slots=True)
 class Notification:
     user_id: int
     agendamento_id: int
@@ -10,6 +26,15 @@ class Notification:
     mensagem: str
     origem: str = "AGENDAMENTO"
     timestamp: str = field(default_factory=lambda: datetime.now(timezone.utc).isoformat())
+    data: str = None
+    horario: int = None
+
+    @staticmethod
+    def decode(body: bytes, content_type: str = None) -> "Notification":
+        # Sem content_type (mensagens antigas) o corpo é JSON.
+        if content_type == CONTENT_TYPE_COMPACT:
+            return Notification.from_compact(body)
+        return Notification.from_json(body.decode())
 
     @staticmethod
     def from_json(body: str) -> "Notification":
@@ -21,5 +46,35 @@ class Notification:
             novo_status=data["novo_status"],
             mensagem=data["mensagem"],
             origem=data.get("origem", "AGENDAMENTO"),
-            timestamp=data.get("timestamp")
-        )
\ No newline at end of file
+            timestamp=data.get("timestamp"),
+            data=data.get("data"),
+            horario=data.get("horario")
+        )
+
+    @staticmethod
+    def from_compact(body: bytes) -> "Notification":
+        versao, flags, user_id, agendamento_id, status, timestamp_ms, origem = _HEADER.unpack_from(body)
+        if versao != _VERSION:
+            raise ValueError(f"Versão {versao} do formato compacto não suportada.")
+
+        novo_status = STATUS[status]
+        resto = body[_HEADER.size:]
+
+        data = horario = None
+        if flags & _FLAG_TEMPLATE:
+            dias, horario = _AGENDA.unpack_from(resto)
+            data = (_EPOCH + timedelta(days=dias)).isoformat()
+            mensagem = MENSAGEM.format(data=data, horario=horario, novo_status=novo_status)
+        else:
+            mensagem = resto.decode()
+
+        return Notification(
+            user_id=user_id,
+            agendamento_id=agendamento_id,
+            novo_status=novo_status,
+            mensagem=mensagem,
+            origem=ORIGENS[origem],
+            timestamp=datetime.fromtimestamp(timestamp_ms / 1000, timezone.utc).isoformat(),
+            data=data,
+            horario=horario
+        )
@@ -1,6 +1,17 @@
 import pika
 import json
 import os
+import time
+from dataclasses import asdict
+from datetime import datetime, timezone
+
+# Roda dentro da imagem do agendamento_client (utils/ ao lado de src/); o formato
+# compacto é decodificado pela mesma Notification do cliente.
+from src.rabbitmq.notification import Notification
+
+def decode_payload(body, content_type=None):
+    """Converte o corpo da mensagem em dict, aceitando JSON e o formato compacto."""
+    return asdict(Notification.decode(body, content_type))
 
 class NotificationConsumer:
     def __init__(self, user_id: int):
@@ -13,6 +24,20 @@ class NotificationConsumer:
         self.host = os.getenv("RABBITMQ_HOST", "rabbitmq")
         self.credentials = pika.PlainCredentials("guest", "guest")
 
+        # "consume" usa basic_consume com prefetch e acks cumulativos; "get" mantém o basic_get.
+        self.mode = os.getenv("CONSUMER_MODE", "consume")
+        self.prefetch = int(os.getenv("CONSUMER_PREFETCH", "500"))
+        self.ack_batch = int(os.getenv("CONSUMER_ACK_BATCH", "100"))
+        self.ack_interval = float(os.getenv("CONSUMER_ACK_INTERVAL", "0.2"))
+        self.idle_timeout = float(os.getenv("CONSUMER_IDLE_TIMEOUT", "1"))
+
+        self._ultimo_tag = None
+        self._sem_ack = 0
+        self._ultimo_ack = time.monotonic()
+
+        # A fila do usuário guarda tudo o que ainda não foi lido.
+        self.primeira_leitura = False
+
     def _get_channel(self):
         """Abre conexão e canal de forma segura."""
         connection = pika.BlockingConnection(
@@ -21,27 +46,36 @@ class NotificationConsumer:
         channel = connection.channel()
         return connection, channel
 
+    def _declare(self, channel):
+        """Garante exchange, fila e bind; devolve quantas mensagens já estão na fila."""
+        channel.exchange_declare(
+            exchange="notifications", 
+            exchange_type="direct", 
+            durable=True
+        )
+        
+        declare = channel.queue_declare(
+            queue=self.queue_name, 
+            durable=True
+        )
+        
+        channel.queue_bind(
+            exchange="notifications", 
+            queue=self.queue_name, 
+            routing_key=str(self.user_id)
+        )
+
+        return declare.method.message_count
+
     def consume_all(self):
+        if self.mode != "get":
+            return self._consume_all_push()
+
         mensagens = []
         connection, channel = self._get_channel()
 
         try:
-            channel.exchange_declare(
-                exchange="notifications", 
-                exchange_type="direct", 
-                durable=True
-            )
-            
-            channel.queue_declare(
-                queue=self.queue_name, 
-                durable=True
-            )
-            
-            channel.queue_bind(
-                exchange="notifications", 
-                queue=self.queue_name, 
-                routing_key=str(self.user_id)
-            )
+            self._declare(channel)
 
             # 2. Loop de Consumo (Polling)
             print(f"📭 Checando caixa de entrada: {self.queue_name}...", flush=True)
@@ -57,7 +91,7 @@ class NotificationConsumer:
                     break  # Fila vazia, terminamos.
 
                 # Processa a mensagem
-                payload = json.loads(body.decode())
+                payload = decode_payload(body, header_frame.content_type)
                 mensagens.append(payload)
 
                 # Confirma o recebimento (remove da fila)
@@ -71,4 +105,220 @@ class NotificationConsumer:
             if connection and connection.is_open:
                 connection.close()
         
-        return mensagens
\ No newline at end of file
+        return mensagens
+
+    def _consume_all_push(self):
+        """Esvazia a fila com basic_consume: o broker empurra até `prefetch` mensagens
+        e os acks saem cumulativos, em vez de uma ida e volta por mensagem."""
+        mensagens = []
+        connection = None
+
+        try:
+            connection, channel = self._get_channel()
+            pendentes = self._declare(channel)
+
+            print(f"📭 Checando caixa de entrada: {self.queue_name}...", flush=True)
+
+            # pendentes None: sem contagem prévia (stream), lê até a fila ficar ociosa.
+            if pendentes is None or pendentes:
+                for delivery_tag, payload in self._stream(channel, self.idle_timeout):
+                    if payload is None:
+                        break  # Fila ociosa, terminamos.
+
+                    mensagens.append(payload)
+                    self._processed(channel, delivery_tag)
+
+                    if pendentes is not None and len(mensagens) >= pendentes:
+                        break
+
+                self._stop(channel)
+
+        except Exception as e:
+            print(f"❌ Erro ao conectar no RabbitMQ: {e}")
+            mensagens = [] # Retorna vazio em caso de erro de conexão
+
+        finally:
+            if connection and connection.is_open:
+                connection.close()
+
+        return mensagens
+
+    def follow(self, callback):
+        """Entrega cada notificação ao callback assim que chega, até Ctrl+C."""
+        connection = None
+
+        try:
+            connection, channel = self._get_channel()
+            self._declare(channel)
+
+            for delivery_tag, payload in self._stream(channel, self.ack_interval):
+                if payload is not None:
+                    callback(payload)
+                    self._processed(channel, delivery_tag)
+
+        except KeyboardInterrupt:
+            pass
+
+        finally:
+            if connection and connection.is_open:
+                self._stop(channel)
+                connection.close()
+
+    def _stream(self, channel, inactivity_timeout):
+        """Gera (delivery_tag, payload) conforme o broker empurra as mensagens, ou
+        (None, None) quando a fila fica ociosa, depois de confirmar o pendente."""
+        channel.basic_qos(prefetch_count=self.prefetch)
+
+        for method_frame, properties, body in channel.consume(
+            queue=self.queue_name,
+            auto_ack=False,
+            inactivity_timeout=inactivity_timeout
+        ):
+            if method_frame is None:
+                self._ack_pending(channel)
+                yield None, None
+                continue
+
+            yield method_frame.delivery_tag, decode_payload(body, properties.content_type)
+
+    def _processed(self, channel, delivery_tag):
+        """Ack cumulativo (multiple=True) a cada `ack_batch` mensagens ou `ack_interval`
+        segundos, sempre depois do processamento."""
+        self._ultimo_tag = delivery_tag
+        self._sem_ack += 1
+
+        if self._sem_ack >= self.ack_batch or time.monotonic() - self._ultimo_ack >= self.ack_interval:
+            self._ack_pending(channel)
+
+    def _ack_pending(self, channel):
+        if self._sem_ack:
+            channel.basic_ack(delivery_tag=self._ultimo_tag, multiple=True)
+            self._sem_ack = 0
+        self._ultimo_ack = time.monotonic()
+
+    def _stop(self, channel):
+        """Confirma o que foi processado e devolve o restante do prefetch para a fila."""
+        if channel.is_open:
+            self._ack_pending(channel)
+            channel.cancel()
+
+class ShardedNotificationConsumer(NotificationConsumer):
+    """Topologia sharded: as notificações ficam em filas stream compartilhadas
+    (notifications.shard.<id % NOTIFICATION_SHARDS>). Ler não remove mensagens, então
+    cada usuário retoma do último offset salvo e descarta as de outros usuários."""
+
+    def __init__(self, user_id: int):
+        super().__init__(user_id)
+
+        self.shards = int(os.getenv("NOTIFICATION_SHARDS", "16"))
+        self.max_age = os.getenv("NOTIFICATION_STREAM_MAX_AGE", "7D")
+        self.offsets_file = os.path.expanduser(os.getenv("NOTIFICATION_OFFSETS_FILE", "~/.med_session/offsets.json"))
+        self.queue_name = f"notifications.shard.{int(user_id) % self.shards}"
+
+        # Posição salva: o último offset lido ou, antes da primeira mensagem, {"desde": <epoch>}.
+        # Sem nenhuma (ex.: máquina nova), começa de agora em vez do "first", que varreria
+        # até NOTIFICATION_STREAM_MAX_AGE do shard inteiro; o histórico anterior fica na
+        # caixa de entrada do serviço (consultar_notificacoes).
+        posicao = self._carregar_offsets().get(str(user_id))
+        self.primeira_leitura = posicao is None
+        if posicao is None:
+            posicao = {"desde": int(time.time())}
+            self._salvar_posicao(posicao)
+
+        self._offset = posicao if isinstance(posicao, int) else None
+        self._desde = posicao["desde"] if isinstance(posicao, dict) else None
+        self._offset_salvo = self._offset
+        self._offset_por_tag = {}
+
+    def consume_all(self):
+        # Streams não aceitam basic_get: sempre pelo caminho com basic_consume.
+        return self._consume_all_push()
+
+    def _declare(self, channel):
+        channel.exchange_declare(
+            exchange="notifications",
+            exchange_type="direct",
+            durable=True
+        )
+
+        channel.queue_declare(
+            queue=self.queue_name,
+            durable=True,
+            arguments={"x-queue-type": "stream", "x-max-age": self.max_age}
+        )
+
+        channel.queue_bind(
+            exchange="notifications",
+            queue=self.queue_name,
+            routing_key=self.queue_name
+        )
+
+        return None
+
+    def _stream(self, channel, inactivity_timeout):
+        channel.basic_qos(prefetch_count=self.prefetch)
+
+        for method_frame, properties, body in channel.consume(
+            queue=self.queue_name,
+            auto_ack=False,
+            inactivity_timeout=inactivity_timeout,
+            arguments={
+                "x-stream-offset": (
+                    self._offset + 1 if self._offset is not None
+                    else datetime.fromtimestamp(self._desde, timezone.utc)
+                ),
+                "x-stream-filter": str(self.user_id),
+                "x-stream-match-unfiltered": True
+            }
+        ):
+            if method_frame is None:
+                self._ack_pending(channel)
+                yield None, None
+                continue
+
+            headers = properties.headers or {}
+            self._offset_por_tag[method_frame.delivery_tag] = headers.get("x-stream-offset")
+
+            # O filtro do broker é probabilístico: a checagem final é aqui.
+            if str(headers.get("user_id")) != str(self.user_id):
+                self._processed(channel, method_frame.delivery_tag)
+                continue
+
+            yield method_frame.delivery_tag, decode_payload(body, properties.content_type)
+
+    def _processed(self, channel, delivery_tag):
+        offset = self._offset_por_tag.pop(delivery_tag, None)
+        if offset is not None:
+            self._offset = offset
+        super()._processed(channel, delivery_tag)
+
+    def _ack_pending(self, channel):
+        super()._ack_pending(channel)
+
+        # O offset só avança no disco junto com os acks.
+        if self._offset != self._offset_salvo:
+            self._salvar_posicao(self._offset)
+            self._offset_salvo = self._offset
+
+    def _salvar_posicao(self, posicao):
+        offsets = self._carregar_offsets()
+        offsets[str(self.user_id)] = posicao
+
+        os.makedirs(os.path.dirname(self.offsets_file), exist_ok=True)
+        tmp = f"{self.offsets_file}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(offsets, f)
+        os.replace(tmp, self.offsets_file)
+
+    def _carregar_offsets(self):
+        try:
+            with open(self.offsets_file, "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+def create_consumer(user_id: int):
+    """Escolhe o consumidor conforme NOTIFICATION_TOPOLOGY (igual ao do serviço)."""
+    if os.getenv("NOTIFICATION_TOPOLOGY", "per_user") == "sharded":
+        return ShardedNotificationConsumer(user_id)
+    return NotificationConsumer(user_id)
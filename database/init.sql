@@ -30,6 +30,44 @@ CREATE TABLE agendamento (
   CONSTRAINT chk_horario_valido CHECK (horario >= 6 AND horario <= 16) -- Horário de funcionamento das 6:00 às 17:00.
 );
 
+-- Índices das listagens (ver database/migrations/002_agendamento_indexes.sql).
+CREATE INDEX idx_agendamento_ordem ON agendamento (data, horario, id);
+CREATE INDEX idx_agendamento_status_ordem ON agendamento (status, data, horario, id) INCLUDE (paciente_id, medico_id, especialidade, tipo_pagamento);
+CREATE INDEX idx_agendamento_paciente_status ON agendamento (paciente_id, status, data, horario);
+CREATE INDEX idx_agendamento_medico_status ON agendamento (medico_id, status, data, horario);
+
+-- Notificações pendentes de publicação (ver database/migrations/001_outbox.sql).
+CREATE TABLE outbox (
+  id BIGSERIAL PRIMARY KEY,
+  user_id BIGINT NOT NULL,
+  payload TEXT NOT NULL,
+  criado_em TIMESTAMPTZ NOT NULL DEFAULT now(),
+  reservado_ate TIMESTAMPTZ -- Lote reservado por um relay (ver database/migrations/004_outbox_reserva.sql).
+);
+
+-- Caixa de entrada das notificações (ver database/migrations/003_notificacao.sql).
+CREATE TABLE notificacao (
+  id BIGSERIAL PRIMARY KEY,
+  user_id BIGINT NOT NULL,
+  agendamento_id BIGINT NOT NULL,
+  novo_status status_agendamento NOT NULL,
+  mensagem TEXT NOT NULL,
+  origem VARCHAR(50) NOT NULL DEFAULT 'AGENDAMENTO',
+  criado_em TIMESTAMPTZ NOT NULL DEFAULT now(),
+
+  CONSTRAINT fk_notificacao_usuario FOREIGN KEY(user_id) REFERENCES usuario(id) ON DELETE CASCADE
+);
+
+CREATE INDEX idx_notificacao_usuario_criado ON notificacao (user_id, criado_em, id);
+
+CREATE TABLE notificacao_leitura (
+  user_id BIGINT PRIMARY KEY,
+  lida_ate_em TIMESTAMPTZ NOT NULL,
+  lida_ate_id BIGINT NOT NULL,
+
+  CONSTRAINT fk_notificacao_leitura_usuario FOREIGN KEY(user_id) REFERENCES usuario(id) ON DELETE CASCADE
+);
+
 -- Sistema sempre deve iniciar com uma conta ADM
 -- Senha "123" hasheada com Bcrypt custo 12.
 INSERT INTO usuario (nome, email, senha, tipo) VALUES 
@@ -0,0 +1,8 @@
+-- Outbox transacional: a notificação é gravada na mesma transação da mudança de status
+-- e publicada no RabbitMQ depois, pelo relay do agendamento_service.
+CREATE TABLE IF NOT EXISTS outbox (
+  id BIGSERIAL PRIMARY KEY,
+  user_id BIGINT NOT NULL,
+  payload TEXT NOT NULL,
+  criado_em TIMESTAMPTZ NOT NULL DEFAULT now()
+);
@@ -0,0 +1,21 @@
+-- Índices para os caminhos de acesso do AgendamentoRepository. Todas as listagens
+-- ordenam por (data, horario); sem filtro de usuário a paginação por keyset desempata
+-- por id, então esses índices terminam em (data, horario, id) e entregam as linhas já
+-- na ordem, sem Sort. Filtrada por paciente ou médico, (data, horario) já é único
+-- (uk_horario_paciente, uk_horario_medico), o id não entra e, sem status, as próprias
+-- UNIQUE atendem a consulta.
+-- CONCURRENTLY não bloqueia escritas, mas não roda dentro de transação: execute
+-- este arquivo com psql fora de BEGIN/COMMIT.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_agendamento_ordem
+  ON agendamento (data, horario, id);
+
+-- Cobre as colunas das listagens: list_all(status=...) devolve a fatia inteira de um
+-- status e vira Index Only Scan, já na ordem, em vez de Bitmap Heap Scan + Sort.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_agendamento_status_ordem
+  ON agendamento (status, data, horario, id) INCLUDE (paciente_id, medico_id, especialidade, tipo_pagamento);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_agendamento_paciente_status
+  ON agendamento (paciente_id, status, data, horario);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_agendamento_medico_status
+  ON agendamento (medico_id, status, data, horario);
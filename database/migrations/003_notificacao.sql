@@ -0,0 +1,26 @@
+-- Caixa de entrada das notificações: gravada na mesma transação da mudança de status,
+-- ao lado do outbox, para o cliente consultar o histórico sem drenar filas.
+CREATE TABLE IF NOT EXISTS notificacao (
+  id BIGSERIAL PRIMARY KEY,
+  user_id BIGINT NOT NULL,
+  agendamento_id BIGINT NOT NULL,
+  novo_status status_agendamento NOT NULL,
+  mensagem TEXT NOT NULL,
+  origem VARCHAR(50) NOT NULL DEFAULT 'AGENDAMENTO',
+  criado_em TIMESTAMPTZ NOT NULL DEFAULT now(),
+
+  CONSTRAINT fk_notificacao_usuario FOREIGN KEY(user_id) REFERENCES usuario(id) ON DELETE CASCADE
+);
+
+-- Listagem (mais recentes primeiro) e contagem de não lidas são faixas deste índice.
+CREATE INDEX IF NOT EXISTS idx_notificacao_usuario_criado
+  ON notificacao (user_id, criado_em, id);
+
+-- Cursor de leitura: tudo até (lida_ate_em, lida_ate_id) conta como lido.
+CREATE TABLE IF NOT EXISTS notificacao_leitura (
+  user_id BIGINT PRIMARY KEY,
+  lida_ate_em TIMESTAMPTZ NOT NULL,
+  lida_ate_id BIGINT NOT NULL,
+
+  CONSTRAINT fk_notificacao_leitura_usuario FOREIGN KEY(user_id) REFERENCES usuario(id) ON DELETE CASCADE
+);
@@ -0,0 +1,4 @@
+-- O relay reserva um lote por alguns segundos e faz commit antes de publicar, em vez
+-- de segurar os locks do FOR UPDATE durante os confirms do broker. Reserva vencida
+-- (relay que caiu no meio do lote) volta a ser elegível.
+ALTER TABLE outbox ADD COLUMN IF NOT EXISTS reservado_ate TIMESTAMPTZ;
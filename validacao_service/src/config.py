@@ -3,4 +3,14 @@ import os
 class Config:
     VALIDATION_HOST = "0.0.0.0"
     VALIDATION_PORT = int(os.getenv("VALIDATION_PORT"))
-    BUFFER_SIZE = 4096
\ No newline at end of file
+    BUFFER_SIZE = 4096
+
+    VALIDATION_SERVER_MODE = os.getenv("VALIDATION_SERVER_MODE", "asyncio")  # "asyncio" ou "threaded".
+    MAX_CONNECTIONS = int(os.getenv("VALIDATION_MAX_CONNECTIONS", "1000"))  # No limite, novas conexões esperam no backlog do kernel.
+    IDLE_TIMEOUT = float(os.getenv("VALIDATION_IDLE_TIMEOUT", "60"))  # Segundos sem receber dados.
+    SHUTDOWN_TIMEOUT = float(os.getenv("VALIDATION_SHUTDOWN_TIMEOUT", "10"))  # Segundos para drenar requisições.
+
+    BATCH_MAX_ITEMS = int(os.getenv("VALIDATION_BATCH_MAX_ITEMS", "5000"))
+    BATCH_PARALLEL_THRESHOLD = int(os.getenv("VALIDATION_BATCH_PARALLEL_THRESHOLD", "500"))  # Itens a partir dos quais o lote vai para o pool.
+    BATCH_CHUNK_SIZE = int(os.getenv("VALIDATION_BATCH_CHUNK_SIZE", "250"))
+    BATCH_WORKERS = int(os.getenv("VALIDATION_BATCH_WORKERS", "0")) or None  # None: um processo por CPU.
\ No newline at end of file
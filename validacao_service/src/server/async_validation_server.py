@@ -0,0 +1,150 @@
+import asyncio
+import contextlib
+import json
+import signal
+import socket
+
+from src.config import Config
+from src.server.protocol import HEADER, MAGIC, ProtocolError, encode_frame, parse_header
+from src.server.validation_server import ValidationServer
+
+class AsyncValidationServer(ValidationServer):
+
+    def __init__(self):
+        super().__init__()
+        self._connections = {}  # writer -> {"task", "busy"}
+        self._tasks = set()  # Tasks das conexões aceitas, até terminarem.
+
+    def start(self):
+        asyncio.run(self.serve())
+
+    async def serve(self):
+        self._slots = asyncio.Semaphore(Config.MAX_CONNECTIONS)
+        self._stopping = asyncio.Event()
+
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, self._stopping.set)
+
+        listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        listener.bind((Config.VALIDATION_HOST, Config.VALIDATION_PORT))
+        listener.listen()
+        listener.setblocking(False)
+
+        accept_task = asyncio.ensure_future(self._accept_loop(listener))
+
+        try:
+            await self._stopping.wait()
+        finally:
+            # Para de aceitar conexões e espera as requisições em andamento terminarem.
+            accept_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await accept_task
+            listener.close()
+
+        await self._drain()
+
+    async def _accept_loop(self, listener):
+        # No limite de conexões o loop para de aceitar: as excedentes esperam no
+        # backlog do kernel, sem socket nem task do nosso lado, até alguém sair.
+        loop = asyncio.get_running_loop()
+
+        while True:
+            await self._slots.acquire()
+
+            try:
+                sock, _ = await loop.sock_accept(listener)
+            except OSError:
+                # Ex.: EMFILE. Devolve a vaga e tenta de novo em seguida.
+                self._slots.release()
+                await asyncio.sleep(0.1)
+                continue
+            except BaseException:
+                self._slots.release()
+                raise
+
+            task = asyncio.ensure_future(self._open_connection(sock))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _open_connection(self, sock):
+        try:
+            reader, writer = await asyncio.open_connection(sock=sock)
+        except BaseException:
+            sock.close()
+            self._slots.release()
+            raise
+
+        await self.handle_connection(reader, writer)
+
+    async def _drain(self):
+        for writer, state in list(self._connections.items()):
+            if not state["busy"]:
+                writer.close()
+
+        tasks = [state["task"] for state in self._connections.values()]
+        if not tasks:
+            return
+
+        _, pending = await asyncio.wait(tasks, timeout=Config.SHUTDOWN_TIMEOUT)
+        for task in pending:
+            task.cancel()
+
+    async def _read(self, awaitable):
+        return await asyncio.wait_for(awaitable, Config.IDLE_TIMEOUT)
+
+    async def handle_connection(self, reader, writer):
+        # A vaga em _slots já foi reservada por _accept_loop; é devolvida ao fim.
+        state = {"task": asyncio.current_task(), "busy": False}
+        self._connections[writer] = state
+
+        try:
+            primeiro_byte = await self._read(reader.readexactly(1))
+
+            if primeiro_byte == MAGIC[:1]:
+                await self.handle_framed_async(reader, writer, state, primeiro_byte)
+            else:
+                await self.handle_request_async(reader, writer, primeiro_byte)
+
+        except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError, ProtocolError):
+            pass
+
+        finally:
+            del self._connections[writer]
+            self._slots.release()
+
+            writer.close()
+            with contextlib.suppress(Exception):
+                await writer.wait_closed()
+
+    async def handle_framed_async(self, reader, writer, state, primeiro_byte):
+        header = primeiro_byte + await self._read(reader.readexactly(HEADER.size - 1))
+
+        while True:
+            request_id, size = parse_header(header)
+            body = await self._read(reader.readexactly(size))
+
+            state["busy"] = True
+
+            # Corpos grandes (lotes) saem do event loop para não travar as demais conexões.
+            if size > Config.BUFFER_SIZE:
+                response = await asyncio.get_running_loop().run_in_executor(None, self.process, body)
+            else:
+                response = self.process(body)
+
+            writer.write(encode_frame(request_id, response))
+            await writer.drain()
+            state["busy"] = False
+
+            if self._stopping.is_set():
+                return
+
+            header = await self._read(reader.readexactly(HEADER.size))
+
+    async def handle_request_async(self, reader, writer, primeiro_byte):
+        # Protocolo legado: um JSON por conexão.
+        data = primeiro_byte + await self._read(reader.read(Config.BUFFER_SIZE - 1))
+
+        writer.write(json.dumps(self.process(data)).encode())
+        await writer.drain()
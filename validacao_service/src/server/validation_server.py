@@ -1,15 +1,31 @@
 import socket
 import json
 import threading
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain
 
 from src.config import Config
+from src.server.protocol import MAGIC, ProtocolError, encode_frame, read_frame
 from src.validation.payment_validator import PaymentValidator
 
+def _validate_item(validator, item):
+    try:
+        return {"status": validator.validate(item["tipo_pagamento"], item["dados_pagamento"])}
+    except Exception:
+        return {"erro": "item inválido"}
+
+def _validate_chunk(itens):
+    # Executado nos processos do pool; precisa ser uma função de módulo.
+    validator = PaymentValidator()
+    return [_validate_item(validator, item) for item in itens]
+
 class ValidationServer:
 
     def __init__(self):
         self.validator = PaymentValidator()
-        
+        self._batch_pool = None
+        self._batch_pool_lock = threading.Lock()
+
     def start(self):
         with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as server:
             server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
@@ -23,16 +39,51 @@ class ValidationServer:
 
     def handle_connection(self, conn):
         with conn:
-            self.handle_request(conn)
+            try:
+                primeiro_byte = conn.recv(1, socket.MSG_PEEK)
+            except OSError:
+                return
+
+            if not primeiro_byte:
+                return
+
+            if primeiro_byte == MAGIC[:1]:
+                self.handle_framed(conn)
+            else:
+                self.handle_request(conn)
+
+    def handle_framed(self, conn):
+        # Conexão persistente: atende quadros até o cliente encerrar.
+        while True:
+            try:
+                frame = read_frame(conn)
+            except (ProtocolError, OSError):
+                return
+
+            if frame is None:
+                return
+
+            request_id, body = frame
+            try:
+                conn.sendall(encode_frame(request_id, self.process(body)))
+            except OSError:
+                return
 
     def handle_request(self, conn):
+        # Protocolo legado: um JSON por conexão.
+        data = conn.recv(Config.BUFFER_SIZE)
+        if not data:
+            return
+
+        conn.sendall(json.dumps(self.process(data)).encode())
+
+    def process(self, data):
         try:
-            data = conn.recv(Config.BUFFER_SIZE)
-            if not data:
-                return
-            
             payload = json.loads(data.decode())
 
+            if "itens" in payload:
+                return self.process_batch(payload["itens"])
+
             tipo_pagamento = payload["tipo_pagamento"]
             dados_pagamento = payload["dados_pagamento"]
 
@@ -41,9 +92,29 @@ class ValidationServer:
                 dados_pagamento
             )
 
-            response = {"status": status}
+            return {"status": status}
 
         except Exception as e:
-            response = {"erro": "erro interno no servidor"}
+            return {"erro": "erro interno no servidor"}
+
+    def process_batch(self, itens):
+        if len(itens) > Config.BATCH_MAX_ITEMS:
+            return {"erro": f"lote excede o limite de {Config.BATCH_MAX_ITEMS} itens"}
+
+        if len(itens) < Config.BATCH_PARALLEL_THRESHOLD:
+            return {"resultados": [_validate_item(self.validator, item) for item in itens]}
+
+        chunks = [
+            itens[i:i + Config.BATCH_CHUNK_SIZE]
+            for i in range(0, len(itens), Config.BATCH_CHUNK_SIZE)
+        ]
+
+        # map preserva a ordem dos blocos, então a ordem dos itens se mantém.
+        resultados = self._get_batch_pool().map(_validate_chunk, chunks)
+        return {"resultados": list(chain.from_iterable(resultados))}
 
-        conn.sendall(json.dumps(response).encode())
\ No newline at end of file
+    def _get_batch_pool(self):
+        with self._batch_pool_lock:
+            if self._batch_pool is None:
+                self._batch_pool = ProcessPoolExecutor(max_workers=Config.BATCH_WORKERS)
+            return self._batch_pool